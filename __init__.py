@@ -1,4 +1,3 @@
-
-from .translationGemini import translate_text as translate_gemini
-from .translationGoogle import google_translate
-from .translationSiliconCloud import translate_to_chinese
+from .translation.translationGemini import translate_text as translate_gemini
+from .translation.translationGoogle import google_translate
+from .translation.translationSiliconCloud import translate_to_chinese
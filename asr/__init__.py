@@ -0,0 +1,84 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .audio import is_wav, read_wav_info
+from .backends import ASRBackend, LocalBackend, AssemblyAIBackend, get_backend
+from .preprocess import Resampler, export_mono, prepare_upload, TARGET_SAMPLE_RATE
+from .chunking import AudioChunk, split_audio, DEFAULT_CHUNK_MS, DEFAULT_FIRST_CHUNK_MS, DEFAULT_OVERLAP_MS
+from .stitching import TranscriptStitcher
+from .checkpoint import TranscriptionCheckpoint
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def transcribe_file(audio_file, backend, chunk_ms=DEFAULT_CHUNK_MS, overlap_ms=DEFAULT_OVERLAP_MS,
+                    max_workers=DEFAULT_MAX_WORKERS, progress=None, on_utterances=None, should_stop=None,
+                    first_chunk_ms=None):
+    """分块并行识别音频
+
+    音频先在静音处切分为带重叠的分块，分块在线程池中并行识别（后端以网络等待
+    为主），完成的结果交给 TranscriptStitcher 按顺序拼接。
+
+    Args:
+        audio_file: 音频文件路径
+        backend: ASRBackend 实例
+        progress: 每完成一个分块调用 progress(已完成分块数, 分块总数)
+        on_utterances: 每当有新字幕按顺序确定时调用 on_utterances(字幕列表)
+        should_stop: 返回 True 时取消尚未开始的分块
+        first_chunk_ms: 首个分块的目标长度，渐进显示时用较短的首块缩短首条字幕的等待
+
+    Returns:
+        字幕缓存格式的字典列表
+    """
+    chunks = split_audio(audio_file, chunk_ms, overlap_ms, first_chunk_ms)
+    if backend.requires_wav and chunks[0].info is None:
+        raise ValueError(f"{backend.name} 后端仅支持16位PCM WAV: {audio_file}")
+
+    stitcher = TranscriptStitcher(len(chunks), backend.merge_gap_ms)
+    subtitles = []
+
+    def collect(utterances):
+        if utterances:
+            subtitles.extend(utterances)
+            if on_utterances:
+                on_utterances(utterances)
+
+    started = time.perf_counter()
+    logging.info(f"开始识别 {audio_file}: {len(chunks)} 个分块, 后端 {backend.name}")
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+        futures = {executor.submit(backend.transcribe_chunk, chunk): chunk for chunk in chunks}
+        try:
+            for completed, future in enumerate(as_completed(futures), 1):
+                collect(stitcher.add(futures[future], future.result()))
+                if progress:
+                    progress(completed, len(chunks))
+                if should_stop and should_stop():
+                    raise InterruptedError("识别已取消")
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    collect(stitcher.finish())
+    logging.info(
+        f"识别完成 {audio_file}: {len(subtitles)} 条字幕, 耗时 {time.perf_counter() - started:.2f}s"
+    )
+    report = backend.report()
+    if report.get('reused_uploads') or report.get('reused_transcripts'):
+        logging.info(
+            f"从检查点恢复: 复用远端转录 {report['reused_transcripts']} 个, 复用上传 {report['reused_uploads']} 个"
+        )
+    if report.get('uploaded_bytes'):
+        logging.info(
+            f"上传预处理: 原始 {report['original_bytes'] / 1e6:.1f}MB -> 上传 {report['uploaded_bytes'] / 1e6:.1f}MB, "
+            f"节省 {report['bytes_saved'] / 1e6:.1f}MB, 约节省上传时间 {report['upload_seconds_saved']:.1f}s"
+        )
+    return subtitles
+
+
+__all__ = [
+    'ASRBackend', 'LocalBackend', 'AssemblyAIBackend', 'get_backend',
+    'AudioChunk', 'split_audio', 'TranscriptStitcher', 'transcribe_file',
+    'is_wav', 'read_wav_info', 'Resampler', 'export_mono', 'prepare_upload', 'TARGET_SAMPLE_RATE', 'DEFAULT_CHUNK_MS', 'DEFAULT_FIRST_CHUNK_MS', 'DEFAULT_OVERLAP_MS',
+    'DEFAULT_MAX_WORKERS', 'TranscriptionCheckpoint'
+]
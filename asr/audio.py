@@ -0,0 +1,135 @@
+import mmap
+import struct
+import wave
+
+import numpy as np
+
+FRAME_MS = 10
+READ_BLOCK_MS = 5000
+
+
+class WavInfo:
+    """PCM WAV 文件的基本参数，data_offset 为采样数据在文件中的起始字节"""
+
+    __slots__ = ('path', 'channels', 'sample_width', 'sample_rate', 'sample_count', 'data_offset')
+
+    def __init__(self, path, channels, sample_width, sample_rate, sample_count, data_offset):
+        self.path = path
+        self.channels = channels
+        self.sample_width = sample_width
+        self.sample_rate = sample_rate
+        self.sample_count = sample_count
+        self.data_offset = data_offset
+
+    @property
+    def duration_ms(self):
+        return self.sample_count * 1000 // self.sample_rate
+
+    @property
+    def data_bytes(self):
+        return self.sample_count * self.channels * self.sample_width
+
+    def sample_at(self, time_ms):
+        """毫秒时间对应的采样下标，所有读取都按同一网格取整"""
+        return min(self.sample_count, time_ms * self.sample_rate // 1000)
+
+    def byte_size(self, start_ms, end_ms):
+        """[start_ms, end_ms) 原样导出为 WAV 时的字节数"""
+        return 44 + (self.sample_at(end_ms) - self.sample_at(start_ms)) * self.channels * self.sample_width
+
+
+def is_wav(path):
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(12)
+        return header[:4] == b'RIFF' and header[8:12] == b'WAVE'
+    except OSError:
+        return False
+
+def read_wav_info(path):
+    """读取 WAV 参数并定位 data 块，仅支持16位PCM"""
+    with open(path, 'rb') as f:
+        header = f.read(12)
+        if header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            raise ValueError(f"不是 WAV 文件: {path}")
+        fmt = None
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                raise ValueError(f"WAV 文件缺少 data 块: {path}")
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+            if chunk_id == b'fmt ':
+                fmt = struct.unpack('<HHIIHH', f.read(16))
+                f.seek(chunk_size - 16 + (chunk_size & 1), 1)
+            elif chunk_id == b'data':
+                data_offset = f.tell()
+                break
+            else:
+                f.seek(chunk_size + (chunk_size & 1), 1)
+        file_size = f.seek(0, 2)
+
+    if fmt is None:
+        raise ValueError(f"WAV 文件缺少 fmt 块: {path}")
+    audio_format, channels, sample_rate, _, _, bits = fmt
+    if audio_format not in (1, 0xFFFE) or bits != 16:
+        raise ValueError(f"仅支持16位PCM WAV: {path}")
+    data_size = min(chunk_size, file_size - data_offset)
+    return WavInfo(str(path), channels, 2, sample_rate, data_size // (2 * channels), data_offset)
+
+def iter_blocks(info, start_ms, end_ms, block_ms=READ_BLOCK_MS):
+    """按块读取 [start_ms, end_ms) 的采样，yield (块起点, 块终点, (n, 声道数) 的 int16 视图)
+
+    每块单独 mmap 对应的文件区间，视图不复制数据；映射随视图释放而关闭，
+    常驻内存不超过一两个块，与文件大小无关。
+    """
+    frame_bytes = info.channels * info.sample_width
+    with open(info.path, 'rb') as f:
+        time_ms = start_ms
+        while time_ms < end_ms:
+            block_end = min(end_ms, time_ms + block_ms)
+            first = info.sample_at(time_ms)
+            count = info.sample_at(block_end) - first
+            if count <= 0:
+                yield time_ms, block_end, np.zeros((0, info.channels), dtype='<i2')
+            else:
+                offset = info.data_offset + first * frame_bytes
+                aligned = offset - offset % mmap.ALLOCATIONGRANULARITY
+                mapped = mmap.mmap(
+                    f.fileno(), offset - aligned + count * frame_bytes, offset=aligned, access=mmap.ACCESS_READ
+                )
+                yield time_ms, block_end, np.frombuffer(
+                    mapped, dtype='<i2', count=count * info.channels, offset=offset - aligned
+                ).reshape(-1, info.channels)
+            time_ms = block_end
+
+def frame_energies(info, start_ms=0, end_ms=None, frame_ms=FRAME_MS):
+    """[start_ms, end_ms) 内每个 frame_ms 帧首声道的均方能量
+
+    帧按文件起点对齐的绝对网格划分，start_ms 需为 frame_ms 的整数倍，因此同一段
+    音频无论从哪个分块读取，得到的帧能量完全相同。
+    """
+    if end_ms is None:
+        end_ms = info.duration_ms
+    parts = []
+    for block_start, block_end, block in iter_blocks(info, start_ms, end_ms):
+        if not len(block):
+            continue
+        base = info.sample_at(block_start)
+        frame_times = np.arange(block_start, block_end, frame_ms, dtype=np.int64)
+        starts = frame_times * info.sample_rate // 1000 - base
+        counts = np.diff(np.append(starts, len(block)))
+        squares = block[:, 0].astype(np.float64) ** 2
+        energies = np.zeros(len(starts))
+        filled = counts > 0
+        energies[filled] = np.add.reduceat(squares, starts[filled]) / counts[filled]
+        parts.append(energies)
+    return np.concatenate(parts) if parts else np.zeros(0)
+
+def write_wav(info, path, start_ms, end_ms):
+    """将 [start_ms, end_ms) 的音频按块原样写出为独立的 WAV 文件"""
+    with wave.open(str(path), 'wb') as out:
+        out.setnchannels(info.channels)
+        out.setsampwidth(info.sample_width)
+        out.setframerate(info.sample_rate)
+        for _, _, block in iter_blocks(info, start_ms, end_ms):
+            out.writeframes(block.astype('<i2', copy=False).tobytes())
@@ -0,0 +1,282 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+
+from .audio import FRAME_MS
+from .preprocess import TARGET_SAMPLE_RATE, prepare_upload
+from .stitching import MERGE_GAP_MS
+
+LOCAL_VOCABULARY = (
+    'the', 'model', 'paper', 'attention', 'layer', 'we', 'show', 'that', 'data', 'training',
+    'results', 'is', 'a', 'new', 'method', 'and', 'it', 'learns', 'from', 'scale',
+    'so', 'this', 'means', 'better', 'performance', 'on', 'tasks', 'really', 'interesting', 'right'
+)
+
+
+class ASRBackend:
+    """语音识别后端接口
+
+    transcribe_chunk 接收一个 AudioChunk，返回字幕缓存格式的字典列表
+    （speaker/start_time/end_time/text/words），时间为相对分块起点的毫秒数。
+    说话人标签只需在分块内一致，跨分块的对应关系由拼接阶段根据重叠部分推断；
+    merge_gap_ms 为后端断句时同一说话人两句之间的最小停顿，拼接切分点两侧时沿用。
+    """
+
+    name = None
+    requires_wav = False
+    merge_gap_ms = MERGE_GAP_MS
+
+    def transcribe_chunk(self, chunk):
+        raise NotImplementedError
+
+    def report(self):
+        """本次识别的统计信息，没有可报告的内容时返回空字典"""
+        return {}
+
+
+class LocalBackend(ASRBackend):
+    """确定性的本地离线后端，用于测试与基准
+
+    按绝对时间网格上的帧能量检测发声段，每段视为一个单词：单词文本由该段帧能量
+    的校验和从固定词表中选取，说话人由平均响度区分，停顿超过 utterance_gap_ms
+    或说话人变化时开始新的一句。同一段音频无论如何分块，识别结果都完全相同。
+    """
+
+    name = 'local'
+    requires_wav = True
+
+    def __init__(self, threshold=250000.0, loud_threshold=4000000.0, min_gap_ms=60,
+                 min_word_ms=40, utterance_gap_ms=700):
+        self.threshold = threshold
+        self.loud_threshold = loud_threshold
+        self.min_gap_ms = min_gap_ms
+        self.min_word_ms = min_word_ms
+        self.utterance_gap_ms = utterance_gap_ms
+        self.merge_gap_ms = utterance_gap_ms
+
+    def detect_words(self, energies):
+        """返回 [(起始帧, 结束帧), ...] 形式的发声段"""
+        runs = []
+        run_start = None
+        silent = 0
+        gap_frames = max(1, self.min_gap_ms // FRAME_MS)
+        for frame, energy in enumerate(energies.tolist()):
+            if energy >= self.threshold:
+                if run_start is None:
+                    run_start = frame
+                silent = 0
+            elif run_start is not None:
+                silent += 1
+                if silent >= gap_frames:
+                    runs.append((run_start, frame - silent + 1))
+                    run_start = None
+        if run_start is not None:
+            runs.append((run_start, len(energies) - silent))
+        min_frames = max(1, self.min_word_ms // FRAME_MS)
+        return [(start, end) for start, end in runs if end - start >= min_frames]
+
+    def transcribe_chunk(self, chunk):
+        energies = chunk.energies()
+        utterances = []
+        for start, end in self.detect_words(energies):
+            run = energies[start:end]
+            checksum = zlib.crc32(run.tobytes())
+            word = {
+                'text': LOCAL_VOCABULARY[checksum % len(LOCAL_VOCABULARY)],
+                'start': start * FRAME_MS,
+                'end': end * FRAME_MS
+            }
+            speaker = 'A' if run.mean() >= self.loud_threshold else 'B'
+            last = utterances[-1] if utterances else None
+            if (last is None or last['speaker'] != speaker
+                    or word['start'] - last['end_time'] > self.utterance_gap_ms):
+                last = {'speaker': speaker, 'start_time': word['start'], 'words': []}
+                utterances.append(last)
+            last['words'].append(word)
+            last['end_time'] = word['end']
+        for utterance in utterances:
+            utterance['text'] = ' '.join(word['text'] for word in utterance['words'])
+        return utterances
+
+
+class AssemblyAIBackend(ASRBackend):
+    """AssemblyAI 后端
+
+    每个分块先预处理（混缩为单声道、重采样到 sample_rate，可选压缩）再上传，
+    上传与识别分开计时，report 给出节省的字节数，并按实测上传速率估算节省
+    的上传时间。无法解码的格式直接上传原文件。
+
+    传入 checkpoint（TranscriptionCheckpoint）时，每个分块的上传地址和远端
+    转录 id 一经得到就写入检查点；再次识别时优先按 id 取回结果，其次复用上传
+    地址重新提交，两者都失效时才重新上传。
+
+    传入 prepare_executor（如 ProcessPoolExecutor）时预处理在其中执行，多个文件
+    同时识别时 CPU 密集的重采样与压缩不受 GIL 限制。
+    """
+
+    name = 'assemblyai'
+
+    def __init__(self, api_key, preprocess=True, sample_rate=TARGET_SAMPLE_RATE, compress=None, checkpoint=None,
+                 prepare_executor=None):
+        self.api_key = api_key
+        self.preprocess = preprocess
+        self.sample_rate = sample_rate
+        self.compress = compress
+        self.checkpoint = checkpoint
+        self.prepare_executor = prepare_executor
+        self.lock = threading.Lock()
+        self.reused_uploads = 0
+        self.reused_transcripts = 0
+        self.original_bytes = 0
+        self.uploaded_bytes = 0
+        self.upload_seconds = 0.0
+        self.prepare_seconds = 0.0
+
+    def upload(self, transcriber, chunk):
+        """预处理并上传分块，返回上传地址"""
+        if chunk.info is None:
+            size = os.path.getsize(chunk.audio_file)
+            return self.timed_upload(transcriber, chunk.audio_file, size, size, 0.0)
+
+        fd, path = tempfile.mkstemp(suffix='.wav', prefix=f'chunk{chunk.index}-')
+        os.close(fd)
+        try:
+            started = time.perf_counter()
+            if self.preprocess and self.prepare_executor is not None:
+                path, original, size = self.prepare_executor.submit(
+                    prepare_upload, chunk, path, self.sample_rate, self.compress
+                ).result()
+            elif self.preprocess:
+                path, original, size = prepare_upload(chunk, path, self.sample_rate, self.compress)
+            else:
+                chunk.export(path)
+                original = size = os.path.getsize(path)
+            return self.timed_upload(transcriber, path, original, size, time.perf_counter() - started)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def timed_upload(self, transcriber, path, original, size, prepare_seconds):
+        started = time.perf_counter()
+        upload_url = transcriber.upload_file(path)
+        upload_seconds = time.perf_counter() - started
+        with self.lock:
+            self.original_bytes += original
+            self.uploaded_bytes += size
+            self.upload_seconds += upload_seconds
+            self.prepare_seconds += prepare_seconds
+        return upload_url
+
+    def checkpoint_key(self, chunk):
+        """检查点中分块的键，包含分块范围与预处理参数，参数变化后不会复用旧的上传"""
+        settings = f"{self.sample_rate}{self.compress or ''}" if self.preprocess else 'raw'
+        return f"{chunk.start_ms}-{chunk.end_ms}@{settings}"
+
+    def save_checkpoint(self, key, **values):
+        if self.checkpoint is not None:
+            self.checkpoint.update(key, **values)
+
+    def fetch_transcript(self, aai, transcriber, chunk, config):
+        """取回或提交分块的远端转录并等待完成
+
+        上传地址过期时提交本身不会报错，而是转录以 error 状态结束，因此复用的
+        上传地址得到 error 时视为失效，清除检查点后重新上传一次。
+        """
+        key = self.checkpoint_key(chunk)
+        entry = self.checkpoint.get(key) if self.checkpoint is not None else {}
+
+        transcript_id = entry.get('transcript_id')
+        if transcript_id:
+            try:
+                transcript = aai.Transcript.get_by_id(transcript_id)
+                if transcript.status not in (aai.TranscriptStatus.completed, aai.TranscriptStatus.error):
+                    transcript = transcript.wait_for_completion()
+                if transcript.status != aai.TranscriptStatus.error:
+                    with self.lock:
+                        self.reused_transcripts += 1
+                    logging.info(f"分块 {chunk.index} 复用已提交的远端转录 {transcript_id}")
+                    return transcript
+                logging.warning(f"分块 {chunk.index} 的远端转录失败，重新提交: {transcript.error}")
+            except aai.TranscriptError as e:
+                logging.warning(f"无法取回分块 {chunk.index} 的远端转录，重新提交: {e}")
+            self.save_checkpoint(key, transcript_id=None)
+
+        upload_url = entry.get('upload_url')
+        if upload_url:
+            try:
+                transcript = transcriber.submit(upload_url, config=config)
+                self.save_checkpoint(key, transcript_id=transcript.id)
+                transcript = transcript.wait_for_completion()
+                if transcript.status != aai.TranscriptStatus.error:
+                    with self.lock:
+                        self.reused_uploads += 1
+                    logging.info(f"分块 {chunk.index} 复用已上传的音频")
+                    return transcript
+                logging.warning(f"分块 {chunk.index} 复用的上传地址已失效，重新上传: {transcript.error}")
+            except aai.TranscriptError as e:
+                logging.warning(f"分块 {chunk.index} 的上传地址已失效，重新上传: {e}")
+            self.save_checkpoint(key, upload_url=None, transcript_id=None)
+
+        upload_url = self.upload(transcriber, chunk)
+        self.save_checkpoint(key, upload_url=upload_url)
+        transcript = transcriber.submit(upload_url, config=config)
+        self.save_checkpoint(key, transcript_id=transcript.id)
+        return transcript.wait_for_completion()
+
+    def transcribe_chunk(self, chunk):
+        import assemblyai as aai
+
+        aai.settings.api_key = self.api_key
+        config = aai.TranscriptionConfig(speaker_labels=True)
+        transcriber = aai.Transcriber()
+        transcript = self.fetch_transcript(aai, transcriber, chunk, config)
+
+        if transcript.status == aai.TranscriptStatus.error:
+            self.save_checkpoint(self.checkpoint_key(chunk), upload_url=None, transcript_id=None)
+            raise RuntimeError(f"分块 {chunk.index} 识别失败: {transcript.error}")
+        logging.info(f"分块 {chunk.index} 识别完成: {len(transcript.utterances or [])} 条")
+        return [
+            {
+                'speaker': utterance.speaker,
+                'start_time': utterance.start,
+                'end_time': utterance.end,
+                'text': utterance.text,
+                'words': [{'text': word.text, 'start': word.start, 'end': word.end} for word in utterance.words]
+            }
+            for utterance in transcript.utterances or []
+        ]
+
+    def report(self):
+        with self.lock:
+            if not self.uploaded_bytes and not self.reused_uploads and not self.reused_transcripts:
+                return {}
+            saved = self.original_bytes - self.uploaded_bytes
+            rate = self.uploaded_bytes / self.upload_seconds if self.upload_seconds else 0
+            return {
+                'reused_uploads': self.reused_uploads,
+                'reused_transcripts': self.reused_transcripts,
+                'original_bytes': self.original_bytes,
+                'uploaded_bytes': self.uploaded_bytes,
+                'bytes_saved': saved,
+                'prepare_seconds': round(self.prepare_seconds, 3),
+                'upload_seconds': round(self.upload_seconds, 3),
+                'upload_seconds_saved': round(saved / rate, 3) if rate else 0.0
+            }
+
+
+BACKENDS = {
+    LocalBackend.name: LocalBackend,
+    AssemblyAIBackend.name: AssemblyAIBackend
+}
+
+
+def get_backend(name='assemblyai', api_key=None, **options):
+    """按名称创建识别后端，options（上传预处理参数与检查点）只传给 AssemblyAI 后端"""
+    if name not in BACKENDS:
+        raise ValueError(f"不支持的识别后端: {name}")
+    if name == AssemblyAIBackend.name:
+        return AssemblyAIBackend(api_key, **options)
+    return BACKENDS[name]()
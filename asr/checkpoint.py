@@ -0,0 +1,56 @@
+import json
+import logging
+import os
+import threading
+
+
+class TranscriptionCheckpoint:
+    """识别进度检查点，按文件哈希保存每个分块的上传地址与远端转录 id
+
+    分块上传完成、远端任务提交后立即写盘（先写临时文件再替换），程序中途退出
+    后再次识别同一文件时，已提交的分块直接按 id 取回结果，只上传过的分块复用
+    上传地址重新提交，避免重复上传和重复计费。整个文件识别完成后删除检查点。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+        except Exception as e:
+            logging.error(f"加载识别检查点时出错: {e}")
+            self.entries = {}
+
+    def get(self, key):
+        with self.lock:
+            return dict(self.entries.get(key, {}))
+
+    def update(self, key, **values):
+        """更新分块的检查点字段，值为 None 的字段被删除"""
+        with self.lock:
+            entry = self.entries.setdefault(key, {})
+            for name, value in values.items():
+                if value is None:
+                    entry.pop(name, None)
+                else:
+                    entry[name] = value
+            self.save()
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_file = f"{self.path}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.path)
+        except Exception as e:
+            logging.error(f"保存识别检查点时出错: {e}")
+
+    def clear(self):
+        with self.lock:
+            self.entries = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
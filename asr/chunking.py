@@ -0,0 +1,105 @@
+import logging
+
+from .audio import FRAME_MS, is_wav, read_wav_info, frame_energies, write_wav
+
+DEFAULT_CHUNK_MS = 5 * 60 * 1000
+DEFAULT_FIRST_CHUNK_MS = 60 * 1000
+DEFAULT_OVERLAP_MS = 2000
+SEARCH_RATIO = 0.15
+SILENCE_WINDOW_MS = 300
+
+
+class AudioChunk:
+    """待识别的一段音频
+
+    start_ms/end_ms 为含重叠部分的音频范围，core_start_ms/core_end_ms 为该分块
+    独占的时间范围；拼接时中点落在独占范围内的单词才归属本分块。
+    """
+
+    __slots__ = ('index', 'audio_file', 'info', 'start_ms', 'end_ms', 'core_start_ms', 'core_end_ms')
+
+    def __init__(self, index, audio_file, info, start_ms, end_ms, core_start_ms, core_end_ms):
+        self.index = index
+        self.audio_file = audio_file
+        self.info = info
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.core_start_ms = core_start_ms
+        self.core_end_ms = core_end_ms
+
+    def energies(self):
+        """分块范围内的帧能量"""
+        if self.info is None:
+            raise ValueError(f"无法解码音频，仅支持16位PCM WAV: {self.audio_file}")
+        return frame_energies(self.info, self.start_ms, self.end_ms)
+
+    def export(self, path):
+        """将分块写出为独立的 WAV 文件"""
+        write_wav(self.info, path, self.start_ms, self.end_ms)
+
+    def __repr__(self):
+        return f"AudioChunk({self.index}, {self.start_ms}-{self.end_ms}ms)"
+
+
+def find_cut(energies, lo, hi, window):
+    """在帧区间 [lo, hi) 中找滑动窗口能量和最小的位置，返回窗口中心帧"""
+    if hi - lo <= window:
+        return (lo + hi) // 2
+    total = sum(energies[lo:lo + window])
+    best, best_frame = total, lo
+    for frame in range(lo + 1, hi - window + 1):
+        total += energies[frame + window - 1] - energies[frame - 1]
+        if total < best:
+            best, best_frame = total, frame
+    return best_frame + window // 2
+
+def plan_cuts(energies, chunk_ms=DEFAULT_CHUNK_MS, first_chunk_ms=None, frame_ms=FRAME_MS):
+    """按目标分块长度在静音处选取切分点，返回切分点毫秒列表（不含首尾）
+
+    first_chunk_ms 为首个分块的目标长度，较短的首块可以更早得到第一批字幕。
+    """
+    frame_count = len(energies)
+    window = max(1, SILENCE_WINDOW_MS // frame_ms)
+    cuts = []
+    position = 0
+    target_ms = min(first_chunk_ms or chunk_ms, chunk_ms)
+    while True:
+        chunk_frames = max(1, target_ms // frame_ms)
+        search = int(chunk_frames * SEARCH_RATIO)
+        if frame_count - position <= chunk_frames + search:
+            break
+        target = position + chunk_frames
+        cut = find_cut(energies, target - search, target + search, window)
+        cuts.append(cut * frame_ms)
+        position = cut
+        target_ms = chunk_ms
+    return cuts
+
+def split_audio(audio_file, chunk_ms=DEFAULT_CHUNK_MS, overlap_ms=DEFAULT_OVERLAP_MS, first_chunk_ms=None):
+    """将音频在静音处切分为带重叠的分块
+
+    无法解码的格式（非16位PCM WAV）返回覆盖整个文件的单个分块，交给可以直接
+    上传原文件的后端处理。
+    """
+    if not is_wav(audio_file):
+        return [AudioChunk(0, audio_file, None, 0, 0, 0, 0)]
+    try:
+        info = read_wav_info(audio_file)
+    except (ValueError, EOFError) as e:
+        logging.warning(f"无法切分音频，按整个文件识别: {e}")
+        return [AudioChunk(0, audio_file, None, 0, 0, 0, 0)]
+
+    duration = info.duration_ms
+    if duration <= min(first_chunk_ms or chunk_ms, chunk_ms) * (1 + SEARCH_RATIO):
+        return [AudioChunk(0, audio_file, info, 0, duration, 0, duration)]
+
+    overlap_ms -= overlap_ms % FRAME_MS
+    bounds = [0] + plan_cuts(frame_energies(info), chunk_ms, first_chunk_ms) + [duration]
+    return [
+        AudioChunk(
+            idx, audio_file, info,
+            max(0, core_start - overlap_ms), min(duration, core_end + overlap_ms),
+            core_start, core_end
+        )
+        for idx, (core_start, core_end) in enumerate(zip(bounds, bounds[1:]))
+    ]
@@ -0,0 +1,123 @@
+import logging
+import os
+import shutil
+import subprocess
+import wave
+
+import numpy as np
+
+from .audio import iter_blocks
+
+TARGET_SAMPLE_RATE = 16000
+FILTER_TAPS = 63
+
+
+class Resampler:
+    """流式单声道重采样器
+
+    降采样时先用加窗 sinc 低通滤波抗混叠，再按源/目标采样率之比线性插值；
+    滤波器历史与插值相位在块之间延续，按块处理的结果与整段处理一致。
+    输出已补偿滤波器的群延迟，时间轴与输入对齐。
+    """
+
+    def __init__(self, source_rate, target_rate, taps=FILTER_TAPS):
+        self.ratio = source_rate / target_rate
+        self.delay = 0
+        self.kernel = None
+        if target_rate < source_rate:
+            cutoff = 0.5 / self.ratio * 0.9
+            n = np.arange(taps) - (taps - 1) / 2
+            kernel = np.sinc(2 * cutoff * n) * np.hamming(taps)
+            self.kernel = (kernel / kernel.sum()).astype(np.float32)
+            self.delay = (taps - 1) // 2
+            self.history = np.zeros(taps - 1, dtype=np.float32)
+        self.tail = np.zeros(0, dtype=np.float32)
+        self.position = float(self.delay)
+
+    def process(self, samples):
+        """处理一块 float32 采样，返回本块可以确定的输出采样"""
+        if self.kernel is not None:
+            padded = np.concatenate((self.history, samples))
+            self.history = padded[len(padded) - len(self.history):]
+            samples = np.convolve(padded, self.kernel, mode='valid')
+        buffer = np.concatenate((self.tail, samples))
+        last = len(buffer) - 1
+        if last < self.position:
+            self.tail = buffer
+            return np.zeros(0, dtype=np.float32)
+        count = int((last - self.position) // self.ratio) + 1
+        times = self.position + np.arange(count) * self.ratio
+        output = np.interp(times, np.arange(len(buffer)), buffer).astype(np.float32)
+        self.position += count * self.ratio - last
+        self.tail = buffer[last:]
+        return output
+
+    def flush(self):
+        """输入结束后补零推出滤波器中剩余的采样"""
+        if not self.delay:
+            return np.zeros(0, dtype=np.float32)
+        return self.process(np.zeros(self.delay, dtype=np.float32))
+
+
+def to_pcm16(samples):
+    return np.clip(np.rint(samples), -32768, 32767).astype('<i2')
+
+def downmix(block):
+    """(n, 声道数) 的 int16 采样混缩为 float32 单声道"""
+    mono = block[:, 0].astype(np.float32)
+    for channel in range(1, block.shape[1]):
+        mono += block[:, channel]
+    if block.shape[1] > 1:
+        mono *= 1.0 / block.shape[1]
+    return mono
+
+def export_mono(info, path, start_ms, end_ms, sample_rate=TARGET_SAMPLE_RATE):
+    """按块读取 [start_ms, end_ms)，混缩为单声道并重采样后写出为16位 WAV
+
+    只有当前块在内存中，源文件经 mmap 按需读取。源采样率不高于目标时保持原
+    采样率，只做混缩。返回写出的字节数。
+    """
+    sample_rate = min(sample_rate, info.sample_rate)
+    resampler = Resampler(info.sample_rate, sample_rate) if sample_rate != info.sample_rate else None
+    with wave.open(str(path), 'wb') as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        for _, _, block in iter_blocks(info, start_ms, end_ms):
+            mono = downmix(block)
+            if resampler:
+                mono = resampler.process(mono)
+            out.writeframes(to_pcm16(mono).tobytes())
+        if resampler:
+            out.writeframes(to_pcm16(resampler.flush()).tobytes())
+    return os.path.getsize(path)
+
+def compress_audio(path, codec='flac'):
+    """用 ffmpeg 将 WAV 无损压缩为 FLAC，未安装 ffmpeg 时保持原文件
+
+    Returns:
+        (压缩后文件路径, 字节数)
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg or codec != 'flac':
+        logging.warning(f"无法压缩音频（需要 ffmpeg，格式 {codec}），按 WAV 上传")
+        return path, os.path.getsize(path)
+    target = os.path.splitext(path)[0] + '.flac'
+    subprocess.run(
+        [ffmpeg, '-y', '-loglevel', 'error', '-i', path, '-c:a', 'flac', target],
+        check=True, stdin=subprocess.DEVNULL
+    )
+    os.remove(path)
+    return target, os.path.getsize(target)
+
+def prepare_upload(chunk, path, sample_rate=TARGET_SAMPLE_RATE, compress=None):
+    """将分块预处理为待上传的文件
+
+    Returns:
+        (文件路径, 原始字节数, 上传字节数)
+    """
+    original = chunk.info.byte_size(chunk.start_ms, chunk.end_ms)
+    size = export_mono(chunk.info, path, chunk.start_ms, chunk.end_ms, sample_rate)
+    if compress:
+        path, size = compress_audio(path, compress)
+    return path, original, size
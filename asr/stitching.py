@@ -0,0 +1,147 @@
+from collections import Counter
+
+MERGE_GAP_MS = 1500
+
+
+class TranscriptStitcher:
+    """将各分块的识别结果按顺序拼接为完整字幕
+
+    分块可以按任意顺序完成，add 只在前面的分块都到齐后才推进，并返回新确定的
+    字幕（绝对时间）。拼接时：
+      - 单词时间加上分块偏移，只保留中点落在分块独占范围内的单词，去掉重叠部分
+        的重复识别；
+      - 根据重叠部分中时间相交的单词为本分块的说话人标签投票，映射到前一分块
+        已确定的全局标签；没有重叠证据的标签优先沿用同名或尚未对应的已有标签；
+      - 切分点两侧同一说话人、间隔不超过 merge_gap_ms 的两句合并为一句，
+        间隔应与后端自身断句的规则一致。
+    最后一句可能与下一分块的第一句合并，因此保留到下一分块到达或 finish 时输出。
+    """
+
+    def __init__(self, chunk_count, merge_gap_ms=MERGE_GAP_MS):
+        self.chunk_count = chunk_count
+        self.merge_gap_ms = merge_gap_ms
+        self.pending = {}
+        self.next_index = 0
+        self.tail = None
+        self.previous_words = []
+        self.global_speakers = set()
+        self.utterance_count = 0
+
+    @property
+    def done(self):
+        return self.next_index >= self.chunk_count
+
+    def add(self, chunk, utterances):
+        """登记一个分块的识别结果，返回按顺序新确定的字幕列表"""
+        self.pending[chunk.index] = (chunk, utterances)
+        ready = []
+        while self.next_index in self.pending:
+            chunk, utterances = self.pending.pop(self.next_index)
+            ready.extend(self._stitch(chunk, utterances))
+            self.next_index += 1
+        return ready
+
+    def finish(self):
+        """所有分块到齐后输出保留的最后一句"""
+        if self.tail is None:
+            return []
+        tail, self.tail = self.tail, None
+        self.utterance_count += 1
+        return [tail]
+
+    def _stitch(self, chunk, utterances):
+        shifted = [self._shift(utterance, chunk.start_ms) for utterance in utterances]
+        mapping = self._map_speakers(chunk, shifted)
+        self.previous_words = [
+            (word['start'], word['end'], mapping[utterance['speaker']])
+            for utterance in shifted for word in utterance['words']
+        ]
+
+        core_start = chunk.core_start_ms if chunk.index > 0 else None
+        core_end = chunk.core_end_ms if chunk.index < self.chunk_count - 1 else None
+        ready = []
+        at_boundary = True
+        for utterance in shifted:
+            words = [
+                word for word in utterance['words']
+                if (core_start is None or (word['start'] + word['end']) // 2 >= core_start)
+                and (core_end is None or (word['start'] + word['end']) // 2 < core_end)
+            ]
+            if not words:
+                continue
+            if len(words) != len(utterance['words']):
+                utterance['words'] = words
+                utterance['start_time'] = words[0]['start']
+                utterance['end_time'] = words[-1]['end']
+                utterance['text'] = ' '.join(word['text'] for word in words)
+            utterance['speaker'] = mapping[utterance['speaker']]
+
+            if self.tail is not None:
+                if (at_boundary and self.tail['speaker'] == utterance['speaker']
+                        and utterance['start_time'] - self.tail['end_time'] <= self.merge_gap_ms):
+                    at_boundary = False
+                    self.tail['words'].extend(utterance['words'])
+                    self.tail['end_time'] = max(self.tail['end_time'], utterance['end_time'])
+                    self.tail['text'] = f"{self.tail['text']} {utterance['text']}"
+                    continue
+                ready.append(self.tail)
+            at_boundary = False
+            self.tail = utterance
+        self.utterance_count += len(ready)
+        return ready
+
+    @staticmethod
+    def _shift(utterance, offset):
+        return {
+            'speaker': str(utterance['speaker']),
+            'start_time': utterance['start_time'] + offset,
+            'end_time': utterance['end_time'] + offset,
+            'text': utterance['text'],
+            'words': [
+                {'text': word['text'], 'start': word['start'] + offset, 'end': word['end'] + offset}
+                for word in utterance['words']
+            ]
+        }
+
+    def _map_speakers(self, chunk, utterances):
+        """根据与前一分块重叠部分的单词投票，得到 {本分块标签: 全局标签}"""
+        votes = {}
+        if self.previous_words:
+            overlap_end = self.previous_words[-1][1]
+            previous = [word for word in self.previous_words if word[1] > chunk.start_ms]
+            for utterance in utterances:
+                for word in utterance['words']:
+                    if word['start'] >= overlap_end:
+                        break
+                    for start, end, speaker in previous:
+                        if start < word['end'] and word['start'] < end:
+                            votes.setdefault(utterance['speaker'], Counter())[speaker] += 1
+
+        mapping = {}
+        for local, counter in sorted(votes.items(), key=lambda item: -sum(item[1].values())):
+            for speaker, _ in counter.most_common():
+                if speaker not in mapping.values():
+                    mapping[local] = speaker
+                    break
+        unused = [speaker for speaker in sorted(self.global_speakers) if speaker not in mapping.values()]
+        for utterance in utterances:
+            local = utterance['speaker']
+            if local in mapping:
+                continue
+            if local in unused:
+                speaker = local
+            elif unused:
+                speaker = unused[0]
+            elif local not in self.global_speakers and local not in mapping.values():
+                speaker = local
+            else:
+                speaker = next(
+                    (label for label in (chr(code) for code in range(ord('A'), ord('Z') + 1))
+                     if label not in mapping.values() and label not in self.global_speakers),
+                    f"{local}{chunk.index}"
+                )
+            if speaker in unused:
+                unused.remove(speaker)
+            mapping[local] = speaker
+        self.global_speakers.update(mapping.values())
+        return mapping
@@ -0,0 +1,233 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import tarfile
+from pathlib import Path
+
+from cache import resolve_cache_file, open_cache_file, build_subtitle_cache
+from utils import get_file_hash
+
+BUNDLE_VERSION = 1
+BUNDLE_SUFFIX = '.podbundle'
+
+_HASH_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+def compact_subtitles(subtitles):
+    """将字幕转换为紧凑格式，单词存为 [text, start, end] 三元组"""
+    return [
+        {
+            'speaker': subtitle['speaker'],
+            'start_time': subtitle['start_time'],
+            'end_time': subtitle['end_time'],
+            'text': subtitle['text'],
+            'words': [[word['text'], word['start'], word['end']] for word in subtitle['words']]
+        }
+        for subtitle in subtitles
+    ]
+
+def expand_subtitles(compact):
+    """将紧凑格式还原为字幕缓存格式"""
+    return [
+        {
+            'speaker': subtitle['speaker'],
+            'start_time': subtitle['start_time'],
+            'end_time': subtitle['end_time'],
+            'text': subtitle['text'],
+            'words': [{'text': text, 'start': start, 'end': end} for text, start, end in subtitle['words']]
+        }
+        for subtitle in compact
+    ]
+
+def group_translations(translations):
+    """按翻译器分组：{translator: {index: text}}"""
+    grouped = {}
+    for str_idx, translation in translations.items():
+        translator = translation.get('translator', 'google')
+        grouped.setdefault(translator, {})[str_idx] = translation['text']
+    return grouped
+
+def merge_translations(translations, grouped):
+    """将分组翻译合并到缓存翻译中，已有的翻译优先，返回新增条数"""
+    added = 0
+    providers = sorted(grouped, key=lambda translator: len(grouped[translator]), reverse=True)
+    for translator in providers:
+        for str_idx, text in grouped[translator].items():
+            if str_idx not in translations:
+                translations[str_idx] = {'text': text, 'translator': translator}
+                added += 1
+    return added
+
+def _add_json(tar, name, data):
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    info = tarfile.TarInfo(name)
+    info.size = len(payload)
+    tar.addfile(info, io.BytesIO(payload))
+
+def export_bundle(bundle_path, audio_index, file_hashes=None, include_audio=False, progress=None):
+    """导出字幕包
+
+    包为流式写出的 tar.gz，每个音频依次写入 manifest、紧凑字幕、按翻译器分组
+    的翻译以及可选的音频文件，任一时刻只在内存中保留一个音频的字幕。
+
+    Returns:
+        导出的音频数量
+    """
+    file_hashes = list(file_hashes or audio_index.keys())
+    exported = 0
+    with tarfile.open(bundle_path, 'w|gz') as tar:
+        for file_hash in file_hashes:
+            entry = audio_index.get(file_hash)
+            subtitle_file = resolve_cache_file(entry['subtitle_file']) if entry else None
+            if subtitle_file is None:
+                logging.warning(f"跳过缺少字幕缓存的音频: {file_hash}")
+                continue
+
+            with open_cache_file(subtitle_file) as f:
+                cached_data = json.load(f)
+
+            audio_path = Path(entry['file_path'])
+            with_audio = include_audio and audio_path.exists()
+            grouped = group_translations(cached_data.get('translations', {}))
+            manifest = {
+                'version': BUNDLE_VERSION,
+                'file_hash': file_hash,
+                'file_name': audio_path.name,
+                'subtitle_count': len(cached_data['subtitles']),
+                'translators': sorted(grouped),
+                'audio': f"audio{audio_path.suffix}" if with_audio else None
+            }
+
+            _add_json(tar, f"{file_hash}/manifest.json", manifest)
+            _add_json(tar, f"{file_hash}/subtitles.json", compact_subtitles(cached_data['subtitles']))
+            _add_json(tar, f"{file_hash}/translations.json", grouped)
+            if with_audio:
+                tar.add(str(audio_path), arcname=f"{file_hash}/{manifest['audio']}", recursive=False)
+
+            exported += 1
+            if progress:
+                progress(exported, len(file_hashes))
+            logging.info(f"已导出: {audio_path.name}")
+    return exported
+
+def _extract_audio(tar, member, target, file_hash):
+    """流式解出音频并校验内容哈希，校验失败时删除文件"""
+    hash_md5 = hashlib.md5()
+    tmp_path = target.with_name(target.name + '.part')
+    source = tar.extractfile(member)
+    with open(tmp_path, 'wb') as f:
+        for chunk in iter(lambda: source.read(1 << 20), b""):
+            hash_md5.update(chunk)
+            f.write(chunk)
+    if hash_md5.hexdigest() != file_hash:
+        tmp_path.unlink()
+        logging.error(f"音频内容哈希不匹配，已丢弃: {target.name}")
+        return False
+    os.replace(tmp_path, target)
+    return True
+
+def _store_episode(episode, subtitle_cache_dir):
+    """写入或合并一个导入音频的字幕缓存，返回字幕缓存路径"""
+    manifest = episode['manifest']
+    file_hash = manifest['file_hash']
+    subtitle_file = subtitle_cache_dir / f"{file_hash}.json"
+    existing = resolve_cache_file(subtitle_file)
+
+    if existing is not None:
+        with open_cache_file(existing) as f:
+            cached_data = json.load(f)
+        translations = cached_data.get('translations', {})
+        added = merge_translations(translations, episode.get('translations', {}))
+        if not added:
+            return subtitle_file
+        logging.info(f"合并翻译 {manifest['file_name']}: 新增 {added} 条")
+        file_path = cached_data.get('file_path', manifest['file_name'])
+        subtitles = cached_data['subtitles']
+        segmentation = cached_data.get('segmentation')
+    else:
+        translations = {}
+        merge_translations(translations, episode.get('translations', {}))
+        file_path = episode.get('audio_path') or manifest['file_name']
+        subtitles = expand_subtitles(episode['subtitles'])
+        segmentation = None
+
+    translations = dict(sorted(translations.items(), key=lambda item: int(item[0])))
+    cached_data = build_subtitle_cache(translations, file_path, subtitles, segmentation)
+    with open_cache_file(subtitle_file, 'w') as f:
+        json.dump(cached_data, f, ensure_ascii=False, indent=2)
+    return subtitle_file
+
+def import_bundle(bundle_path, data_dir, progress=None):
+    """流式导入字幕包
+
+    逐个成员读取，不需要随机访问或整体解压。字幕缓存已存在时只合并缺少的
+    翻译；附带的音频解出到 data_dir/audio 并校验内容哈希。
+
+    Returns:
+        {file_hash: 索引条目}，由调用方通过 merge_index_entries 合并到音频索引
+    """
+    data_dir = Path(data_dir)
+    subtitle_cache_dir = data_dir / "subtitles"
+    audio_dir = data_dir / "audio"
+    entries = {}
+    episode = None
+
+    def finish(episode):
+        if not episode or 'subtitles' not in episode:
+            return
+        manifest = episode['manifest']
+        subtitle_file = _store_episode(episode, subtitle_cache_dir)
+        entries[manifest['file_hash']] = {
+            'file_path': episode.get('audio_path') or manifest['file_name'],
+            'subtitle_file': str(subtitle_file)
+        }
+        if progress:
+            progress(len(entries), 0)
+        logging.info(f"已导入: {manifest['file_name']}")
+
+    with tarfile.open(bundle_path, 'r|gz') as tar:
+        for member in tar:
+            if not member.isfile() or member.name.count('/') != 1:
+                continue
+            file_hash, name = member.name.split('/')
+            if not _HASH_PATTERN.match(file_hash):
+                logging.warning(f"跳过无效的包成员: {member.name}")
+                continue
+
+            if name == 'manifest.json':
+                finish(episode)
+                manifest = json.load(tar.extractfile(member))
+                if manifest.get('version') != BUNDLE_VERSION or manifest.get('file_hash') != file_hash:
+                    logging.warning(f"跳过不兼容的包条目: {file_hash}")
+                    episode = None
+                    continue
+                episode = {'manifest': manifest}
+            elif episode is None or episode['manifest']['file_hash'] != file_hash:
+                continue
+            elif name == 'subtitles.json':
+                episode['subtitles'] = json.load(tar.extractfile(member))
+            elif name == 'translations.json':
+                episode['translations'] = json.load(tar.extractfile(member))
+            elif name == episode['manifest'].get('audio'):
+                audio_dir.mkdir(exist_ok=True)
+                target = audio_dir / Path(episode['manifest']['file_name']).name
+                if target.exists() and get_file_hash(target) != file_hash:
+                    target = target.with_name(f"{target.stem}-{file_hash[:8]}{target.suffix}")
+                if target.exists() or _extract_audio(tar, member, target, file_hash):
+                    episode['audio_path'] = os.path.abspath(target)
+        finish(episode)
+    return entries
+
+def merge_index_entries(audio_index, entries):
+    """将导入结果合并到音频索引；本地已有且音频存在的条目保持不变"""
+    for file_hash, entry in entries.items():
+        local = audio_index.get(file_hash)
+        if local and os.path.exists(local['file_path']):
+            local['subtitle_file'] = entry['subtitle_file']
+            continue
+        merged = dict(local or {})
+        merged.update(entry)
+        audio_index[file_hash] = merged
@@ -0,0 +1,335 @@
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from array import array
+from pathlib import Path
+
+RENDER_SNAPSHOT_VERSION = 2
+
+COMPRESSED_SUFFIX = '.gz'
+DEFAULT_CACHE_BUDGET_MB = 500
+DEFAULT_COMPRESS_AFTER_DAYS = 7
+
+
+def compressed_path(path):
+    """缓存文件对应的压缩文件路径"""
+    path = Path(path)
+    return path.with_name(path.name + COMPRESSED_SUFFIX)
+
+def resolve_cache_file(path):
+    """返回缓存文件实际存在的版本（原始或压缩），都不存在时返回None"""
+    path = Path(path)
+    if path.exists():
+        return path
+    gz_path = compressed_path(path)
+    if gz_path.exists():
+        return gz_path
+    return None
+
+def open_cache_file(path, mode='r'):
+    """打开缓存文件，压缩文件透明解压；写入时删除过期的压缩副本"""
+    path = Path(path)
+    if 'w' in mode:
+        gz_path = compressed_path(path)
+        if gz_path.exists():
+            gz_path.unlink()
+        return open(path, mode, encoding='utf-8')
+    if path.name.endswith(COMPRESSED_SUFFIX):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def compress_cache_file(path):
+    """使用快速压缩等级压缩缓存文件并删除原文件，返回压缩后的路径"""
+    path = Path(path)
+    gz_path = compressed_path(path)
+    tmp_path = gz_path.with_name(gz_path.name + '.tmp')
+    with open(path, 'rb') as src, gzip.open(tmp_path, 'wb', compresslevel=1) as dst:
+        for chunk in iter(lambda: src.read(1 << 20), b""):
+            dst.write(chunk)
+    os.replace(tmp_path, gz_path)
+    path.unlink()
+    return gz_path
+
+def build_subtitle_cache(translations, file_path, subtitles, segmentation=None):
+    """按流式加载需要的键顺序组织字幕缓存：翻译和字幕数在前，字幕数组最后
+
+    segmentation 为识别结果重新分段时原字幕与分段的对应关系，没有时省略。
+    """
+    cache_data = {
+        'translations': translations,
+        'file_path': file_path
+    }
+    if segmentation:
+        cache_data['segmentation'] = segmentation
+    cache_data['subtitle_count'] = len(subtitles)
+    cache_data['subtitles'] = subtitles
+    return cache_data
+
+def iter_cache_items(f, array_key='subtitles', chunk_size=1 << 16):
+    """流式解析字幕缓存JSON
+
+    顶层对象的每个键值对产出一次 (key, value)；array_key（可以是多个键的元组）
+    对应的数组不整体解析，而是逐个元素产出 (array_key, element)，因此无需等待
+    整个文件读完，内存占用也与数组长度无关。该键的值不是数组（如 null）时
+    照常整体产出。
+    """
+    array_keys = (array_key,) if isinstance(array_key, str) else tuple(array_key)
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+
+    def fill(size=chunk_size):
+        nonlocal buf, pos, eof
+        chunk = f.read(size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    def expect(chars):
+        nonlocal pos
+        skip_ws()
+        if pos >= len(buf) or buf[pos] not in chars:
+            raise ValueError(f"字幕缓存格式错误，位置 {pos} 处应为 {chars!r}")
+        pos += 1
+        return buf[pos - 1]
+
+    def decode():
+        nonlocal pos
+        skip_ws()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                # 值必须后接分隔符才能确认已完整读入（如数字被截断）
+                if end < len(buf) or eof:
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            # 单个值跨越多次读取时按已读长度倍增，长字符串的解析保持线性
+            fill(max(chunk_size, len(buf) - pos))
+
+    expect('{')
+    skip_ws()
+    if buf[pos:pos + 1] == '}':
+        return
+    while True:
+        key = decode()
+        expect(':')
+        skip_ws()
+        if key in array_keys and buf[pos:pos + 1] == '[':
+            expect('[')
+            skip_ws()
+            if buf[pos:pos + 1] == ']':
+                pos += 1
+            else:
+                while True:
+                    yield key, decode()
+                    if expect(',]') == ']':
+                        break
+        else:
+            yield key, decode()
+        if expect(',}') == '}':
+            return
+
+def compute_render_key(subtitles, translations):
+    """计算渲染快照的内容哈希（字幕 + 翻译）"""
+    payload = json.dumps(
+        {
+            'version': RENDER_SNAPSHOT_VERSION,
+            'subtitles': subtitles,
+            'translations': translations
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+def pack_ints(values):
+    """将整数序列打包为base64编码的int32数组"""
+    return base64.b64encode(array('i', values).tobytes()).decode('ascii')
+
+def unpack_ints(data):
+    """将base64编码的int32数组还原为array"""
+    values = array('i')
+    values.frombytes(base64.b64decode(data))
+    return values
+
+def save_render_snapshot(snapshot_file, key, text, palette, runs, blocks, words):
+    """保存渲染后的字幕文档快照
+
+    Args:
+        snapshot_file: 快照文件路径
+        key: compute_render_key 计算出的内容哈希
+        text: 文档纯文本
+        palette: 前景色列表，runs 中以下标引用
+        runs: 扁平的 [start, end, palette_index, ...] 格式区间
+        blocks: 扁平的 [start, content_start, translation_start, translation_end, end, ...] 字幕块位置表
+        words: 扁平的 [start_pos, end_pos, ...] 单词位置表
+    """
+    try:
+        snapshot = {
+            'version': RENDER_SNAPSHOT_VERSION,
+            'key': key,
+            'text': text,
+            'palette': palette,
+            'runs': pack_ints(runs),
+            'blocks': pack_ints(blocks),
+            'words': pack_ints(words)
+        }
+        with open_cache_file(snapshot_file, 'w') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+    except Exception as e:
+        logging.error(f"保存渲染快照时出错: {e}")
+
+def load_render_snapshot(snapshot_file, key):
+    """加载渲染快照，内容哈希不一致或文件损坏时返回None"""
+    try:
+        snapshot_file = resolve_cache_file(snapshot_file)
+        if snapshot_file is None:
+            return None
+        with open_cache_file(snapshot_file) as f:
+            snapshot = json.load(f)
+        if snapshot.get('version') != RENDER_SNAPSHOT_VERSION or snapshot.get('key') != key:
+            return None
+        return {
+            'text': snapshot['text'],
+            'palette': snapshot['palette'],
+            'runs': unpack_ints(snapshot['runs']),
+            'blocks': unpack_ints(snapshot['blocks']),
+            'words': unpack_ints(snapshot['words'])
+        }
+    except Exception as e:
+        logging.error(f"加载渲染快照时出错: {e}")
+        return None
+
+
+class CacheManager:
+    """字幕缓存目录管理：记录访问时间，按容量预算LRU淘汰，压缩冷缓存
+
+    访问时间记录在音频索引条目的 last_access 字段中，淘汰时同时删除
+    该音频的所有缓存文件和索引条目，保证索引与目录一致。
+    """
+
+    def __init__(self, cache_dir, audio_index, budget_mb=DEFAULT_CACHE_BUDGET_MB,
+                 compress_after_days=DEFAULT_COMPRESS_AFTER_DAYS):
+        self.cache_dir = Path(cache_dir)
+        self.audio_index = audio_index
+        self.budget_bytes = int(budget_mb * 1024 * 1024) if budget_mb else 0
+        self.compress_after = compress_after_days * 86400 if compress_after_days else 0
+
+    @staticmethod
+    def file_hash_of(path):
+        """从缓存文件名中取出音频哈希"""
+        return path.name.split('.', 1)[0]
+
+    def cache_files(self):
+        """按音频哈希分组列出缓存目录中的文件"""
+        groups = {}
+        for path in self.cache_dir.iterdir():
+            if path.is_file():
+                groups.setdefault(self.file_hash_of(path), []).append(path)
+        return groups
+
+    def touch(self, file_hash, now=None):
+        """记录一次访问"""
+        if file_hash in self.audio_index:
+            self.audio_index[file_hash]['last_access'] = now or time.time()
+
+    def last_access(self, file_hash, files=()):
+        """最后访问时间，未记录时退回到缓存文件的修改时间"""
+        entry = self.audio_index.get(file_hash, {})
+        if entry.get('last_access'):
+            return entry['last_access']
+        return max((path.stat().st_mtime for path in files), default=0)
+
+    def reconcile(self, groups, protected=()):
+        """删除无索引的孤立缓存文件和缺少字幕缓存的索引条目，返回索引是否变化"""
+        changed = False
+        for file_hash, files in list(groups.items()):
+            if file_hash in self.audio_index or file_hash in protected:
+                continue
+            for path in files:
+                path.unlink()
+            del groups[file_hash]
+            logging.info(f"删除孤立缓存: {file_hash}")
+
+        for file_hash, entry in list(self.audio_index.items()):
+            if file_hash in protected:
+                continue
+            if resolve_cache_file(entry.get('subtitle_file', '')) is None:
+                del self.audio_index[file_hash]
+                groups.pop(file_hash, None)
+                changed = True
+                logging.info(f"删除缺少字幕缓存的索引条目: {file_hash}")
+        return changed
+
+    def compress_cold(self, groups, protected=(), now=None):
+        """压缩长时间未访问的缓存文件"""
+        if not self.compress_after:
+            return
+        now = now or time.time()
+        for file_hash, files in groups.items():
+            if file_hash in protected:
+                continue
+            if now - self.last_access(file_hash, files) < self.compress_after:
+                continue
+            for i, path in enumerate(files):
+                if path.name.endswith(COMPRESSED_SUFFIX):
+                    continue
+                try:
+                    files[i] = compress_cache_file(path)
+                    logging.info(f"已压缩冷缓存: {path.name}")
+                except Exception as e:
+                    logging.error(f"压缩缓存文件出错 {path.name}: {e}")
+
+    def evict(self, groups, protected=()):
+        """超出容量预算时按最久未访问顺序淘汰，返回被淘汰的音频哈希"""
+        if not self.budget_bytes:
+            return []
+        sizes = {
+            file_hash: sum(path.stat().st_size for path in files)
+            for file_hash, files in groups.items()
+        }
+        total = sum(sizes.values())
+        evicted = []
+        candidates = sorted(
+            (file_hash for file_hash in groups if file_hash not in protected),
+            key=lambda file_hash: self.last_access(file_hash, groups[file_hash])
+        )
+        for file_hash in candidates:
+            if total <= self.budget_bytes:
+                break
+            for path in groups.pop(file_hash):
+                path.unlink()
+            self.audio_index.pop(file_hash, None)
+            total -= sizes[file_hash]
+            evicted.append(file_hash)
+            logging.info(f"缓存超出预算，淘汰: {file_hash} ({sizes[file_hash] / 1024:.0f} KB)")
+        return evicted
+
+    def enforce(self, protected=(), now=None):
+        """执行一次完整的缓存维护，返回音频索引是否被修改"""
+        protected = {file_hash for file_hash in protected if file_hash}
+        groups = self.cache_files()
+        changed = self.reconcile(groups, protected)
+        self.compress_cold(groups, protected, now)
+        if self.evict(groups, protected):
+            changed = True
+        return changed
@@ -0,0 +1,508 @@
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from asr import (
+    transcribe_file, get_backend, TranscriptionCheckpoint, DEFAULT_CHUNK_MS, DEFAULT_MAX_WORKERS,
+    TARGET_SAMPLE_RATE
+)
+from cache import (
+    CacheManager, DEFAULT_CACHE_BUDGET_MB, DEFAULT_COMPRESS_AFTER_DAYS,
+    build_subtitle_cache, open_cache_file, resolve_cache_file
+)
+from config import load_config
+from fingerprint import FingerprintIndex, audio_duration_ms, compute_fingerprint, query_fingerprints, shift_subtitles
+from importers import find_transcript, iter_transcript
+from jobs import TranscriptionJobQueue, list_audio_files, AUDIO_EXTENSIONS, DEFAULT_BATCH_JOBS
+from segmentation import SubtitleSegmenter, segment_utterances
+from translation import translate_text, DEFAULT_TRANSLATION_WORKERS
+from utils import get_file_hash
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+TRANSLATORS = ('google', 'gemini', 'silicon_cloud')
+TRANSLATOR_KEYS = {'gemini': 'gemini_api_key', 'silicon_cloud': 'silicon_cloud_api_key'}
+MIN_REQUEST_INTERVAL = {'silicon_cloud': 0.1}
+
+
+def init_worker(level):
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def timed_call(func, *args):
+    """在子进程中执行 func，返回 (耗时秒数, 结果)，耗时不含排队等待"""
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+def read_cache(subtitle_file):
+    """读取字幕缓存，返回 (字幕列表, 翻译字典, segmentation)"""
+    with open_cache_file(subtitle_file) as f:
+        data = json.load(f)
+    return data['subtitles'], data.get('translations', {}), data.get('segmentation')
+
+def read_shifted_cache(subtitle_file, shift_ms, duration_ms):
+    """读取参考音频的字幕缓存并平移到新音频的时间轴"""
+    subtitles, translations, segmentation = read_cache(subtitle_file)
+    subtitles, translations, trimmed = shift_subtitles(subtitles, translations, shift_ms, duration_ms)
+    return subtitles, translations, None if trimmed else segmentation
+
+def load_transcript(transcript_file, segment):
+    """解析转录文件并分段，返回 (字幕列表, segmentation)"""
+    subtitles = list(iter_transcript(transcript_file))
+    if not segment:
+        return subtitles, None
+    return segment_utterances(subtitles)
+
+def match_fingerprint(audio_file, fingerprint_dir, candidates):
+    """在指纹库中查找内容相同的音频，返回 (音频哈希, 时间偏移毫秒, 误码率) 或None"""
+    queries = query_fingerprints(audio_file, audio_duration_ms(audio_file))
+    return FingerprintIndex(fingerprint_dir).match(queries, candidates) if queries else None
+
+def store_fingerprint(audio_file, file_hash, fingerprint_dir):
+    FingerprintIndex(fingerprint_dir).add(file_hash, compute_fingerprint(audio_file))
+
+def write_cache(subtitle_file, cache_data):
+    """编码并写入字幕缓存，返回字节数"""
+    with open_cache_file(subtitle_file, 'w') as f:
+        json.dump(cache_data, f, ensure_ascii=False, indent=2)
+    return os.path.getsize(subtitle_file)
+
+def collect_audio_files(paths):
+    """展开命令行给出的文件与文件夹，按出现顺序去重"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(list_audio_files(path))
+        elif path.lower().endswith(AUDIO_EXTENSIONS) and os.path.isfile(path):
+            files.append(path)
+        else:
+            logging.warning(f"跳过不是音频的路径: {path}")
+    return list(dict.fromkeys(os.path.abspath(path) for path in files))
+
+
+class FileWork:
+    """一个文件在流水线中的状态"""
+
+    def __init__(self, audio_file):
+        self.audio_file = audio_file
+        self.file_hash = None
+        self.source = None
+        self.matched = {}
+        self.subtitles = []
+        self.translations = {}
+        self.segmentation = None
+        self.scheduled = set()
+        self.tasks = []
+        self.new_translations = 0
+        self.failed_translations = 0
+        self.upload_report = {}
+        self.timings = {}
+
+
+class BatchRunner:
+    """无界面的批量转录与翻译
+
+    CPU 密集的步骤（内容哈希、音频指纹、转录文件解析、上传前的音频预处理、
+    字幕缓存编码）在进程池中执行，不受 GIL 限制；语音识别与翻译等网络请求在
+    asyncio 中并发，阻塞的请求交给线程池，同时识别的文件数与同时进行的翻译
+    请求数分别由 jobs 与 translation_workers 限制。每个文件的字幕一经识别确定
+    就开始翻译，结果写入与图形界面相同的 podcast_data 缓存和音频索引。
+    """
+
+    def __init__(self, data_dir, config, translator_type='google', jobs=DEFAULT_BATCH_JOBS,
+                 translation_workers=DEFAULT_TRANSLATION_WORKERS, processes=None):
+        self.data_dir = Path(data_dir)
+        self.subtitle_cache_dir = self.data_dir / "subtitles"
+        self.subtitle_cache_dir.mkdir(parents=True, exist_ok=True)
+        self.audio_index_file = self.data_dir / "audio_index.json"
+        self.fingerprint_dir = str(self.data_dir / "fingerprints")
+        FingerprintIndex(self.fingerprint_dir)
+        self.config = config
+        self.translator_type = translator_type
+        self.api_key = config.get(TRANSLATOR_KEYS.get(translator_type, ''), '') if translator_type else None
+        self.jobs = max(1, jobs)
+        self.translation_workers = max(1, translation_workers)
+        self.processes = processes or os.cpu_count() or 1
+        self.segment = config.get('segment_subtitles', True)
+        self.import_transcripts = config.get('import_transcripts', True)
+        self.match_fingerprints = config.get('match_fingerprints', True)
+        self.asr_backend = config.get('asr_backend', 'assemblyai')
+        self.asr_options = {
+            'preprocess': config.get('asr_preprocess', True),
+            'sample_rate': config.get('asr_sample_rate', TARGET_SAMPLE_RATE),
+            'compress': config.get('asr_compress') or None
+        }
+        self.audio_index = self.load_audio_index()
+        self.updated_entries = {}
+        self.results = []
+        self.stage_seconds = {}
+        self._last_request_time = 0
+
+    def load_audio_index(self):
+        try:
+            if self.audio_index_file.exists():
+                with open(self.audio_index_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.error(f"加载音频索引时出错: {e}")
+        return {}
+
+    def save_audio_index(self, removed=()):
+        """写回音频索引：重新读取磁盘上的索引后只合并本次处理的条目，不覆盖图形界面同时写入的内容
+
+        removed 为缓存维护删除的音频哈希，这些条目从重新读取的索引中一并删除。
+        """
+        try:
+            self.audio_index = self.load_audio_index()
+            for file_hash in removed:
+                self.audio_index.pop(file_hash, None)
+            self.audio_index.update(self.updated_entries)
+            tmp_file = self.audio_index_file.with_name(self.audio_index_file.name + '.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.audio_index, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.audio_index_file)
+        except Exception as e:
+            logging.error(f"保存音频索引时出错: {e}")
+
+    async def cpu(self, stage, func, *args):
+        """在进程池中执行 CPU 密集的步骤并累计耗时"""
+        seconds, result = await self.loop.run_in_executor(self.process_pool, timed_call, func, *args)
+        self.add_time(stage, seconds)
+        return result
+
+    def add_time(self, stage, seconds):
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    async def run(self, audio_files):
+        """处理全部文件并返回统计摘要"""
+        self.loop = asyncio.get_running_loop()
+        self.asr_slots = asyncio.Semaphore(self.jobs)
+        self.translation_slots = asyncio.Semaphore(self.translation_workers)
+        self.request_lock = asyncio.Lock()
+        self.seen_hashes = set()
+        started = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=self.processes, mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker, initargs=(logging.getLogger().level,)
+        ) as self.process_pool, ThreadPoolExecutor(
+            max_workers=self.jobs + self.translation_workers
+        ) as self.io_pool:
+            self.background = []
+            await asyncio.gather(*(self.process(audio_file) for audio_file in audio_files))
+            await asyncio.gather(*self.background)
+            self.enforce_cache_budget()
+        return self.summary(time.perf_counter() - started)
+
+    async def process(self, audio_file):
+        work = FileWork(audio_file)
+        result = {'file': audio_file}
+        started = time.perf_counter()
+        try:
+            work.file_hash = await self.cpu('hash', get_file_hash, audio_file)
+            result['hash'] = work.file_hash
+            if work.file_hash in self.seen_hashes:
+                result['status'] = 'duplicate'
+                return
+            self.seen_hashes.add(work.file_hash)
+
+            await self.load_subtitles(work)
+            await self.translate_missing(work)
+
+            if work.source == 'cached' and not work.new_translations:
+                result['status'] = 'cached'
+            else:
+                await self.save(work)
+                result['status'] = 'translated' if work.source == 'cached' else work.source
+            result.update({
+                'subtitles': len(work.subtitles),
+                'translations': len(work.translations),
+                'new_translations': work.new_translations,
+                'failed_translations': work.failed_translations
+            })
+            if work.upload_report:
+                result['upload'] = work.upload_report
+        except Exception as e:
+            logging.error(f"处理 {audio_file} 时出错: {e}")
+            result.update(status='failed', error=str(e))
+        finally:
+            for task in work.tasks:
+                task.cancel()
+            result['audio_seconds'] = self.audio_seconds(work)
+            result['seconds'] = round(time.perf_counter() - started, 3)
+            result.update(work.timings)
+            self.results.append(result)
+            logging.info(f"[{len(self.results)}] {result['status']}: {audio_file} ({result['seconds']}s)")
+
+    async def load_subtitles(self, work):
+        """依次尝试已有缓存、转录文件导入（没有转录文件时为指纹匹配）和语音识别"""
+        entry = self.audio_index.get(work.file_hash)
+        cached = resolve_cache_file(entry.get('subtitle_file', '')) if entry else None
+        if cached is not None:
+            work.source = 'cached'
+            work.subtitles, work.translations, work.segmentation = await self.cpu('encode', read_cache, str(cached))
+            self.index_fingerprint(work)
+            return
+
+        self.index_fingerprint(work)
+        transcript_file = find_transcript(work.audio_file) if self.import_transcripts else None
+        if not transcript_file and await self.load_matched(work):
+            return
+        if transcript_file:
+            try:
+                work.subtitles, work.segmentation = await self.cpu(
+                    'import', load_transcript, transcript_file, self.segment
+                )
+                work.source = 'imported'
+                self.schedule_translations(work, 0, work.subtitles)
+                return
+            except (ValueError, KeyError, TypeError, UnicodeDecodeError) as e:
+                logging.warning(f"无法导入转录文件 {transcript_file}，改为语音识别: {e}")
+
+        async with self.asr_slots:
+            started = time.perf_counter()
+            await self.loop.run_in_executor(self.io_pool, self.transcribe, work)
+            work.timings['transcribe_seconds'] = round(time.perf_counter() - started, 3)
+            self.add_time('transcribe', time.perf_counter() - started)
+        work.source = 'transcribed'
+
+    async def load_matched(self, work):
+        """指纹匹配到已转录的同一内容时复用其字幕，返回是否成功"""
+        if not self.match_fingerprints:
+            return False
+        candidates = [
+            file_hash for file_hash in self.audio_index
+            if os.path.exists(os.path.join(self.fingerprint_dir, f"{file_hash}.npy"))
+        ]
+        if not candidates:
+            return False
+        try:
+            match = await self.cpu('fingerprint', match_fingerprint, work.audio_file, self.fingerprint_dir, candidates)
+            if match is None:
+                return False
+            reference_hash, shift_ms, _ = match
+            reference = resolve_cache_file(self.audio_index[reference_hash].get('subtitle_file', ''))
+            if reference is None:
+                return False
+            work.subtitles, work.translations, work.segmentation = await self.cpu(
+                'encode', read_shifted_cache, str(reference), shift_ms, audio_duration_ms(work.audio_file)
+            )
+            if not work.subtitles:
+                return False
+        except ValueError as e:
+            logging.warning(f"无法匹配音频指纹: {e}")
+            return False
+        work.source = 'matched'
+        work.matched = {'matched_from': reference_hash, 'offset_ms': -shift_ms}
+        logging.info(f"指纹匹配到已转录音频 {reference_hash}，时间偏移: {-shift_ms}ms: {work.audio_file}")
+        return True
+
+    def transcribe(self, work):
+        """在线程池中识别音频，字幕确定后交回事件循环开始翻译"""
+        segmenter = SubtitleSegmenter() if self.segment else None
+        checkpoint = TranscriptionCheckpoint(str(self.data_dir / "asr_checkpoints" / f"{work.file_hash}.json"))
+        backend = get_backend(
+            self.asr_backend, api_key=self.config.get('asr_api_key', ''), checkpoint=checkpoint,
+            prepare_executor=self.process_pool, **self.asr_options
+        )
+
+        def deliver(utterances):
+            if not utterances:
+                return
+            start = len(work.subtitles)
+            work.subtitles.extend(utterances)
+            self.loop.call_soon_threadsafe(self.schedule_translations, work, start, utterances)
+
+        def on_utterances(utterances):
+            deliver(segmenter.add(utterances) if segmenter is not None else utterances)
+
+        transcribe_file(
+            work.audio_file, backend,
+            chunk_ms=int(self.config.get('asr_chunk_seconds', DEFAULT_CHUNK_MS // 1000) * 1000),
+            max_workers=self.config.get('asr_workers', DEFAULT_MAX_WORKERS),
+            on_utterances=on_utterances
+        )
+        if segmenter is not None:
+            deliver(segmenter.finish())
+            work.segmentation = segmenter.segmentation()
+        work.upload_report = backend.report()
+        checkpoint.clear()
+
+    def schedule_translations(self, work, start, subtitles):
+        if not self.translator_type:
+            return
+        for index, subtitle in enumerate(subtitles, start):
+            if str(index) in work.translations or index in work.scheduled:
+                continue
+            work.scheduled.add(index)
+            work.tasks.append(asyncio.ensure_future(self.translate(work, index, subtitle['text'])))
+
+    async def translate_missing(self, work):
+        """补齐没有翻译的字幕并等待全部翻译完成"""
+        self.schedule_translations(work, 0, work.subtitles)
+        await asyncio.gather(*work.tasks)
+
+    async def translate(self, work, index, text):
+        async with self.translation_slots:
+            interval = MIN_REQUEST_INTERVAL.get(self.translator_type)
+            if interval:
+                async with self.request_lock:
+                    delay = self._last_request_time + interval - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    self._last_request_time = time.monotonic()
+            started = time.perf_counter()
+            translation = await self.loop.run_in_executor(
+                self.io_pool, translate_text, text, self.translator_type, self.api_key
+            )
+            self.add_time('translate', time.perf_counter() - started)
+        if translation:
+            work.translations[str(index)] = {'text': translation, 'translator': self.translator_type}
+            work.new_translations += 1
+        else:
+            work.failed_translations += 1
+
+    async def save(self, work):
+        """在进程池中编码字幕缓存，并更新音频索引"""
+        translations = {
+            str(index): work.translations[str(index)]
+            for index in range(len(work.subtitles)) if str(index) in work.translations
+        }
+        subtitle_file = self.subtitle_cache_dir / f"{work.file_hash}.json"
+        cache_data = build_subtitle_cache(translations, work.audio_file, work.subtitles, work.segmentation)
+        work.timings['cache_bytes'] = await self.cpu('encode', write_cache, subtitle_file, cache_data)
+        entry = dict(self.audio_index.get(work.file_hash, {}))
+        entry.update({'file_path': work.audio_file, 'subtitle_file': str(subtitle_file), 'last_access': time.time()})
+        entry.update(work.matched)
+        self.updated_entries[work.file_hash] = entry
+        self.save_audio_index()
+
+    def index_fingerprint(self, work):
+        """在进程池中计算尚未入库的音频指纹，不阻塞后续步骤"""
+        if not self.match_fingerprints or os.path.exists(os.path.join(self.fingerprint_dir, f"{work.file_hash}.npy")):
+            return
+        self.background.append(asyncio.ensure_future(self.store_fingerprint(work)))
+
+    async def store_fingerprint(self, work):
+        try:
+            await self.cpu('fingerprint', store_fingerprint, work.audio_file, work.file_hash, self.fingerprint_dir)
+        except Exception as e:
+            logging.warning(f"无法计算音频指纹 {work.audio_file}: {e}")
+
+    def enforce_cache_budget(self):
+        """处理完成后执行一次缓存维护，本次处理的音频不参与淘汰
+
+        被淘汰或缺少字幕缓存的条目从音频索引中删除，其指纹随之清理；
+        批量任务队列中的音频保留指纹。
+        """
+        try:
+            audio_index = self.load_audio_index()
+            indexed = set(audio_index)
+            manager = CacheManager(
+                self.subtitle_cache_dir, audio_index,
+                self.config.get('cache_budget_mb', DEFAULT_CACHE_BUDGET_MB),
+                self.config.get('cache_compress_after_days', DEFAULT_COMPRESS_AFTER_DAYS)
+            )
+            if manager.enforce(protected=set(self.updated_entries)):
+                self.save_audio_index(removed=indexed - set(audio_index))
+            jobs = TranscriptionJobQueue(self.data_dir / "jobs.json")
+            FingerprintIndex(self.fingerprint_dir).prune(
+                set(self.load_audio_index()) | {job['file_hash'] for job in jobs.load()}
+            )
+        except Exception as e:
+            logging.error(f"缓存维护时出错: {e}")
+
+    @staticmethod
+    def audio_seconds(work):
+        try:
+            duration = audio_duration_ms(work.audio_file)
+        except ValueError:
+            duration = None
+        if duration is None and work.subtitles:
+            duration = work.subtitles[-1]['end_time']
+        return round((duration or 0) / 1000, 3)
+
+    def summary(self, wall_seconds):
+        """吞吐量统计摘要"""
+        counts = {}
+        for result in self.results:
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+        audio_seconds = sum(result['audio_seconds'] for result in self.results)
+        processed = [result for result in self.results if result['status'] not in ('cached', 'duplicate', 'failed')]
+        upload = {}
+        for result in self.results:
+            for key, value in result.get('upload', {}).items():
+                upload[key] = round(upload.get(key, 0) + value, 3)
+        return {
+            'files': len(self.results),
+            'status': counts,
+            'wall_seconds': round(wall_seconds, 3),
+            'audio_seconds': round(audio_seconds, 3),
+            'processed_audio_seconds': round(sum(result['audio_seconds'] for result in processed), 3),
+            'realtime_factor': round(
+                sum(result['audio_seconds'] for result in processed) / wall_seconds, 2
+            ) if wall_seconds else 0,
+            'files_per_minute': round(len(processed) * 60 / wall_seconds, 2) if wall_seconds else 0,
+            'subtitles': sum(result.get('subtitles', 0) for result in self.results),
+            'translations': sum(result.get('new_translations', 0) for result in self.results),
+            'failed_translations': sum(result.get('failed_translations', 0) for result in self.results),
+            'stage_seconds': {stage: round(seconds, 3) for stage, seconds in sorted(self.stage_seconds.items())},
+            'upload': upload,
+            'workers': {'processes': self.processes, 'jobs': self.jobs, 'translation': self.translation_workers},
+            'results': self.results
+        }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="无界面批量转录与翻译，结果写入 podcast_data 缓存")
+    parser.add_argument('paths', nargs='+', help="音频文件或文件夹（递归查找 .wav / .mp3）")
+    parser.add_argument('--data-dir', default=None, help="数据目录，默认为程序目录下的 podcast_data")
+    parser.add_argument('--translator', choices=TRANSLATORS, default='google', help="翻译器")
+    parser.add_argument('--no-translate', action='store_true', help="只转录，不翻译")
+    parser.add_argument('--backend', default=None, help="识别后端，默认读取配置 asr_backend")
+    parser.add_argument('--jobs', type=int, default=None, help="同时识别的文件数，默认读取配置 asr_batch_jobs")
+    parser.add_argument('--translation-workers', type=int, default=None,
+                        help="同时进行的翻译请求数，默认读取配置 translation_workers")
+    parser.add_argument('--processes', type=int, default=None, help="进程池大小，默认为 CPU 核数")
+    parser.add_argument('--summary', default=None, help="将 JSON 摘要另外写入该文件")
+    parser.add_argument('-v', '--verbose', action='store_true', help="输出详细日志")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stderr
+    )
+    audio_files = collect_audio_files(args.paths)
+    summary_file = os.path.abspath(args.summary) if args.summary else None
+    data_dir = os.path.abspath(args.data_dir) if args.data_dir else 'podcast_data'
+    # 与图形界面一致，默认数据目录与索引中的缓存路径都相对于程序目录
+    os.chdir(APP_DIR)
+
+    config = load_config(Path(data_dir) / "config.json") or {}
+    if args.backend:
+        config['asr_backend'] = args.backend
+    runner = BatchRunner(
+        data_dir, config,
+        translator_type=None if args.no_translate else args.translator,
+        jobs=args.jobs or config.get('asr_batch_jobs', DEFAULT_BATCH_JOBS),
+        translation_workers=args.translation_workers or config.get('translation_workers', DEFAULT_TRANSLATION_WORKERS),
+        processes=args.processes
+    )
+    summary = asyncio.run(runner.run(audio_files))
+
+    output = json.dumps(summary, ensure_ascii=False, indent=2)
+    print(output)
+    if summary_file:
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            f.write(output)
+    return 1 if summary['status'].get('failed') else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
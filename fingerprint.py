@@ -0,0 +1,320 @@
+import logging
+import os
+import shutil
+import subprocess
+
+import numpy as np
+
+from asr import is_wav, read_wav_info, Resampler
+from asr.audio import iter_blocks
+from asr.preprocess import downmix
+
+FINGERPRINT_RATE = 8000
+FRAME_SIZE = 2048
+HOP_SIZE = 256
+HOP_MS = HOP_SIZE * 1000 // FINGERPRINT_RATE
+BAND_COUNT = 33
+MIN_FREQ = 250
+MAX_FREQ = 3000
+SILENCE_RATIO = 0.01
+DECODE_BLOCK_SAMPLES = FINGERPRINT_RATE * 5
+
+QUERY_MS = 30000
+QUERY_PHASES = 4
+MIN_VOTES = 3
+MAX_BIT_ERROR = 0.3
+MIN_OVERLAP_FRAMES = 200
+MAX_HITS_PER_VALUE = 64
+VERIFY_OFFSETS = 5
+
+
+class Fingerprinter:
+    """流式音频指纹（Haitsma-Kalker 子指纹）
+
+    8 kHz 单声道采样按 2048 点帧、256 点帧移做 FFT，250~3000 Hz 按对数划分为
+    33 个频带。每帧由相邻频带能量差在时间上的变化得到 32 位子指纹：
+    bit(n, m) = (E(n,m) - E(n,m+1)) - (E(n-1,m) - E(n-1,m+1)) > 0。
+    只比较能量的相对变化，对重采样、有损压缩和音量变化不敏感。静音帧的
+    子指纹记为0，匹配时忽略。子指纹 i 对应时间 i * HOP_MS（帧起点）。
+    """
+
+    def __init__(self):
+        self.window = np.hanning(FRAME_SIZE).astype(np.float32)
+        freqs = np.fft.rfftfreq(FRAME_SIZE, 1 / FINGERPRINT_RATE)
+        edges = np.geomspace(MIN_FREQ, MAX_FREQ, BAND_COUNT + 1)
+        bounds = np.searchsorted(freqs, edges)
+        self.first_bin = bounds[0]
+        self.last_bin = bounds[-1]
+        self.band_starts = bounds[:-1] - bounds[0]
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.energies = []
+
+    def process(self, samples):
+        """加入一块 8 kHz float32 采样"""
+        buffer = np.concatenate((self.buffer, samples))
+        if len(buffer) < FRAME_SIZE:
+            self.buffer = buffer
+            return
+        count = (len(buffer) - FRAME_SIZE) // HOP_SIZE + 1
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, FRAME_SIZE)[::HOP_SIZE][:count]
+        spectrum = np.abs(np.fft.rfft(frames * self.window, axis=1)[:, self.first_bin:self.last_bin]) ** 2
+        self.energies.append(np.add.reduceat(spectrum, self.band_starts, axis=1).astype(np.float32))
+        self.buffer = buffer[count * HOP_SIZE:]
+
+    def finish(self):
+        """返回 uint32 子指纹数组"""
+        if not self.energies:
+            return np.zeros(0, dtype=np.uint32)
+        energies = np.concatenate(self.energies)
+        self.energies = []
+        if len(energies) < 2:
+            return np.zeros(len(energies), dtype=np.uint32)
+        diff = energies[:, :-1] - energies[:, 1:]
+        bits = np.zeros((len(energies), BAND_COUNT - 1), dtype=bool)
+        bits[1:] = diff[1:] - diff[:-1] > 0
+        values = np.packbits(bits, axis=1, bitorder='little').view('<u4').ravel().astype(np.uint32)
+        total = energies.sum(axis=1)
+        silent = total < SILENCE_RATIO * np.median(total)
+        silent[0] = True
+        silent[1:] |= silent[:-1].copy()
+        values[silent] = 0
+        return values
+
+
+def iter_pcm(audio_file, start_ms=0, end_ms=None):
+    """解码 [start_ms, end_ms) 为 8 kHz float32 单声道采样块
+
+    16位 PCM WAV 直接按块读取并重采样，其他格式（MP3 等）需要 ffmpeg。
+    """
+    if is_wav(audio_file):
+        info = read_wav_info(audio_file)
+        end_ms = info.duration_ms if end_ms is None else min(end_ms, info.duration_ms)
+        resampler = Resampler(info.sample_rate, FINGERPRINT_RATE)
+        for _, _, block in iter_blocks(info, start_ms, end_ms):
+            yield resampler.process(downmix(block))
+        yield resampler.flush()
+        return
+
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        raise ValueError(f"解码非 WAV 音频需要 ffmpeg: {audio_file}")
+    command = [ffmpeg, '-loglevel', 'error', '-ss', f"{start_ms / 1000:.3f}"]
+    if end_ms is not None:
+        command += ['-t', f"{(end_ms - start_ms) / 1000:.3f}"]
+    command += ['-i', audio_file, '-ac', '1', '-ar', str(FINGERPRINT_RATE), '-f', 's16le', '-']
+    process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE)
+    try:
+        while True:
+            data = process.stdout.read(DECODE_BLOCK_SAMPLES * 2)
+            if not data:
+                break
+            yield np.frombuffer(data[:len(data) // 2 * 2], dtype='<i2').astype(np.float32)
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+def audio_duration_ms(audio_file):
+    """音频时长，非 WAV 文件返回None"""
+    if is_wav(audio_file):
+        return read_wav_info(audio_file).duration_ms
+    return None
+
+def compute_fingerprint(audio_file, start_ms=0, end_ms=None, should_stop=None):
+    """计算 [start_ms, end_ms) 的子指纹，should_stop 返回 True 时中止并返回None"""
+    fingerprinter = Fingerprinter()
+    for samples in iter_pcm(audio_file, start_ms, end_ms):
+        if should_stop and should_stop():
+            return None
+        fingerprinter.process(samples)
+    return fingerprinter.finish()
+
+def bit_error_rate(first, second):
+    """两段等长子指纹的误码率，只统计两边都不是静音的帧"""
+    valid = (first != 0) & (second != 0)
+    if not valid.any():
+        return 1.0
+    diff = np.bitwise_xor(first[valid], second[valid])
+    return np.unpackbits(diff.view(np.uint8)).sum() / (32 * valid.sum())
+
+
+class SortedFingerprint:
+    """按值排序的参考指纹，用于查找与子指纹完全相同的帧"""
+
+    def __init__(self, values):
+        self.values = values
+        self.order = np.argsort(values, kind='stable')
+        self.sorted = values[self.order]
+
+    def align(self, query):
+        """返回 (参考帧相对查询帧的偏移帧数, 得票数, 误码率)，没有候选时返回None
+
+        查询中每个非静音子指纹在参考中完全相同的位置各投一票给对应偏移，
+        出现过于频繁的值不参与投票。经过重新编码的音频只有少数子指纹完全相同，
+        因此得票最多的几个偏移都以重叠部分的误码率验证，取误码率最低者。
+        """
+        positions = np.nonzero(query)[0]
+        values = query[positions]
+        lo = np.searchsorted(self.sorted, values, side='left')
+        hi = np.searchsorted(self.sorted, values, side='right')
+        counts = hi - lo
+        keep = (counts > 0) & (counts <= MAX_HITS_PER_VALUE)
+        positions, lo, counts = positions[keep], lo[keep], counts[keep]
+        total = counts.sum()
+        if not total:
+            return None
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        matches = self.order[starts + np.arange(total)]
+        offsets = matches.astype(np.int64) - np.repeat(positions, counts)
+        base = offsets.min()
+        votes = np.bincount(offsets - base)
+        candidates = np.argsort(votes)[::-1][:VERIFY_OFFSETS]
+
+        best = None
+        for candidate in candidates:
+            if votes[candidate] < MIN_VOTES:
+                break
+            offset = int(candidate + base)
+            first = max(0, -offset)
+            last = min(len(query), len(self.values) - offset)
+            if last - first < MIN_OVERLAP_FRAMES:
+                continue
+            ber = bit_error_rate(query[first:last], self.values[first + offset:last + offset])
+            if best is None or ber < best[2]:
+                best = (offset, int(votes[candidate]), ber)
+        return best
+
+
+class FingerprintIndex:
+    """音频库的指纹索引
+
+    每个音频的完整子指纹以 <音频哈希>.npy 保存在 podcast_data/fingerprints 下，
+    与字幕缓存共用音频哈希作为键。
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, file_hash):
+        return os.path.join(self.directory, f"{file_hash}.npy")
+
+    def has(self, file_hash):
+        return os.path.exists(self.path(file_hash))
+
+    def add(self, file_hash, values):
+        try:
+            tmp_file = self.path(file_hash) + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                np.save(f, values.astype(np.uint32))
+            os.replace(tmp_file, self.path(file_hash))
+        except Exception as e:
+            logging.error(f"保存音频指纹时出错: {e}")
+
+    def load(self, file_hash):
+        try:
+            return np.load(self.path(file_hash))
+        except Exception as e:
+            logging.error(f"读取音频指纹时出错: {e}")
+            return None
+
+    def remove(self, file_hash):
+        if self.has(file_hash):
+            os.remove(self.path(file_hash))
+
+    def hashes(self):
+        return [name[:-4] for name in os.listdir(self.directory) if name.endswith('.npy')]
+
+    def prune(self, keep):
+        """删除不在 keep 中的音频的指纹"""
+        for file_hash in self.hashes():
+            if file_hash not in keep:
+                self.remove(file_hash)
+
+    def match(self, queries, candidates, should_stop=None):
+        """在候选音频中查找与查询片段内容相同的音频
+
+        Args:
+            queries: [(片段起点毫秒, 子指纹)]，同一位置的多个相位的片段用于
+                细化到帧移以下的精度
+            candidates: 参与匹配的音频哈希
+
+        Returns:
+            (音频哈希, 时间偏移毫秒, 误码率)，偏移为参考音频时间减去新音频时间；
+            没有匹配时返回None
+        """
+        best = None
+        for file_hash in candidates:
+            if should_stop and should_stop():
+                return None
+            values = self.load(file_hash)
+            if values is None or not len(values):
+                continue
+            reference = SortedFingerprint(values)
+            for start_ms, query in queries:
+                result = reference.align(query)
+                if result is None:
+                    continue
+                offset, votes, ber = result
+                if votes < MIN_VOTES or ber > MAX_BIT_ERROR:
+                    continue
+                if best is None or ber < best[2]:
+                    best = (file_hash, offset * HOP_MS - start_ms, ber)
+        return best
+
+
+def query_fingerprints(audio_file, duration_ms=None, should_stop=None):
+    """在音频开头和中间各取一段，按 QUERY_PHASES 个相位计算查询指纹"""
+    starts = [0]
+    if duration_ms and duration_ms > 2 * QUERY_MS:
+        starts.append(duration_ms // 2)
+    queries = []
+    step = HOP_MS / QUERY_PHASES
+    for start_ms in starts:
+        for phase in range(QUERY_PHASES):
+            query_start = start_ms + round(phase * step)
+            values = compute_fingerprint(audio_file, query_start, query_start + QUERY_MS, should_stop)
+            if values is None:
+                return None
+            queries.append((query_start, values))
+    return queries
+
+def shift_subtitles(subtitles, translations, shift_ms, duration_ms=None):
+    """将参考音频的字幕平移到新音频的时间轴
+
+    新音频时间 = 参考时间 - shift_ms。落在新音频 [0, duration_ms) 以外的单词被
+    丢弃，只剩部分单词的字幕按剩余单词重建文本并放弃其翻译。
+
+    Returns:
+        (字幕列表, 翻译字典, 是否有字幕被裁剪)
+    """
+    end_limit = duration_ms if duration_ms is not None else float('inf')
+    shifted = []
+    shifted_translations = {}
+    trimmed = False
+    for index, subtitle in enumerate(subtitles):
+        words = [
+            dict(word, start=word['start'] - shift_ms, end=word['end'] - shift_ms)
+            for word in subtitle.get('words', [])
+        ]
+        kept = [word for word in words if word['start'] >= 0 and word['end'] <= end_limit]
+        start = subtitle['start_time'] - shift_ms
+        end = subtitle['end_time'] - shift_ms
+        if words and len(kept) < len(words):
+            trimmed = True
+            if not kept:
+                continue
+            new_subtitle = dict(
+                subtitle, start_time=kept[0]['start'], end_time=kept[-1]['end'],
+                text=' '.join(word['text'] for word in kept), words=kept
+            )
+        elif start < 0 or end > end_limit:
+            trimmed = True
+            continue
+        else:
+            new_subtitle = dict(subtitle, start_time=start, end_time=end, words=kept)
+            translation = translations.get(str(index))
+            if translation is not None:
+                shifted_translations[str(len(shifted))] = translation
+        shifted.append(new_subtitle)
+    return shifted, shifted_translations, trimmed
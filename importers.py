@@ -0,0 +1,210 @@
+import html
+import logging
+import os
+import re
+
+from cache import iter_cache_items
+from segmentation import SENTENCE_ENDINGS
+
+TRANSCRIPT_EXTENSIONS = ('.json', '.vtt', '.srt')
+DEFAULT_SPEAKER = 'A'
+WORD_PAUSE_MS = 1000
+
+_TIMING = re.compile(
+    r'^\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})\s*-->\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})'
+)
+_INLINE_TIMESTAMP = re.compile(r'<((?:\d+:)?\d{1,2}:\d{2}\.\d{1,3})>')
+_VOICE = re.compile(r'<v(?:\.[^\s>]*)?\s+([^>]+)>')
+_TAG = re.compile(r'</?[^>]*>')
+_SPEAKER_LABEL = re.compile(r'^(?:Speaker\s+(\w+)|([A-Z]))\s*:\s+')
+
+
+def find_transcript(audio_file):
+    """查找音频旁边的同名转录文件（JSON / WebVTT / SRT），没有时返回None"""
+    stem, _ = os.path.splitext(audio_file)
+    for base in (stem, audio_file):
+        for ext in TRANSCRIPT_EXTENSIONS:
+            path = base + ext
+            if os.path.isfile(path):
+                return path
+    return None
+
+def iter_transcript(path):
+    """按扩展名流式读取转录文件，逐条产出字幕缓存格式的字典"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        return iter_assemblyai_json(path)
+    if ext in ('.vtt', '.srt'):
+        return iter_cues(path)
+    raise ValueError(f"不支持的转录文件格式: {path}")
+
+def parse_timestamp(value):
+    """SRT/WebVTT 时间戳转换为毫秒，支持 HH:MM:SS,mmm 与 MM:SS.mmm"""
+    clock, _, fraction = value.replace(',', '.').partition('.')
+    seconds = 0
+    for part in clock.split(':'):
+        seconds = seconds * 60 + int(part)
+    return seconds * 1000 + int(fraction.ljust(3, '0')[:3])
+
+def estimate_words(text, start, end):
+    """在 [start, end) 内按字符数比例分配单词时间"""
+    tokens = text.split()
+    if not tokens:
+        return []
+    weights = [len(token) + 1 for token in tokens]
+    total = sum(weights)
+    duration = max(0, end - start)
+    words = []
+    elapsed = 0
+    for token, weight in zip(tokens, weights):
+        word_start = start + duration * elapsed // total
+        elapsed += weight
+        words.append({'text': token, 'start': word_start, 'end': start + duration * elapsed // total})
+    return words
+
+def cue_to_subtitle(lines, start, end, speaker):
+    """一条字幕块转换为字幕缓存格式
+
+    WebVTT 的 <v 说话人> 与 SRT 开头的 "Speaker A:" / "A:" 标记说话人，没有标记时
+    沿用上一条的说话人。行内时间戳 <00:01.500> 给出的时间点直接作为单词边界，
+    其余单词按字符数估算时间。返回 (字幕, 说话人)，没有文字时字幕为None。
+    """
+    raw = ' '.join(line.strip() for line in lines if line.strip())
+    voice = _VOICE.search(raw)
+    if voice:
+        speaker = voice.group(1).strip()
+        raw = _VOICE.sub('', raw).strip()
+    else:
+        label = _SPEAKER_LABEL.match(raw)
+        if label:
+            speaker = label.group(1) or label.group(2)
+            raw = raw[label.end():]
+
+    parts = []
+    part_start = start
+    position = 0
+    for match in _INLINE_TIMESTAMP.finditer(raw):
+        parts.append((raw[position:match.start()], part_start))
+        part_start = min(max(parse_timestamp(match.group(1)), part_start), end)
+        position = match.end()
+    parts.append((raw[position:], part_start))
+
+    words = []
+    for i, (part, part_start) in enumerate(parts):
+        part_end = parts[i + 1][1] if i + 1 < len(parts) else end
+        words.extend(estimate_words(html.unescape(_TAG.sub('', part)), part_start, part_end))
+    if not words:
+        return None, speaker
+    return {
+        'speaker': speaker,
+        'start_time': start,
+        'end_time': end,
+        'text': ' '.join(word['text'] for word in words),
+        'words': words
+    }, speaker
+
+def iter_cues(path):
+    """流式解析 SRT / WebVTT，逐行读取，一次只保留一条字幕块"""
+    speaker = DEFAULT_SPEAKER
+    timing = None
+    lines = []
+    found = False
+    with open(path, 'r', encoding='utf-8-sig', errors='replace') as f:
+        for line in f:
+            match = _TIMING.match(line)
+            if match:
+                if timing is not None:
+                    # 缺少空行分隔的字幕块：末行的 SRT 序号不属于正文
+                    if lines and lines[-1].strip().isdigit():
+                        lines.pop()
+                    subtitle, speaker = cue_to_subtitle(lines, *timing, speaker)
+                    if subtitle:
+                        found = True
+                        yield subtitle
+                timing = parse_timestamp(match.group(1)), parse_timestamp(match.group(2))
+                lines = []
+                continue
+            if timing is None:
+                continue
+            if line.strip():
+                lines.append(line)
+                continue
+            subtitle, speaker = cue_to_subtitle(lines, *timing, speaker)
+            timing = None
+            if subtitle:
+                found = True
+                yield subtitle
+        if timing is not None:
+            subtitle, speaker = cue_to_subtitle(lines, *timing, speaker)
+            if subtitle:
+                found = True
+                yield subtitle
+    if not found:
+        raise ValueError(f"转录文件中没有字幕: {path}")
+
+def utterance_from_assemblyai(utterance):
+    return {
+        'speaker': utterance.get('speaker') or DEFAULT_SPEAKER,
+        'start_time': utterance['start'],
+        'end_time': utterance['end'],
+        'text': utterance['text'],
+        'words': [
+            {'text': word['text'], 'start': word['start'], 'end': word['end']}
+            for word in utterance.get('words') or []
+        ]
+    }
+
+def group_words(words):
+    """没有 utterances 时按说话人变化、停顿和句末标点将单词组成字幕"""
+    current = []
+    for word in words:
+        speaker = word.get('speaker') or DEFAULT_SPEAKER
+        if current and (
+            speaker != current[-1]['speaker']
+            or word['start'] - current[-1]['end'] > WORD_PAUSE_MS
+            or current[-1]['text'].endswith(SENTENCE_ENDINGS)
+        ):
+            yield utterance_from_words(current)
+            current = []
+        current.append({'text': word['text'], 'start': word['start'], 'end': word['end'], 'speaker': speaker})
+    if current:
+        yield utterance_from_words(current)
+
+def utterance_from_words(words):
+    return {
+        'speaker': words[0]['speaker'],
+        'start_time': words[0]['start'],
+        'end_time': words[-1]['end'],
+        'text': ' '.join(word['text'] for word in words),
+        'words': [{'text': word['text'], 'start': word['start'], 'end': word['end']} for word in words]
+    }
+
+def iter_assemblyai_json(path):
+    """流式读取 AssemblyAI 转录 JSON
+
+    utterances 与 words 数组逐个元素解析，不整体载入。有 utterances（开启
+    speaker_labels）时直接使用；否则由 words 组成字幕。words 在文件中位于
+    utterances 之前时先扫描一遍确认 utterances 是否存在，再读第二遍。
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        has_utterances = False
+        has_words = False
+        for key, value in iter_cache_items(f, array_key=('utterances', 'words')):
+            if key == 'utterances' and value is not None:
+                has_utterances = True
+                break
+            if key == 'words' and value is not None:
+                has_words = True
+    if not has_utterances and not has_words:
+        raise ValueError(f"不是 AssemblyAI 转录 JSON: {path}")
+
+    with open(path, 'r', encoding='utf-8') as f:
+        items = iter_cache_items(f, array_key=('utterances', 'words'))
+        if has_utterances:
+            for key, value in items:
+                if key == 'utterances' and isinstance(value, dict):
+                    yield utterance_from_assemblyai(value)
+        else:
+            words = (value for key, value in items if key == 'words' and isinstance(value, dict))
+            yield from group_words(words)
+    logging.info(f"已导入转录文件: {path}")
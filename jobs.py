@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import time
+
+JOB_HASHING = 'hashing'
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_FAILED = 'failed'
+
+JOB_STATUS_TEXT = {
+    JOB_HASHING: '校验中',
+    JOB_QUEUED: '排队中',
+    JOB_RUNNING: '转录中',
+    JOB_FAILED: '失败'
+}
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3')
+DEFAULT_BATCH_JOBS = 2
+
+
+class TranscriptionJobQueue:
+    """持久化的批量转录任务队列
+
+    任务按加入顺序保存在 jobs.json 中，状态依次为 hashing（等待计算内容哈希）、
+    queued、running，出错时为 failed；完成或因已有字幕缓存被跳过的任务直接从
+    队列移除。每次状态变化都整体写盘（先写临时文件再替换），程序重启后
+    running 的任务回到 queued 重新执行，hashing 的任务重新计算哈希。
+    """
+
+    def __init__(self, jobs_file):
+        self.jobs_file = jobs_file
+        self.jobs = []
+        self.next_id = 1
+
+    def load(self):
+        """读取任务队列，并将上次未完成的转录恢复为排队状态"""
+        try:
+            if self.jobs_file.exists():
+                with open(self.jobs_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.jobs = data.get('jobs', [])
+                self.next_id = data.get('next_id', len(self.jobs) + 1)
+                for job in self.jobs:
+                    if job['status'] == JOB_RUNNING:
+                        job['status'] = JOB_QUEUED
+        except Exception as e:
+            logging.error(f"加载转录任务队列时出错: {e}")
+            self.jobs = []
+        return self.jobs
+
+    def save(self):
+        try:
+            tmp_file = self.jobs_file.with_name(self.jobs_file.name + '.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'next_id': self.next_id, 'jobs': self.jobs}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.jobs_file)
+        except Exception as e:
+            logging.error(f"保存转录任务队列时出错: {e}")
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def get(self, job_id):
+        return next((job for job in self.jobs if job['id'] == job_id), None)
+
+    def find(self, file_path=None, file_hash=None):
+        """按路径或内容哈希查找任务"""
+        for job in self.jobs:
+            if file_path is not None and job['file_path'] == file_path:
+                return job
+            if file_hash is not None and job.get('file_hash') == file_hash:
+                return job
+        return None
+
+    def add_files(self, paths):
+        """将文件加入队列（状态为 hashing），已在队列中的路径忽略，返回新任务列表"""
+        added = []
+        for path in paths:
+            path = os.path.abspath(path)
+            if self.find(file_path=path):
+                continue
+            job = {
+                'id': self.next_id,
+                'file_path': path,
+                'file_hash': None,
+                'status': JOB_HASHING,
+                'error': None,
+                'added': time.time()
+            }
+            self.next_id += 1
+            self.jobs.append(job)
+            added.append(job)
+        return added
+
+    def set_status(self, job_id, status, error=None):
+        job = self.get(job_id)
+        if job:
+            job['status'] = status
+            job['error'] = error
+        return job
+
+    def remove(self, job_id):
+        self.jobs = [job for job in self.jobs if job['id'] != job_id]
+
+    def with_status(self, status):
+        return [job for job in self.jobs if job['status'] == status]
+
+    def next_queued(self):
+        return next((job for job in self.jobs if job['status'] == JOB_QUEUED), None)
+
+
+def list_audio_files(folder):
+    """递归列出文件夹中的音频文件，按路径排序"""
+    paths = []
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        paths.extend(
+            os.path.join(root, name) for name in sorted(files)
+            if name.lower().endswith(AUDIO_EXTENSIONS) and not name.startswith('.')
+        )
+    return paths
@@ -1,10 +1,10 @@
 import sys
-import bisect
 import os
 import json
 import hashlib
 import time
 import logging
+import html
 from pathlib import Path
 from PyQt5.QtWidgets import (
     QWidget, QFileDialog, QMessageBox, QVBoxLayout, QHBoxLayout,
@@ -20,18 +20,43 @@ from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 
 from ui_components import (
     ModernMacTextBrowser, ModernMacButton, ModernMacSlider,
-    ModernMacToggleButton, ScrollingLabel, ModernProgressBar, ModernMacLineEdit
+    ModernMacToggleButton, ScrollingLabel, ModernProgressBar, ModernMacLineEdit,
+    VirtualSubtitleView
 )
 from threads import (
-    SubtitleUpdateThread, TranscriptionThread, TranslationThread
+    TranscriptionThread, TranslationPipeline, PrefetchThread,
+    BundleThread, FileHashThread, FingerprintThread, DEFAULT_TRANSLATION_WORKERS
 )
 from translation import translate_text
-from utils import get_file_hash, format_time
+from utils import get_file_hash, format_time, utf16_len
 from config import load_config, save_config
+from cache import (
+    CacheManager, DEFAULT_CACHE_BUDGET_MB, DEFAULT_COMPRESS_AFTER_DAYS,
+    compute_render_key, load_render_snapshot, save_render_snapshot,
+    resolve_cache_file, open_cache_file, iter_cache_items, build_subtitle_cache
+)
+from schedulers import FrameBudgetRunner, SubtitleTimeline
+from session import SessionState
+from bundle import BUNDLE_SUFFIX, merge_index_entries
+from positions import SubtitlePositions
+from transcript import Transcript
+from importers import find_transcript
+from fingerprint import FingerprintIndex, audio_duration_ms, shift_subtitles
+from jobs import (
+    TranscriptionJobQueue, JOB_STATUS_TEXT, JOB_HASHING, JOB_QUEUED, JOB_RUNNING, JOB_FAILED,
+    DEFAULT_BATCH_JOBS
+)
+from asr import DEFAULT_CHUNK_MS, DEFAULT_MAX_WORKERS, TARGET_SAMPLE_RATE
+
+FIRST_SCREEN_READY = object()
+SUBTITLE_HIGHLIGHT_LAYER = 0
+WORD_HIGHLIGHT_LAYER = 1
+HOVER_HIGHLIGHT_LAYER = 2
 
 class PodcastPlayer(QWidget):
     def __init__(self):
         super().__init__()
+        self.startup_started = time.perf_counter()
 
         os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
@@ -66,18 +91,30 @@ class PodcastPlayer(QWidget):
         self.media_player.error.connect(self.handle_media_error)
         self.media_player.positionChanged.connect(self.position_changed)
         self.media_player.durationChanged.connect(self.duration_changed)
+        self.media_player.mediaStatusChanged.connect(self.on_media_status_changed)
 
 
-        self.subtitles = []
-        self.subtitle_times = []
-        self.subtitle_positions = []
+        self.transcript = Transcript()
+        self.segmentation = None
         self.current_subtitle_index = -1
         self.total_duration = 0
-        self.word_positions = []
+        self.positions = SubtitlePositions()
         self.current_word_index = -1
+        self.current_file_hash = None
         self.api_key = ""
         self.gemini_api_key = ""
         self.silicon_cloud_api_key = ""
+        self.cache_budget_mb = DEFAULT_CACHE_BUDGET_MB
+        self.cache_compress_after_days = DEFAULT_COMPRESS_AFTER_DAYS
+        self.asr_backend = 'assemblyai'
+        self.asr_chunk_ms = DEFAULT_CHUNK_MS
+        self.asr_workers = DEFAULT_MAX_WORKERS
+        self.asr_options = {}
+        self.asr_batch_jobs = DEFAULT_BATCH_JOBS
+        self.translation_workers = DEFAULT_TRANSLATION_WORKERS
+        self.segment_subtitles = True
+        self.import_transcripts = True
+        self.match_fingerprints = True
         self._last_selected_radio = None
 
 
@@ -86,18 +123,23 @@ class PodcastPlayer(QWidget):
         self.subtitle_cache_dir = self.data_dir / "subtitles"
         self.subtitle_cache_dir.mkdir(exist_ok=True)
         self.audio_index_file = self.data_dir / "audio_index.json"
+        self.fingerprints = FingerprintIndex(self.data_dir / "fingerprints")
+        self.fingerprint_lookup = None
+        self.fingerprint_threads = []
 
 
         self.load_audio_index()
+        self.jobs = TranscriptionJobQueue(self.data_dir / "jobs.json")
+        self.jobs.load()
+        self.job_threads = {}
+        self.hash_threads = []
 
 
         self.translations = {}          
         self.translation_thread = None
 
 
-        self.update_thread = None
-        self.last_update_time = 0
-        self.update_interval = 100              
+        self.subtitle_timeline = None
         self.last_subtitle_index = -1
         self.last_word_index = -1
 
@@ -108,28 +150,69 @@ class PodcastPlayer(QWidget):
         self.load_saved_config()
 
 
-        self.init_ui()
+        self.cache_manager = CacheManager(
+            self.subtitle_cache_dir,
+            self.audio_index,
+            budget_mb=self.cache_budget_mb,
+            compress_after_days=self.cache_compress_after_days
+        )
+        QTimer.singleShot(0, self.run_cache_maintenance)
 
 
-        self.setup_saved_api_key()
+        self.init_ui()
 
 
-        self.initialize_update_thread()
+        self.setup_saved_api_key()
 
-        self.translation_threads = []           
+        self.translation_pipeline = None
+        self.unrendered_translations = 0
+        self.translation_error_shown = False
         self.current_translation_count = 0
         self.total_translation_count = 0
+        self.translation_target = None
+        self.transcribing = False
+        self.retired_threads = []
 
 
         self.subtitle_display.mousePressEvent = self.on_subtitle_clicked
+        self.subtitle_display.mouseMoveEvent = self.on_subtitle_hovered
+        self.subtitle_display.leaveEvent = self.on_subtitle_hover_left
+        self.subtitle_display.viewport().setMouseTracking(True)
+        self.hover_target = (-1, -1)
 
-        self.subtitle_blocks = []              
         self.pending_translations = {}              
+        self.text_formats = {}
+        self.translation_updates = {}
+        self.translation_update_timer = QTimer(self)
+        self.translation_update_timer.setSingleShot(True)
+        self.translation_update_timer.setInterval(50)
+        self.translation_update_timer.timeout.connect(self.flush_translation_updates)
 
         self.current_display_index = 0             
-        self.display_timer = QTimer()
-        self.display_timer.timeout.connect(self.display_next_subtitle)
-        self.display_interval = 100               
+        self.display_runner = FrameBudgetRunner(parent=self)
+
+
+        self.stream_runner = FrameBudgetRunner(parent=self)
+        self.visibility_runner = FrameBudgetRunner(parent=self)
+        self.first_screen_subtitles = 15
+        self.focus_window_before = 5
+        self.focus_window_after = 15
+        self.resume_position = 0
+        self.load_metrics = {}
+
+
+        self.virtual_view_threshold = 1500
+        self.virtual_mode = False
+
+
+        self.session = SessionState(self.data_dir / "session.json")
+        self.session_timer = QTimer(self)
+        self.session_timer.timeout.connect(self.session.flush)
+        self.session_timer.start(5000)
+        self.prefetch_thread = None
+        self.startup_ready_pending = True
+        QTimer.singleShot(0, self.resume_last_session)
+        QTimer.singleShot(0, self.resume_jobs)
 
 
         self.translation_semaphore = QSemaphore(5)                
@@ -157,6 +240,33 @@ class PodcastPlayer(QWidget):
         with open(self.audio_index_file, 'w', encoding='utf-8') as f:
             json.dump(self.audio_index, f, ensure_ascii=False, indent=2)
 
+    def touch_cache(self, file_hash):
+        """记录音频缓存的访问时间"""
+        self.cache_manager.touch(file_hash)
+        self.save_audio_index()
+
+    def run_cache_maintenance(self):
+        """执行缓存容量预算与冷缓存压缩，当前音频不参与淘汰"""
+        try:
+            if self.cache_manager.enforce(protected={self.current_file_hash}):
+                self.save_audio_index()
+                self.display_cached_files()
+            self.fingerprints.prune(
+                set(self.audio_index) | {self.current_file_hash} | {job['file_hash'] for job in self.jobs.jobs}
+            )
+        except Exception as e:
+            logging.error(f"缓存维护时出错: {e}")
+
+    def sidecar_transcript(self, audio_file):
+        """音频旁可直接导入的转录文件，未启用导入或不存在时返回None"""
+        if not self.import_transcripts:
+            return None
+        return find_transcript(audio_file)
+
+    def checkpoint_file(self, file_hash):
+        """音频识别检查点文件路径"""
+        return self.data_dir / "asr_checkpoints" / f"{file_hash}.json"
+
     def get_file_hash(self, file_path):
         """计算文件的MD5哈希值"""
         return get_file_hash(file_path)
@@ -192,6 +302,8 @@ class PodcastPlayer(QWidget):
                         current_config.get('silicon_cloud_api_key') == config['silicon_cloud_api_key'] and
                         current_config.get('asr_api_key') == config['asr_api_key']):
                         return
+                current_config.update(config)
+                config = current_config
 
 
             with open(self.config_file, 'w', encoding='utf-8') as f:
@@ -216,6 +328,8 @@ class PodcastPlayer(QWidget):
 
         self.select_audio_btn = ModernMacButton('选择音频', accent=True)
         self.select_audio_btn.clicked.connect(self.load_audio)
+        self.import_folder_btn = ModernMacButton('批量导入')
+        self.import_folder_btn.clicked.connect(self.import_folder)
 
 
         self.audio_file_label = ScrollingLabel('未选择音频文件')
@@ -230,8 +344,16 @@ class PodcastPlayer(QWidget):
             }
         """)
 
+        self.import_bundle_btn = ModernMacButton('导入')
+        self.import_bundle_btn.clicked.connect(self.import_episodes)
+        self.export_bundle_btn = ModernMacButton('导出')
+        self.export_bundle_btn.clicked.connect(self.export_episodes)
+
         top_controls.addWidget(self.select_audio_btn)
+        top_controls.addWidget(self.import_folder_btn)
         top_controls.addWidget(self.audio_file_label, 1)
+        top_controls.addWidget(self.import_bundle_btn)
+        top_controls.addWidget(self.export_bundle_btn)
 
 
         playback_controls = QHBoxLayout()
@@ -329,8 +451,13 @@ class PodcastPlayer(QWidget):
 
         self.subtitle_display = ModernMacTextBrowser()
 
+        self.virtual_subtitle_view = VirtualSubtitleView()
+        self.virtual_subtitle_view.subtitle_clicked.connect(self.on_virtual_subtitle_clicked)
+        self.virtual_subtitle_view.hide()
+
         subtitle_container.addWidget(subtitle_label)
         subtitle_container.addWidget(self.subtitle_display)
+        subtitle_container.addWidget(self.virtual_subtitle_view)
 
 
         history_container = QVBoxLayout()
@@ -341,7 +468,7 @@ class PodcastPlayer(QWidget):
 
         self.file_list = ModernMacTextBrowser()
         self.file_list.setMaximumWidth(240)
-        self.file_list.anchorClicked.connect(self.load_cached_audio)
+        self.file_list.anchorClicked.connect(self.on_library_link_clicked)
 
         history_container.addWidget(history_label)
         history_container.addWidget(self.file_list)
@@ -368,8 +495,9 @@ class PodcastPlayer(QWidget):
         self.is_seeking = False
 
 
-        self.update_thread = SubtitleUpdateThread(self)
-        self.update_thread.update_signal.connect(self.update_subtitle_efficient)
+        self.subtitle_timeline = SubtitleTimeline(self.media_player, self.highlight_boundaries, self)
+        self.subtitle_timeline.update_signal.connect(self.update_subtitle_efficient)
+        self.subtitle_timeline.start()
 
 
         self.media_player.positionChanged.connect(self.position_changed)
@@ -379,14 +507,250 @@ class PodcastPlayer(QWidget):
         self.display_cached_files()
 
     def display_cached_files(self):
-        """显示已缓存的音频文件列表"""
+        """显示已缓存的音频文件列表，批量转录任务附带状态显示在末尾"""
         self.file_list.clear()
         html_content = []
         for file_hash, info in self.audio_index.items():
             file_name = Path(info['file_path']).name
             html_content.append(f'<p><a href="{file_hash}">{file_name}</a></p>')
+        for job in self.jobs.jobs:
+            file_name = html.escape(Path(job['file_path']).name)
+            status = JOB_STATUS_TEXT[job['status']]
+            if job['status'] == JOB_FAILED:
+                html_content.append(
+                    f'<p style="color:#C0392B;">{file_name} · {status} <a href="job:{job["id"]}">重试</a></p>'
+                )
+            else:
+                html_content.append(f'<p style="color:gray;">{file_name} · {status}</p>')
         self.file_list.setHtml('\n'.join(html_content))
 
+    def on_library_link_clicked(self, url):
+        """历史列表链接：打开已缓存的音频，或重试失败的批量任务"""
+        if url.scheme() == 'job':
+            self.retry_job(int(url.path()))
+        else:
+            self.load_cached_audio(url)
+
+    def import_folder(self):
+        """选择文件夹，将其中的音频加入批量转录队列"""
+        folder = QFileDialog.getExistingDirectory(self, "选择音频文件夹")
+        if folder:
+            self.start_hash_thread(FileHashThread(folder=folder))
+
+    def start_hash_thread(self, thread):
+        thread.files_found.connect(self.on_job_files_found)
+        thread.file_hashed.connect(self.on_job_file_hashed)
+        thread.hash_failed.connect(self.on_job_hash_failed)
+        thread.finished.connect(lambda: self.hash_threads.remove(thread))
+        self.hash_threads.append(thread)
+        thread.start()
+
+    def resume_jobs(self):
+        """启动时恢复上次未完成的批量转录任务"""
+        if not self.jobs:
+            return
+        logging.info(f"恢复批量转录任务: {len(self.jobs)} 个")
+        hashing = [job['file_path'] for job in self.jobs.with_status(JOB_HASHING)]
+        if hashing:
+            self.start_hash_thread(FileHashThread(paths=hashing))
+        self.pump_jobs()
+
+    def on_job_files_found(self, paths):
+        added = self.jobs.add_files(paths)
+        self.jobs.save()
+        logging.info(f"批量导入: 找到 {len(paths)} 个音频，新增任务 {len(added)} 个")
+        self.display_cached_files()
+
+    def on_job_file_hashed(self, file_path, file_hash):
+        """文件哈希计算完成：已有字幕缓存或重复的文件跳过，其余进入排队"""
+        job = self.jobs.find(file_path=file_path)
+        if job is None or job['status'] != JOB_HASHING:
+            return
+        duplicate = self.jobs.find(file_hash=file_hash)
+        if file_hash in self.audio_index or duplicate is not None:
+            logging.info(f"跳过已转录或重复的音频: {file_path}")
+            self.jobs.remove(job['id'])
+        else:
+            job['file_hash'] = file_hash
+            job['status'] = JOB_QUEUED
+        self.jobs.save()
+        self.display_cached_files()
+        self.pump_jobs()
+
+    def on_job_hash_failed(self, file_path, error_message):
+        job = self.jobs.find(file_path=file_path)
+        if job is not None:
+            self.jobs.set_status(job['id'], JOB_FAILED, error_message)
+            self.jobs.save()
+            self.display_cached_files()
+        logging.error(f"计算文件哈希时出错 {file_path}: {error_message}")
+
+    def pump_jobs(self):
+        """在并发上限内启动排队中的转录任务"""
+        started = False
+        while len(self.job_threads) < self.asr_batch_jobs:
+            job = self.jobs.next_queued()
+            if job is None:
+                break
+            job_id = job['id']
+            self.jobs.set_status(job_id, JOB_RUNNING)
+            thread = TranscriptionThread(
+                job['file_path'], self.api_key, backend=self.asr_backend,
+                chunk_ms=self.asr_chunk_ms, max_workers=self.asr_workers, backend_options=self.asr_options,
+                checkpoint_file=self.checkpoint_file(job['file_hash']), segment=self.segment_subtitles,
+                transcript_file=self.sidecar_transcript(job['file_path'])
+            )
+            thread.transcription_done.connect(lambda subtitles, job_id=job_id: self.on_job_done(job_id, subtitles))
+            thread.error_occurred.connect(lambda message, job_id=job_id: self.on_job_failed(job_id, message))
+            self.job_threads[job_id] = thread
+            thread.start()
+            started = True
+            logging.info(f"开始批量转录: {job['file_path']}")
+        if started:
+            self.jobs.save()
+            self.display_cached_files()
+
+    def on_job_done(self, job_id, subtitles):
+        """批量转录完成：写入字幕缓存和音频索引"""
+        try:
+            thread = self.job_threads.pop(job_id, None)
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            file_hash = job['file_hash']
+            subtitle_file = self.subtitle_cache_dir / f"{file_hash}.json"
+            cache_data = build_subtitle_cache({}, job['file_path'], subtitles, thread.segmentation if thread else None)
+            with open_cache_file(subtitle_file, 'w') as f:
+                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            self.audio_index[file_hash] = {
+                'file_path': job['file_path'],
+                'subtitle_file': str(subtitle_file)
+            }
+            self.jobs.remove(job_id)
+            self.jobs.save()
+            self.touch_cache(file_hash)
+            self.index_fingerprint(job['file_path'], file_hash)
+            self.run_cache_maintenance()
+            logging.info(f"批量转录完成: {job['file_path']}, 字幕数: {len(subtitles)}")
+        except Exception as e:
+            logging.error(f"保存批量转录结果时出错: {e}")
+            self.jobs.set_status(job_id, JOB_FAILED, str(e))
+            self.jobs.save()
+        self.display_cached_files()
+        self.pump_jobs()
+
+    def on_job_failed(self, job_id, error_message):
+        self.job_threads.pop(job_id, None)
+        self.jobs.set_status(job_id, JOB_FAILED, error_message)
+        self.jobs.save()
+        logging.error(f"批量转录失败 [任务{job_id}]: {error_message}")
+        self.display_cached_files()
+        self.pump_jobs()
+
+    def retry_job(self, job_id):
+        """重试失败的任务，未算出哈希的重新计算"""
+        job = self.jobs.get(job_id)
+        if job is None or job['status'] != JOB_FAILED:
+            return
+        if job['file_hash'] is None:
+            self.jobs.set_status(job_id, JOB_HASHING)
+            self.start_hash_thread(FileHashThread(paths=[job['file_path']]))
+        else:
+            self.jobs.set_status(job_id, JOB_QUEUED)
+        self.jobs.save()
+        self.display_cached_files()
+        self.pump_jobs()
+
+    def stop_jobs(self):
+        """退出时停止批量任务，进行中的任务保存为排队状态，下次启动继续"""
+        for thread in self.hash_threads:
+            thread.stop()
+        for job_id, thread in self.job_threads.items():
+            thread.transcription_done.disconnect()
+            thread.error_occurred.disconnect()
+            thread.stop()
+            self.jobs.set_status(job_id, JOB_QUEUED)
+        self.job_threads.clear()
+        self.jobs.save()
+
+    def export_episodes(self):
+        """将所有已缓存音频的字幕和翻译导出为字幕包"""
+        try:
+            if not self.audio_index:
+                QMessageBox.information(self, "提示", "没有可导出的音频")
+                return
+
+            bundle_path, _ = QFileDialog.getSaveFileName(
+                self, "导出字幕包", f"podcasts{BUNDLE_SUFFIX}", f"字幕包 (*{BUNDLE_SUFFIX})"
+            )
+            if not bundle_path:
+                return
+
+            include_audio = QMessageBox.question(
+                self, "导出字幕包", "是否同时导出音频文件？",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+            ) == QMessageBox.Yes
+
+            if self.current_file_hash and self.transcript:
+                self.save_subtitle_cache()
+
+            self.start_bundle_thread(BundleThread(
+                'export', bundle_path, audio_index=dict(self.audio_index), include_audio=include_audio
+            ))
+        except Exception as e:
+            logging.error(f"导出字幕包时出错: {e}")
+            QMessageBox.warning(self, "错误", f"导出字幕包出错: {e}")
+
+    def import_episodes(self):
+        """导入字幕包，合并到音频索引和字幕缓存"""
+        bundle_path, _ = QFileDialog.getOpenFileName(
+            self, "导入字幕包", "", f"字幕包 (*{BUNDLE_SUFFIX})"
+        )
+        if bundle_path:
+            self.start_bundle_thread(BundleThread('import', bundle_path, data_dir=self.data_dir))
+
+    def start_bundle_thread(self, thread):
+        """启动字幕包导出/导入线程"""
+        self.import_bundle_btn.setEnabled(False)
+        self.export_bundle_btn.setEnabled(False)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.set_progress(0, 0, "正在处理字幕包...")
+        self.bundle_thread = thread
+        self.bundle_thread.progress_signal.connect(self.on_bundle_progress)
+        self.bundle_thread.finished_signal.connect(self.on_bundle_done)
+        self.bundle_thread.error_occurred.connect(self.on_bundle_error)
+        self.bundle_thread.start()
+
+    def on_bundle_progress(self, current, total):
+        """更新字幕包处理进度"""
+        self.progress_bar.set_progress(current, total, f"正在处理字幕包... ({current}{f'/{total}' if total else ''})")
+
+    def on_bundle_done(self, mode, result):
+        """字幕包处理完成"""
+        self.import_bundle_btn.setEnabled(True)
+        self.export_bundle_btn.setEnabled(True)
+        self.progress_bar.setVisible(False)
+        if mode == 'export':
+            QMessageBox.information(self, "导出完成", f"已导出 {result} 个音频的字幕")
+            return
+
+        merge_index_entries(self.audio_index, result)
+        for file_hash in result:
+            self.cache_manager.touch(file_hash)
+        self.save_audio_index()
+        self.display_cached_files()
+        if self.current_file_hash in result:
+            self.load_cached_audio(QUrl(self.current_file_hash))
+        QMessageBox.information(self, "导入完成", f"已导入 {len(result)} 个音频的字幕")
+
+    def on_bundle_error(self, error_message):
+        """字幕包处理出错"""
+        self.import_bundle_btn.setEnabled(True)
+        self.export_bundle_btn.setEnabled(True)
+        self.progress_bar.setVisible(False)
+        logging.error(f"处理字幕包时出错: {error_message}")
+        QMessageBox.critical(self, "错误", f"处理字幕包时出错: {error_message}")
+
     def load_cached_audio(self, url):
         """加载已缓存的音频文件"""
         try:
@@ -403,9 +767,7 @@ class PodcastPlayer(QWidget):
             current_silicon_key = self.silicon_cloud_api_key
 
 
-            if self.update_thread and self.update_thread.isRunning():
-                self.update_thread.stop()
-                self.update_thread.wait()
+            self.remember_playback_position()
 
 
             self.clear_all_highlights()
@@ -422,11 +784,12 @@ class PodcastPlayer(QWidget):
                 relative_path = audio_info['file_path']
                 self.audio_file = os.path.abspath(relative_path)
                 self.current_file_hash = file_hash
-                subtitle_file = Path(audio_info['subtitle_file'])
-
-                if subtitle_file.exists():
+                subtitle_file = resolve_cache_file(audio_info['subtitle_file'])
 
-                    self.load_cached_subtitles(subtitle_file)
+                if subtitle_file is not None:
+                    self.touch_cache(file_hash)
+                    self.resume_position = audio_info.get('last_position', 0)
+                    self.load_cached_subtitles(subtitle_file, self.resume_position)
 
 
                     self.gemini_api_key = current_gemini_key
@@ -445,33 +808,17 @@ class PodcastPlayer(QWidget):
                     self.play_button.setEnabled(True)
 
 
-                    self.update_thread = SubtitleUpdateThread(self)
-                    self.update_thread.update_signal.connect(self.update_subtitle_efficient)
-
-
                     self.display_cached_files()
 
 
-                    cursor = self.subtitle_display.textCursor()
-                    cursor.movePosition(QTextCursor.Start)
-                    self.subtitle_display.setTextCursor(cursor)
-
-
-                    QCoreApplication.processEvents()
-
-
-                    self.subtitle_display.verticalScrollBar().setValue(0)
+                    self.session.update(file_hash, self.resume_position)
+                    self.session.flush(force=True)
 
 
                     if was_playing:
 
-                        self.media_player.setPosition(0)
                         self.media_player.play()
                         self.play_button.setIcon(self.style().standardIcon(QStyle.SP_MediaPause))
-
-
-                        if not self.update_thread.isRunning():
-                            self.update_thread.start()
                 else:
                     QMessageBox.warning(self, "错误", "字幕文件不存在")
         except Exception as e:
@@ -483,15 +830,22 @@ class PodcastPlayer(QWidget):
         audio_file, _ = QFileDialog.getOpenFileName(self, "选择音频文件", "", "音频文件 (*.wav *.mp3)")
         if audio_file:
 
+            self.remember_playback_position()
+            self.stop_transcription()
+            self.stream_runner.stop()
+            self.display_runner.stop()
+            self.visibility_runner.stop()
+
             self.translation_toggle.setEnabled(False)
 
             self._translation_type_set = False
 
 
             self.translations = {}
-            self.subtitles = []
-            self.subtitle_times = []
-            self.word_positions = []
+            self.pending_translations = {}
+            self.transcript = Transcript()
+            self.segmentation = None
+            self.positions = SubtitlePositions()
             self.current_subtitle_index = -1
             self.current_word_index = -1
 
@@ -504,12 +858,14 @@ class PodcastPlayer(QWidget):
 
 
             if file_hash in self.audio_index:
-                subtitle_file = self.subtitle_cache_dir / f"{file_hash}.json"
-                if subtitle_file.exists():
-                    self.load_cached_subtitles(subtitle_file)
+                subtitle_file = resolve_cache_file(self.subtitle_cache_dir / f"{file_hash}.json")
+                if subtitle_file is not None:
+                    self.current_file_hash = file_hash
+                    self.touch_cache(file_hash)
+                    self.resume_position = self.audio_index[file_hash].get('last_position', 0)
+                    self.load_cached_subtitles(subtitle_file, self.resume_position)
                     self.setup_audio_playback()
-
-                    self.translation_toggle.setEnabled(True)
+                    self.index_fingerprint(self.audio_file, file_hash)
                     return
 
 
@@ -518,14 +874,100 @@ class PodcastPlayer(QWidget):
             self.media_player.setMedia(content)
             self.play_button.setEnabled(False)
 
+            self.set_virtual_mode(False)
             self.subtitle_display.clear()
             self.subtitle_display.setHtml('<p style="font-size:16px; color:gray;">正在转录音频，请稍候...</p>')
 
             self.current_file_hash = file_hash
-            self.thread = TranscriptionThread(self.audio_file, self.api_key)
-            self.thread.transcription_done.connect(self.on_transcription_done)
-            self.thread.error_occurred.connect(self.on_transcription_error)
-            self.thread.start()
+            self.find_or_transcribe()
+
+    def find_or_transcribe(self):
+        """在指纹库中查找内容相同的已转录音频（如另一种编码或剪辑过的版本），找不到时开始转录"""
+        candidates = []
+        if self.match_fingerprints and not self.sidecar_transcript(self.audio_file):
+            candidates = [
+                file_hash for file_hash in self.audio_index
+                if file_hash != self.current_file_hash and self.fingerprints.has(file_hash)
+            ]
+        if not candidates:
+            self.start_transcription()
+            self.index_fingerprint(self.audio_file, self.current_file_hash)
+            return
+        self.subtitle_display.setHtml('<p style="font-size:16px; color:gray;">正在查找已转录的相同音频...</p>')
+        thread = self.start_fingerprint_thread(self.audio_file, self.current_file_hash, candidates)
+        thread.match_found.connect(self.on_fingerprint_match)
+        thread.no_match.connect(self.on_fingerprint_no_match)
+        self.fingerprint_lookup = thread
+
+    def index_fingerprint(self, audio_file, file_hash):
+        """后台计算尚未入库的音频指纹"""
+        if self.match_fingerprints and not self.fingerprints.has(file_hash):
+            self.start_fingerprint_thread(audio_file, file_hash)
+
+    def start_fingerprint_thread(self, audio_file, file_hash, candidates=()):
+        thread = FingerprintThread(audio_file, file_hash, self.fingerprints, candidates)
+        thread.finished.connect(lambda: self.fingerprint_threads.remove(thread))
+        self.fingerprint_threads.append(thread)
+        thread.start()
+        return thread
+
+    def detach_fingerprint_lookup(self):
+        """忽略进行中的指纹查询结果，完整指纹仍在后台计算入库"""
+        thread = self.fingerprint_lookup
+        self.fingerprint_lookup = None
+        if thread is not None:
+            thread.match_found.disconnect()
+            thread.no_match.disconnect()
+
+    def on_fingerprint_no_match(self):
+        self.detach_fingerprint_lookup()
+        self.subtitle_display.setHtml('<p style="font-size:16px; color:gray;">正在转录音频，请稍候...</p>')
+        self.start_transcription()
+
+    def on_fingerprint_match(self, file_hash, shift_ms):
+        """指纹匹配到内容相同的已转录音频：平移其字幕时间后写入当前音频的缓存并加载
+
+        参考音频时间减去 shift_ms 即为当前音频时间；超出当前音频范围的字幕被裁掉，
+        裁掉部分单词的字幕不保留翻译，稍后按需重新翻译。
+        """
+        self.detach_fingerprint_lookup()
+        try:
+            reference = resolve_cache_file(self.subtitle_cache_dir / f"{file_hash}.json")
+            if file_hash not in self.audio_index or reference is None:
+                raise ValueError(f"匹配音频的字幕缓存不存在: {file_hash}")
+            with open_cache_file(reference) as f:
+                cached_data = json.load(f)
+            subtitles, translations, trimmed = shift_subtitles(
+                cached_data['subtitles'], cached_data.get('translations', {}),
+                shift_ms, audio_duration_ms(self.audio_file)
+            )
+            if not subtitles:
+                raise ValueError("匹配范围内没有字幕")
+            segmentation = None if trimmed else cached_data.get('segmentation')
+
+            subtitle_file = self.subtitle_cache_dir / f"{self.current_file_hash}.json"
+            with open_cache_file(subtitle_file, 'w') as f:
+                json.dump(build_subtitle_cache(translations, self.audio_file, subtitles, segmentation),
+                          f, ensure_ascii=False, indent=2)
+            self.audio_index[self.current_file_hash] = {
+                'file_path': self.audio_file,
+                'subtitle_file': str(subtitle_file),
+                'matched_from': file_hash,
+                'offset_ms': -shift_ms
+            }
+            self.touch_cache(self.current_file_hash)
+            logging.info(
+                f"指纹匹配到已转录音频 {self.audio_index[file_hash].get('file_path')}，"
+                f"时间偏移: {-shift_ms}ms，复用字幕: {len(subtitles)} 条，翻译: {len(translations)} 条"
+            )
+            self.run_cache_maintenance()
+            self.display_cached_files()
+            self.load_cached_subtitles(resolve_cache_file(subtitle_file), 0)
+            self.setup_audio_playback()
+        except Exception as e:
+            logging.error(f"复用匹配音频的字幕时出错: {e}")
+            self.subtitle_display.setHtml('<p style="font-size:16px; color:gray;">正在转录音频，请稍候...</p>')
+            self.start_transcription()
 
     def setup_audio_playback(self):
         """设置音频播放"""
@@ -540,46 +982,119 @@ class PodcastPlayer(QWidget):
 
             self.last_subtitle_index = -1
             self.last_word_index = -1
-            self.last_update_time = 0
-
-
-            if self.update_thread is None:
-                self.update_thread = SubtitleUpdateThread(self)
-                self.update_thread.update_signal.connect(self.update_subtitle_efficient)
-            else:
-                if not self.update_thread.isRunning():
-                    self.update_thread.start()
         except Exception as e:
             print(f"设置音频播放时出错: {e}")
 
-    def load_cached_subtitles(self, subtitle_file):
-        """加载缓存的字幕数据，包括翻译结果"""
+    def remember_playback_position(self):
+        """记录当前音频的播放位置，下次打开时从该位置继续"""
+        try:
+            if self.resume_position:
+                return
+            if self.current_file_hash in self.audio_index and not self.media_player.media().isNull():
+                position = self.media_player.position()
+                self.audio_index[self.current_file_hash]['last_position'] = position
+                self.save_audio_index()
+                self.session.update(self.current_file_hash, position)
+                self.session.flush(force=True)
+        except Exception as e:
+            logging.error(f"记录播放位置时出错: {e}")
+
+    def resume_last_session(self):
+        """启动时在后台预取并预渲染上次播放的音频，恢复到上次的播放位置"""
         try:
+            state = self.session.load()
+            file_hash = state['file_hash']
+            audio_info = self.audio_index.get(file_hash)
+            if not audio_info or not os.path.exists(audio_info['file_path']):
+                self.startup_ready_pending = False
+                return
 
-            current_gemini_key = self.gemini_api_key
-            current_silicon_key = self.silicon_cloud_api_key
+            subtitle_file = resolve_cache_file(audio_info['subtitle_file'])
+            self.prefetch_thread = PrefetchThread(
+                [path for path in (audio_info['file_path'], subtitle_file) if path]
+            )
+            self.prefetch_thread.start()
+
+            audio_info['last_position'] = state['position']
+            self.load_cached_audio(QUrl(file_hash))
+            logging.info(f"恢复上次会话: {Path(audio_info['file_path']).name} @ {format_time(state['position'])}")
+        except Exception as e:
+            self.startup_ready_pending = False
+            logging.error(f"恢复上次会话时出错: {e}")
+
+    def on_media_status_changed(self, status):
+        """媒体加载完成后跳转到记录的播放位置"""
+        if status != QMediaPlayer.LoadedMedia:
+            return
+        if self.resume_position:
+            position = int(self.resume_position)
+            self.resume_position = 0
+            self.media_player.setPosition(position)
+            self.update_subtitle_efficient(position)
+        if self.startup_ready_pending:
+            self.startup_ready_pending = False
+            self.load_metrics['startup_ready_ms'] = (time.perf_counter() - self.startup_started) * 1000
+            logging.info(f"启动到可播放耗时: {self.load_metrics['startup_ready_ms']:.1f}ms")
+
+    def load_cached_subtitles(self, subtitle_file, focus_time=0):
+        """加载缓存的字幕数据，包括翻译结果
+
+        已有渲染快照时整体加载；否则流式加载，先显示首屏和 focus_time 附近的字幕。
+        """
+        try:
+            self.stop_transcription()
+            self.stream_runner.stop()
+            self.display_runner.stop()
+            self.visibility_runner.stop()
+            if resolve_cache_file(self.render_snapshot_file()) is None:
+                self.translation_toggle.setEnabled(False)
+                self.stream_runner.start(
+                    self.stream_cached_subtitles(subtitle_file, focus_time),
+                    until=FIRST_SCREEN_READY
+                )
+                return
 
-            with open(subtitle_file, 'r', encoding='utf-8') as f:
+            with open_cache_file(subtitle_file) as f:
                 cached_data = json.load(f)
 
 
-            self.subtitles = cached_data['subtitles']
+            self.transcript = Transcript.from_dicts(cached_data['subtitles'])
             self.translations = cached_data.get('translations', {})
-            self.subtitle_times = [sub['start_time'] for sub in self.subtitles]
-            self.word_start_times = []
-            self.subtitle_blocks = []
-            self.word_positions = []
+            self.pending_translations = {}
+            self.segmentation = cached_data.get('segmentation')
+            self.positions = SubtitlePositions()
             self.current_subtitle_index = -1
             self.current_word_index = -1
             self.last_subtitle_index = -1
             self.last_word_index = -1
 
 
-            for subtitle in self.subtitles:
-                for word in subtitle['words']:
-                    self.word_start_times.append(word['start'])
+            self.restore_translator_state()
+
+
+            self.display_subtitles()
+
+
+            if focus_time:
+                self.scroll_to_current_subtitle(focus_time)
+            elif not self.virtual_mode:
+                cursor = self.subtitle_display.textCursor()
+                cursor.movePosition(QTextCursor.Start)
+                self.subtitle_display.setTextCursor(cursor)
+
+
+                QCoreApplication.processEvents()
+
 
+                self.subtitle_display.verticalScrollBar().setValue(0)
 
+        except Exception as e:
+            logging.error(f"加载缓存字幕时出错: {e}")
+            raise e
+
+    def restore_translator_state(self):
+        """根据缓存翻译使用的翻译器恢复按钮与API Key状态"""
+        try:
             if self.translations:
                 first_translation = next(iter(self.translations.values()))
                 translator_type = first_translation.get('translator', 'google')
@@ -602,30 +1117,319 @@ class PodcastPlayer(QWidget):
                 elif translator_type == 'silicon_cloud':
                     self.api_key_input.setText(self.silicon_cloud_api_key)
                 self._is_programmatic_change = False
+        except Exception as e:
+            logging.error(f"恢复翻译器状态时出错: {e}")
+
+    def stream_cached_subtitles(self, subtitle_file, focus_time=0):
+        """流式加载字幕缓存的生成器任务
+
+        逐条解析字幕缓存，先渲染首屏以及 focus_time 附近的字幕并产出
+        FIRST_SCREEN_READY；之后每产出一次代表完成一小步，由 stream_runner
+        按帧预算分片推进，其余字幕在后台补全而不阻塞输入。
+
+        播放位置附近的字幕先追加在文档末尾，中间尚未渲染的字幕随后插入到
+        首屏与它们之间；位置索引自动平移其后字幕，这里只需补偿滚动条。
+
+        字幕数超过 virtual_view_threshold 时改用虚拟化视图，解析出的字幕只
+        需登记行高，不再渲染到文档中。
+        """
+        started = time.perf_counter()
+        self.transcript = Transcript()
+        self.translations = {}
+        self.pending_translations = {}
+        self.segmentation = None
+        self.positions = SubtitlePositions()
+        self.current_subtitle_index = -1
+        self.current_word_index = -1
+        self.last_subtitle_index = -1
+        self.last_word_index = -1
+        self.set_virtual_mode(False)
+        self.subtitle_display.clear()
 
+        document = self.subtitle_display.document()
+        layout = document.documentLayout()
+        scrollbar = self.subtitle_display.verticalScrollBar()
+        subtitle_count = None
+        rendered = 0
+        focus_range = None
+        focus_pending = focus_time > 0
+        first_screen_shown = False
+        translations_late = False
+
+        def render_next():
+            nonlocal rendered, focus_range
+            if focus_range and rendered == focus_range[0]:
+                rendered = focus_range[1]
+                focus_range = None
+                return
+            if focus_range is None:
+                self.render_subtitle(rendered)
+            else:
+                anchor = document.findBlock(self.positions.block(focus_range[0])['start'])
+                anchor_top = layout.blockBoundingRect(anchor).top()
+                self.render_subtitle(rendered)
+                moved = layout.blockBoundingRect(anchor).top() - anchor_top
+                if moved:
+                    scrollbar.setValue(scrollbar.value() + int(moved))
+            rendered += 1
+
+        def render_focus(eof):
+            nonlocal focus_pending, focus_range
+            center = self.transcript.subtitle_at(focus_time)
+            if not eof and len(self.transcript) - 1 - center < self.focus_window_after:
+                return
+            focus_pending = False
+            start = max(0, center - self.focus_window_before)
+            end = min(len(self.transcript), center + self.focus_window_after + 1)
+            if start <= rendered:
+                while rendered < end:
+                    render_next()
+            else:
+                for idx in range(start, end):
+                    self.render_subtitle(idx)
+                focus_range = (start, end)
+            self.scroll_to_current_subtitle(focus_time)
+
+        def enter_virtual_mode():
+            self.set_virtual_mode(True)
+            self.positions = SubtitlePositions()
+            for utterance in self.transcript:
+                self.positions.add_subtitle(utterance.word_count)
+            self.virtual_subtitle_view.set_subtitles(self.transcript, self.get_translation_text, self.show_translation)
+            if first_screen_shown and focus_time:
+                self.scroll_to_current_subtitle(focus_time)
+
+        def virtual_focus(eof):
+            nonlocal focus_pending
+            center = self.transcript.subtitle_at(focus_time)
+            if not eof and len(self.transcript) - 1 - center < self.focus_window_after:
+                return
+            focus_pending = False
+            self.virtual_subtitle_view.scroll_to_subtitle(center, smooth=False)
+
+        def show_first_screen():
+            nonlocal first_screen_shown
+            first_screen_shown = True
+            self.load_metrics = {
+                'first_subtitle_ms': (time.perf_counter() - started) * 1000
+            }
+            logging.info(f"首屏字幕已显示 - 耗时: {self.load_metrics['first_subtitle_ms']:.1f}ms, 已解析字幕数: {len(self.transcript)}")
+
+        with open_cache_file(subtitle_file) as f:
+            for key, value in iter_cache_items(f):
+                if key == 'translations':
+                    self.translations = value
+                    self.pending_translations = {}
+                    translations_late = bool(self.transcript)
+                    self.restore_translator_state()
+                    continue
+                if key == 'segmentation':
+                    self.segmentation = value
+                    continue
+                if key == 'subtitle_count':
+                    subtitle_count = value
+                    if value > self.virtual_view_threshold:
+                        enter_virtual_mode()
+                    continue
+                if key != 'subtitles':
+                    continue
+
+                idx = self.transcript.append_dict(value)
+                self.positions.add_subtitle(self.transcript[idx].word_count)
+
+                if not self.virtual_mode and len(self.transcript) > self.virtual_view_threshold:
+                    enter_virtual_mode()
+                if self.virtual_mode:
+                    self.virtual_subtitle_view.sync_rows()
+                    if not first_screen_shown:
+                        if focus_pending:
+                            virtual_focus(eof=False)
+                        if len(self.transcript) >= self.first_screen_subtitles and not focus_pending:
+                            show_first_screen()
+                            yield FIRST_SCREEN_READY
+                        continue
+                    yield
+                    continue
+
+                if not first_screen_shown:
+                    while rendered < min(len(self.transcript), self.first_screen_subtitles):
+                        render_next()
+                    if focus_pending:
+                        render_focus(eof=False)
+                    if rendered >= self.first_screen_subtitles and not focus_pending:
+                        show_first_screen()
+                        yield FIRST_SCREEN_READY
+                    continue
+
+                if rendered < len(self.transcript):
+                    render_next()
+                yield
+
+        if not first_screen_shown:
+            if focus_pending:
+                if self.virtual_mode:
+                    virtual_focus(eof=True)
+                else:
+                    render_focus(eof=True)
+            show_first_screen()
+            yield FIRST_SCREEN_READY
 
-            self.display_subtitles()
+        while not self.virtual_mode and rendered < len(self.transcript):
+            render_next()
+            yield
 
 
-            cursor = self.subtitle_display.textCursor()
-            cursor.movePosition(QTextCursor.Start)
-            self.subtitle_display.setTextCursor(cursor)
+        self.load_metrics['total_ms'] = (time.perf_counter() - started) * 1000
+        self.load_metrics['subtitles'] = len(self.transcript)
+        logging.info(
+            f"字幕流式加载完成 - 字幕数: {len(self.transcript)}, 单词数: {self.transcript.word_count}, "
+            f"首屏: {self.load_metrics['first_subtitle_ms']:.1f}ms, 总耗时: {self.load_metrics['total_ms']:.1f}ms"
+        )
 
+        if translations_late or subtitle_count is None:
+            self.save_subtitle_cache()
+        if self.virtual_mode:
+            if translations_late:
+                self.virtual_subtitle_view.relayout()
+        elif translations_late and self.translations:
+            self.display_subtitles()
+            self.scroll_to_current_subtitle(self.media_player.position() or focus_time)
+        else:
+            self.save_render_snapshot(self.get_render_key())
+        self.translation_toggle.setEnabled(bool(self.transcript))
+
+    def start_transcription(self):
+        """启动分块转录，字幕随分块完成逐批显示、索引并排队翻译"""
+        self.stop_transcription()
+        self.transcribing = True
+        self.transcription_started = time.perf_counter()
+        self.load_metrics = {}
+        self.total_translation_count = 0
+        self.current_translation_count = 0
+        self.unrendered_translations = 0
+        self.translation_error_shown = False
+        self.translation_progress.clear()
+        self.translation_target = self.current_translator()
+
+        if self.translation_target is not None:
+            translator_type, api_key = self.translation_target
+            self.translation_pipeline = TranslationPipeline(translator_type, api_key, workers=self.translation_workers)
+            self.translation_pipeline.translation_done.connect(self.on_translation_done)
+            self.translation_pipeline.error_occurred.connect(self.on_translation_error)
+            self.translation_pipeline.start()
+
+        self.thread = TranscriptionThread(
+            self.audio_file, self.api_key, backend=self.asr_backend,
+            chunk_ms=self.asr_chunk_ms, max_workers=self.asr_workers, backend_options=self.asr_options,
+            checkpoint_file=self.checkpoint_file(self.current_file_hash),
+            translation_pipeline=self.translation_pipeline, segment=self.segment_subtitles,
+            transcript_file=self.sidecar_transcript(self.audio_file)
+        )
+        self.thread.utterances_ready.connect(self.on_utterances_transcribed)
+        self.thread.transcription_done.connect(self.on_transcription_done)
+        self.thread.progress_signal.connect(self.on_transcription_progress)
+        self.thread.error_occurred.connect(self.on_transcription_error)
+        self.thread.start()
+
+    def stop_transcription(self):
+        """停止进行中的转录与翻译流水线并忽略它们之后的结果，线程结束前保留引用"""
+        self.transcribing = False
+        self.detach_fingerprint_lookup()
+        pipeline = self.translation_pipeline
+        self.translation_pipeline = None
+        if pipeline is not None:
+            pipeline.translation_done.disconnect()
+            pipeline.error_occurred.disconnect()
+            pipeline.stop()
+            if pipeline.isRunning():
+                self.retired_threads.append(pipeline)
+                pipeline.finished.connect(lambda: self.retired_threads.remove(pipeline))
+        if not isinstance(self.thread, TranscriptionThread):
+            return
+        thread = self.thread
+        self.thread = None
+        for signal in (thread.utterances_ready, thread.transcription_done,
+                       thread.progress_signal, thread.error_occurred):
+            signal.disconnect()
+        thread.stop()
+        if thread.isRunning():
+            self.retired_threads.append(thread)
+            thread.finished.connect(lambda: self.retired_threads.remove(thread))
+
+    def on_transcription_progress(self, completed, total):
+        """显示分块识别进度"""
+        if total > 1:
+            self.progress_bar.setVisible(True)
+            self.progress_bar.set_progress(completed, total, f"正在转录音频... ({completed}/{total} 分块)")
 
-            QCoreApplication.processEvents()
+    def on_utterances_transcribed(self, utterances):
+        """转录产出一批按顺序确定的字幕：立即加入转录模型、显示并排队翻译
 
+        第一批到达时清除等待提示并允许播放，记录首条字幕耗时；之后的批次通知时间轴
+        边界已追加，播放追上转录进度后高亮能继续推进。
+        """
+        try:
+            first = not self.transcript
+            start = len(self.transcript)
+            for subtitle in utterances:
+                idx = self.transcript.append_dict(subtitle)
+                self.positions.add_subtitle(self.transcript[idx].word_count)
+
+            if first:
+                self.set_virtual_mode(False)
+                self.subtitle_display.clear()
+                self.current_display_index = 0
+
+            if self.virtual_mode:
+                self.virtual_subtitle_view.sync_rows()
+            elif len(self.transcript) > self.virtual_view_threshold:
+                self.show_virtual_subtitles()
+            else:
+                if first:
+                    self.render_subtitle(0)
+                    self.current_display_index = 1
+                if not self.display_runner.isActive():
+                    self.display_runner.start(self.transcribed_display_task())
+
+            if first:
+                self.load_metrics['first_subtitle_ms'] = (time.perf_counter() - self.transcription_started) * 1000
+                logging.info(f"转录首条字幕已显示 - 耗时: {self.load_metrics['first_subtitle_ms']:.1f}ms")
+                self.play_button.setEnabled(True)
+                self.translation_toggle.setEnabled(True)
+                self.subtitle_timeline.force_update()
+            else:
+                self.subtitle_timeline.boundaries_changed()
 
-            self.subtitle_display.verticalScrollBar().setValue(0)
+            self.translate_subtitles(range(start, len(self.transcript)))
 
         except Exception as e:
-            logging.error(f"加载缓存字幕时出错: {e}")
-            raise e
+            logging.error(f"显示转录字幕时出错: {e}")
 
-    def on_transcription_done(self, transcript):
-        """处理转录完成"""
+    def transcribed_display_task(self):
+        """渲染转录过程中新到达字幕的生成器任务，由 display_runner 按帧预算推进"""
+        while not self.virtual_mode and self.current_display_index < len(self.transcript):
+            self.render_subtitle(self.current_display_index)
+            self.current_display_index += 1
+            yield
+
+    def on_transcription_done(self, subtitles):
+        """处理转录完成：写入字幕缓存与音频索引"""
         try:
+            self.transcribing = False
+            self.load_metrics.update(self.thread.upload_report)
+            self.segmentation = self.thread.segmentation
+            self.thread = None
+            self.progress_bar.setVisible(False)
+            self.load_metrics['transcription_ms'] = (time.perf_counter() - self.transcription_started) * 1000
+            self.load_metrics['subtitles'] = len(self.transcript)
+            logging.info(
+                f"转录完成 - 字幕数: {len(self.transcript)}, 首条字幕: {self.load_metrics.get('first_subtitle_ms', 0):.1f}ms, "
+                f"总耗时: {self.load_metrics['transcription_ms']:.1f}ms"
+            )
 
-            self.parse_transcript(transcript)
+            if not self.transcript:
+                logging.warning("转录结果为空，无法开始翻译")
+                self.subtitle_display.setHtml('<p style="font-size:16px; color:gray;">暂无字幕信息</p>')
 
 
             self.save_subtitle_cache()
@@ -635,143 +1439,62 @@ class PodcastPlayer(QWidget):
                 'file_path': self.audio_file,
                 'subtitle_file': str(self.subtitle_cache_dir / f"{self.current_file_hash}.json")
             }
-            self.save_audio_index()
+            self.touch_cache(self.current_file_hash)
+            self.run_cache_maintenance()
             self.display_cached_files()
 
 
-            self.play_button.setEnabled(True)
-
-
-            self.initialize_subtitle_positions()
-
-
-            self.initialize_update_thread()
-
-
-            current_position = self.media_player.position()
-            self.update_subtitle_efficient(current_position)
-            if self.update_thread:
-                self.update_thread.force_update()
-
-
-            self.translation_toggle.setEnabled(True)
+            if self.total_translation_count and self.current_translation_count >= self.total_translation_count:
+                self.finish_translation()
+            elif self.total_translation_count:
+                self.progress_bar.setVisible(True)
+                self.progress_bar.set_progress(
+                    self.current_translation_count, self.total_translation_count, "正在翻译..."
+                )
 
         except Exception as e:
             logging.error(f"处理转录完成时错: {e}")
+            self.set_virtual_mode(False)
             self.subtitle_display.setHtml(
                 '<p style="color:red;">处理转录结果时出错，请重试。</p>'
             )
             self.translation_toggle.setEnabled(True)
 
-    def initialize_subtitle_positions(self):
-        """初始化字幕位置信息"""
-        try:
-            self.subtitle_positions = []
-            self.word_positions = []
-            self.word_start_times = []
-
-            cursor = self.subtitle_display.textCursor()
-            cursor.movePosition(QTextCursor.Start)
-
-            for idx, subtitle in enumerate(self.subtitles):
-                block_start = cursor.position()
-                self.subtitle_positions.append(block_start)
-
-
-                cursor.movePosition(QTextCursor.Right, QTextCursor.MoveAnchor, 3)
-
-
-                for word in subtitle['words']:
-                    word_start = cursor.position()
-                    cursor.movePosition(QTextCursor.Right, QTextCursor.MoveAnchor,
-                                     len(word['text']))
-                    self.word_positions.append({
-                        'start_pos': word_start,
-                        'end_pos': cursor.position(),
-                        'start_time': word['start'],
-                        'end_time': word['end'],
-                        'subtitle_index': idx
-                    })
-                    self.word_start_times.append(word['start'])
-
-
-                    cursor.movePosition(QTextCursor.Right)
-
-
-                cursor.movePosition(QTextCursor.NextBlock)
-                if self.show_translation and idx < len(self.subtitles) - 1:
-                    cursor.movePosition(QTextCursor.NextBlock)         
-
-
-            self.last_subtitle_index = -1
-            self.last_word_index = -1
-
-            logging.debug(f"字幕位置初始化完成 - 字幕数: {len(self.subtitle_positions)}, 单词数: {len(self.word_positions)}")
-
-        except Exception as e:
-            logging.error(f"初始化字幕位置信息时出错: {e}")
-
-    def start_translation(self):
-        """开始译处理"""
-        try:
-
-            texts_to_translate = []
-            for idx, subtitle in enumerate(self.subtitles):
-                text = subtitle.get('text', '').strip()
-                if text:           
-                    texts_to_translate.append((idx, text))
-
-            if not texts_to_translate:
-                logging.warning("没有找到可翻译的字幕")
-                QMessageBox.warning(self, "警告", "没有找到可翻译的字幕文本")
-                return
-
-
-            self.total_translation_count = len(texts_to_translate)
-            self.current_translation_count = 0
-            self.translation_progress.clear()
-
-
-            if self.silicon_cloud_radio.isChecked():
-                translator_type = 'silicon_cloud'
-                api_key = self.silicon_cloud_api_key
-                if not api_key:
-                    QMessageBox.warning(self, "警告", "请先设置SiliconCloud API Key")
-                    return
-            elif self.gemini_radio.isChecked():
-                translator_type = 'gemini'
-                api_key = self.gemini_api_key
-                if not api_key:
-                    QMessageBox.warning(self, "警告", "请先设置Gemini API Key")
-                    return
-            else:
-                translator_type = 'google'
-                api_key = None
-
-            logging.info(f"开始批量翻译任务 - 使用{translator_type}翻译器，共{self.total_translation_count}条")
-
-
-            self.progress_bar.setVisible(True)
-            self.progress_bar.set_progress(0, self.total_translation_count, "准备翻译...")
-
+    def current_translator(self):
+        """当前选择的 (翻译器类型, API Key)，缺少 API Key 时提示并返回None"""
+        if self.silicon_cloud_radio.isChecked():
+            if not self.silicon_cloud_api_key:
+                QMessageBox.warning(self, "警告", "请先设置SiliconCloud API Key")
+                return None
+            return 'silicon_cloud', self.silicon_cloud_api_key
+        if self.gemini_radio.isChecked():
+            if not self.gemini_api_key:
+                QMessageBox.warning(self, "警告", "请先设置Gemini API Key")
+                return None
+            return 'gemini', self.gemini_api_key
+        return 'google', None
+
+    def translate_subtitles(self, indices):
+        """登记由翻译流水线处理的字幕（转录线程直接送入流水线），翻译总数随之累加"""
+        if self.translation_pipeline is None:
+            return
+        added = sum(1 for idx in indices if self.transcript[idx].text.strip())
+        self.total_translation_count += added
+        if added:
+            logging.info(
+                f"新增翻译任务 - 使用{self.translation_pipeline.translator_type}翻译器，{added}条，"
+                f"共{self.total_translation_count}条"
+            )
 
-            self.translation_threads = []
-            for idx, text in texts_to_translate:
-                thread = TranslationThread(
-                    text=text,
-                    index=idx,
-                    translator_type=translator_type,
-                    api_key=api_key
-                )
-                thread.translation_done.connect(self.on_translation_done)
-                thread.error_occurred.connect(self.on_translation_error)
-                self.translation_threads.append(thread)
-                thread.start()
-                logging.info(f"启动翻译线程 [ID:{idx}] - 文本: {text[:50]}...")
-
-        except Exception as e:
-            logging.error(f"启动翻译任务失败: {e}")
-            QMessageBox.critical(self, "错误", f"启动翻译任务失败: {e}")
+    def finish_translation(self):
+        """全部翻译完成后保存缓存并刷新显示"""
+        logging.info("所有翻译任务完成")
+        self.progress_bar.setVisible(False)
+        self.save_translation_cache()             
+        self.save_subtitle_cache()                     
+        self.flush_translation_updates()
+        if not self.virtual_mode:
+            self.save_render_snapshot(self.get_render_key())
 
     def on_translation_done(self, index, translation, translator_type):
         """处理单个翻译完成"""
@@ -785,6 +1508,8 @@ class PodcastPlayer(QWidget):
                 'text': translation,
                 'translator': translator_type
             }
+            self.unrendered_translations += 1
+            self.update_translation(index, translation)
 
 
             logging.debug(f"翻译结果 [ID:{index}]: {translation[:50]}...")
@@ -803,202 +1528,47 @@ class PodcastPlayer(QWidget):
             logging.info(f"翻译进度: {self.current_translation_count}/{self.total_translation_count}")
 
 
-            if self.current_translation_count >= self.total_translation_count:
-                logging.info("所有翻译任务完成")
-                self.progress_bar.setVisible(False)
-                self.save_translation_cache()             
-                self.save_subtitle_cache()                     
-                self.display_subtitles()               
+            if self.current_translation_count >= self.total_translation_count and not self.transcribing:
+                self.finish_translation()
 
         except Exception as e:
             logging.error(f"处理翻译结果时出错 [ID:{index}]: {str(e)}")
 
-    def initialize_update_thread(self):
-        """初始化更新线程"""
-        if self.update_thread is None:
-            self.update_thread = SubtitleUpdateThread(self)
-            self.update_thread.update_signal.connect(self.update_subtitle_efficient)
-            self.update_thread.start()
+    def highlight_boundaries(self):
+        """字幕与单词的开始时间，供时间轴安排下一次唤醒"""
+        return self.transcript.start_times, self.transcript.word_starts
 
     def on_transcription_error(self, error_message):
+        """转录失败时停止流水线并丢弃已到达的部分字幕，再显示错误信息"""
+        self.stop_transcription()
+        self.display_runner.stop()
+        self.translation_update_timer.stop()
+        self.transcript = Transcript()
+        self.positions = SubtitlePositions()
+        self.translation_updates = {}
+        self.progress_bar.setVisible(False)
+        self.set_virtual_mode(False)
         self.subtitle_display.clear()
         self.subtitle_display.setHtml(f'<p style="font-size:16px; color:red;">获取转录结果时出错：{error_message}</p>')
         QMessageBox.critical(self, "错误", f"获取转录结果时出错{error_message}")
         self.play_button.setEnabled(False)
 
-    def parse_transcript(self, transcript):
-        """解析转录结果"""
-        try:
-            self.subtitles = []
-            self.subtitle_times = []
-            self.word_positions = []
-            self.current_subtitle_index = -1
-            self.word_start_times = []
-            self.current_display_index = 0          
-
-            for utterance in transcript.utterances:
-                words = []
-                for word in utterance.words:
-                    words.append({
-                        'text': word.text,
-                        'start': word.start,
-                        'end': word.end
-                    })
-
-
-                self.subtitles.append({
-                    'speaker': utterance.speaker,
-                    'start_time': utterance.start,
-                    'end_time': utterance.end,
-                    'text': utterance.text,
-                    'words': words
-                })
-                self.subtitle_times.append(utterance.start)
-
-                for word in words:
-                    self.word_start_times.append(word['start'])
-
-
-            self.start_progressive_display()
-
-
-            if self.subtitles:
-                self.start_translation()
-            else:
-                logging.warning("转录结果为空，无法开始翻译")
-
-        except Exception as e:
-            logging.error(f"解析转录结果时出错: {e}")
-            raise
-
-    def start_progressive_display(self):
-        """开始逐条显示字幕"""
-        self.subtitle_display.clear()
-        self.current_display_index = 0
-        self.subtitle_positions = []
-        self.word_positions = []
-        self.subtitle_blocks = []
-        self.progress_bar.show()
-        self.progress_bar.set_progress(0, len(self.subtitles), "正显示字幕...")
-        self.display_timer.start(self.display_interval)
-
-    def display_next_subtitle(self):
-        """显示下一条字幕，确保按顺序显示并保持对应关系"""
-        try:
-            if self.current_display_index >= len(self.subtitles):
-                self.display_timer.stop()
-                return
-
-            cursor = self.subtitle_display.textCursor()
-            current_scroll = self.subtitle_display.verticalScrollBar().value()
-
-
-            cursor.movePosition(QTextCursor.End)
-            block_start = cursor.position()
-
-
-            subtitle = self.subtitles[self.current_display_index]
-            str_index = str(self.current_display_index)
-
-
-            subtitle_block = {
-                'index': self.current_display_index,
-                'start': block_start,
-                'content_start': 0,
-                'translation_start': 0,
-                'translation_end': 0,
-                'end': 0,
-                'speaker': subtitle['speaker']
-            }
-
-
-            color = '#2196F3' if subtitle['speaker'] == 'A' else '#4CAF50'
-            speaker_fmt = QTextCharFormat()
-            speaker_fmt.setForeground(QColor(color))
-
-
-            cursor.insertText(f"{subtitle['speaker']}: ", speaker_fmt)
-
-
-            subtitle_block['content_start'] = cursor.position()
-            content_fmt = QTextCharFormat()
-            content_fmt.setForeground(QColor(color))
-
-
-            word_positions = []
-            for word in subtitle['words']:
-                word_start_pos = cursor.position()
-                cursor.insertText(word['text'] + ' ', content_fmt)
-                word_end_pos = cursor.position()
-                word_positions.append({
-                    'start_pos': word_start_pos,
-                    'end_pos': word_end_pos,
-                    'start_time': word['start'],
-                    'end_time': word['end']
-                })
-
-            cursor.insertBlock()
-
-
-            subtitle_block['translation_start'] = cursor.position()
-            translation_text = ""
-            if str_index in self.translations:
-                translation_text = self.translations[str_index]['text']
-
-            trans_fmt = QTextCharFormat()
-            trans_fmt.setForeground(QColor('#000000'))
-            cursor.insertText(translation_text, trans_fmt)
-            subtitle_block['translation_end'] = cursor.position()
-
-
-            if self.current_display_index < len(self.subtitles) - 1:
-                cursor.insertBlock()
-
-
-            subtitle_block['end'] = cursor.position()
-
-
-            self.subtitle_blocks.append(subtitle_block)
-
-
-            self.word_positions.extend(word_positions)
-
-
-            total_subtitles = len(self.subtitles)
-            progress = ((self.current_display_index + 1) / total_subtitles) * 100
-            self.progress_bar.set_progress(
-                self.current_display_index + 1,
-                total_subtitles,
-                f"正在显示字幕... ({self.current_display_index + 1}/{total_subtitles}, {progress:.1f}%)"
-            )
-
-
-            self.current_display_index += 1
-
-
-            self.subtitle_display.verticalScrollBar().setValue(current_scroll)
-
-        except Exception as e:
-            print(f"显示下一条字幕时出错: {e}")
-
     def save_subtitle_cache(self):
         """保存字幕和翻译缓存，确保按顺序保存"""
         try:
 
             sorted_translations = {}
-            for idx in range(len(self.subtitles)):
+            for idx in range(len(self.transcript)):
                 str_idx = str(idx)
                 if str_idx in self.translations:
                     sorted_translations[str_idx] = self.translations[str_idx]
 
-            cache_data = {
-                'subtitles': self.subtitles,
-                'translations': sorted_translations,
-                'file_path': self.audio_file
-            }
+            cache_data = build_subtitle_cache(
+                sorted_translations, self.audio_file, self.transcript.to_dicts(), self.segmentation
+            )
 
             subtitle_file = self.subtitle_cache_dir / f"{self.current_file_hash}.json"
-            with open(subtitle_file, 'w', encoding='utf-8') as f:
+            with open_cache_file(subtitle_file, 'w') as f:
                 json.dump(cache_data, f, ensure_ascii=False, indent=2)
 
         except Exception as e:
@@ -1007,13 +1577,15 @@ class PodcastPlayer(QWidget):
     def display_subtitles(self):
         """显示双语字幕"""
         try:
+            self.display_runner.stop()
+            self.visibility_runner.stop()
             self.subtitle_display.clear()
-            self.subtitle_blocks = []
-            self.word_positions = []            
+            self.positions = SubtitlePositions()
             cursor = self.subtitle_display.textCursor()
 
 
-            if not self.subtitles:
+            if not self.transcript:
+                self.set_virtual_mode(False)
                 self.translation_toggle.setEnabled(False)
                 self.subtitle_display.setHtml('<p style="font-size:16px; color:gray;">暂无字幕信息</p>')
                 return
@@ -1021,102 +1593,312 @@ class PodcastPlayer(QWidget):
 
             self.translation_toggle.setEnabled(True)
 
-            for idx, subtitle in enumerate(self.subtitles):
-
-                block_start = cursor.position()
 
+            if len(self.transcript) > self.virtual_view_threshold:
+                self.show_virtual_subtitles()
+                return
+            self.set_virtual_mode(False)
 
-                subtitle_block = {
-                    'index': idx,
-                    'start': block_start,
-                    'content_start': 0,
-                    'translation_start': 0,
-                    'translation_end': 0,
-                    'end': 0,
-                    'speaker': subtitle['speaker']
-                }
 
+            render_key = self.get_render_key()
+            if self.restore_render_snapshot(render_key):
+                return
 
-                color = '#2196F3' if subtitle['speaker'] == 'A' else '#4CAF50'
-                speaker_fmt = QTextCharFormat()
-                speaker_fmt.setForeground(QColor(color))
-                cursor.insertText(f"{subtitle['speaker']}: ", speaker_fmt)
+            cursor.beginEditBlock()
+            for idx, utterance in enumerate(self.transcript):
+                self.positions.add_subtitle(utterance.word_count)
+                layout, word_ranges = self.insert_subtitle_block(cursor, idx)
+                self.positions.set_subtitle(idx, layout, word_ranges)
+            cursor.endEditBlock()
 
 
-                subtitle_block['content_start'] = cursor.position()
+            cursor.movePosition(QTextCursor.Start)
+            self.subtitle_display.setTextCursor(cursor)
 
 
-                content_fmt = QTextCharFormat()
-                content_fmt.setForeground(QColor(color))
+            self.subtitle_display.verticalScrollBar().setValue(0)
 
 
-                for i, word in enumerate(subtitle['words']):
+            self.save_render_snapshot(render_key)
 
-                    if i > 0:
-                        cursor.insertText(' ', content_fmt)
+            logging.debug(f"字幕显示完成 - 字幕数: {len(self.positions)}, 单词数: {self.positions.word_count}")
 
+        except Exception as e:
+            logging.error(f"显示字幕时出错: {e}")
 
-                    word_start_pos = cursor.position()
-                    cursor.insertText(word['text'], content_fmt)
-                    word_end_pos = cursor.position()
+    def insert_subtitle_block(self, cursor, idx):
+        """在光标处插入第 idx 条双语字幕
 
+        整句字幕只调用一次 insertText，单词位置按文本偏移直接算出，
+        字符格式取自共享的格式表。翻译总是写入文档，隐藏翻译时只把
+        翻译所在的文本块设为不可见，位置索引与显示状态无关。
 
-                    self.word_positions.append({
-                        'start_pos': word_start_pos,
-                        'end_pos': word_end_pos,
-                        'start_time': word['start'],
-                        'end_time': word['end'],
-                        'subtitle_index': idx,
-                        'text': word['text']
-                    })
+        Returns:
+            (layout, word_ranges)：相对插入起点的字幕块布局和单词区间，
+            格式与 SubtitlePositions.set_subtitle 的参数一致
+        """
+        utterance = self.transcript[idx]
+        words = self.transcript.words(idx)
+        span_start = cursor.position()
 
 
-                cursor.insertBlock()
+        if idx > 0:
+            cursor.insertBlock()
 
+        block_start = cursor.position() - span_start
+        prefix = f"{utterance.speaker}: "
+        content_start = block_start + utf16_len(prefix)
+
+
+        word_ranges = []
+        word_start_pos = content_start
+        for word in words:
+            word_end_pos = word_start_pos + utf16_len(word)
+            word_ranges.append((word_start_pos, word_end_pos))
+            word_start_pos = word_end_pos + 1
+
+
+        color = '#2196F3' if utterance.speaker == 'A' else '#4CAF50'
+        cursor.insertText(prefix + ' '.join(words), self.text_format(color))
+        cursor.insertBlock()
+
+
+        translation_start = cursor.position() - span_start
+        translation_text = self.get_translation_text(idx)
+        if translation_text:
+            self.insert_translation(cursor, translation_text)
+
+
+        end = cursor.position() - span_start
+        return (block_start, content_start, translation_start, end, end), word_ranges
+
+    def insert_translation(self, cursor, translation_text):
+        """在光标处插入一个翻译文本块，可见性跟随当前的翻译显示状态"""
+        cursor.insertText(translation_text, self.text_format('#000000'))
+        cursor.block().setVisible(self.show_translation)
+        cursor.insertBlock()
+        cursor.block().setVisible(True)
+
+    def set_translation_visible(self, visible):
+        """显示或隐藏文档中的翻译文本块，保持视口顶部的字幕不动
+
+        只同步处理视口附近的字幕（每条字幕至少占一行，按视口行数即可覆盖整个
+        视口），其余字幕交给 visibility_runner 按帧预算分批处理：先处理视口以下
+        的字幕，不影响视口位置；再由近及远处理视口以上的字幕并逐批补偿滚动位置。
+        每批只把改动过的文本范围标记为需要重新布局。
+        """
+        self.visibility_runner.stop()
+        display = self.subtitle_display
+        first = max(0, self.positions.subtitle_at(display.cursorForPosition(QPoint(0, 0)).position()))
+        rows = display.viewport().height() // max(1, display.fontMetrics().lineSpacing()) + 1
+        start = max(0, first - self.focus_window_before)
+        stop = min(len(self.positions), first + rows + self.focus_window_after)
+
+        anchor = self.capture_scroll_anchor()
+        self.set_translation_range_visible(start, stop, visible)
+        self.restore_scroll_anchor(anchor)
+        self.visibility_runner.start(self.translation_visibility_task(visible, start, stop))
+
+    def translation_visibility_task(self, visible, start, stop, batch=200):
+        """切换视口附近以外字幕翻译可见性的生成器任务，由 visibility_runner 按帧预算推进"""
+        for batch_start in range(stop, len(self.positions), batch):
+            self.set_translation_range_visible(batch_start, batch_start + batch, visible)
+            yield
+        for batch_end in range(start, 0, -batch):
+            anchor = self.capture_scroll_anchor()
+            self.set_translation_range_visible(max(0, batch_end - batch), batch_end, visible)
+            self.restore_scroll_anchor(anchor)
+            yield
+
+    def set_translation_range_visible(self, start, stop, visible):
+        """设置第 start 到 stop 条字幕翻译文本块的可见性，只重新布局改动的范围"""
+        document = self.subtitle_display.document()
+        dirty_start = dirty_end = None
+        for idx in range(start, min(stop, len(self.positions))):
+            block_range = self.positions.block(idx)
+            if block_range is None or block_range['translation_end'] == block_range['translation_start']:
+                continue
+            block = document.findBlock(block_range['translation_start'])
+            if block.isVisible() == visible:
+                continue
+            block.setVisible(visible)
+            if dirty_start is None:
+                dirty_start = block.position()
+            dirty_end = block.position() + block.length()
+        if dirty_start is not None:
+            document.markContentsDirty(dirty_start, dirty_end - dirty_start)
+
+    def capture_scroll_anchor(self):
+        """记录视口顶部字幕的正文块及其纵坐标"""
+        document = self.subtitle_display.document()
+        anchor_idx = self.positions.subtitle_at(self.subtitle_display.cursorForPosition(QPoint(0, 0)).position())
+        anchor_block = self.positions.block(anchor_idx)
+        if anchor_block is None:
+            return None
+        block = document.findBlock(anchor_block['content_start'])
+        return block, document.documentLayout().blockBoundingRect(block).top()
+
+    def restore_scroll_anchor(self, anchor):
+        """文档布局变化后按锚点补偿滚动位置，使锚点字幕停留在原处"""
+        if anchor is None:
+            return
+        self.subtitle_display.scroller.stop()
+        block, top = anchor
+        moved = self.subtitle_display.document().documentLayout().blockBoundingRect(block).top() - top
+        if moved:
+            scrollbar = self.subtitle_display.verticalScrollBar()
+            scrollbar.setValue(scrollbar.value() + int(moved))
+
+    def render_subtitle(self, idx):
+        """将第 idx 条字幕插入到文档中它应在的位置，并记录到位置索引"""
+        cursor = QTextCursor(self.subtitle_display.document())
+        cursor.setPosition(self.positions.spans.prefix_sum(idx))
+        layout, word_ranges = self.insert_subtitle_block(cursor, idx)
+        self.positions.set_subtitle(idx, layout, word_ranges)
+
+    def text_format(self, color):
+        """按前景色共享的字符格式"""
+        fmt = self.text_formats.get(color)
+        if fmt is None:
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(color))
+            self.text_formats[color] = fmt
+        return fmt
+
+    def get_translation_text(self, idx):
+        """第 idx 条字幕的翻译文本，没有翻译时返回空字符串"""
+        translation = self.translations.get(str(idx))
+        return translation['text'] if translation else ""
+
+    def set_virtual_mode(self, enabled):
+        """在完整文档视图和虚拟化字幕视图之间切换"""
+        if enabled == self.virtual_mode:
+            return
+        self.virtual_mode = enabled
+        self.subtitle_display.setVisible(not enabled)
+        self.virtual_subtitle_view.setVisible(enabled)
+        if enabled:
+            self.subtitle_display.clear()
+        else:
+            self.virtual_subtitle_view.set_subtitles(Transcript(), self.get_translation_text)
+
+    def show_virtual_subtitles(self):
+        """使用虚拟化视图显示字幕，只为视口附近的字幕创建文本布局"""
+        self.set_virtual_mode(True)
+        self.display_runner.stop()
+        self.visibility_runner.stop()
+        self.positions = SubtitlePositions()
+        for utterance in self.transcript:
+            self.positions.add_subtitle(utterance.word_count)
+        self.virtual_subtitle_view.set_subtitles(self.transcript, self.get_translation_text, self.show_translation)
+        self.translation_toggle.setEnabled(True)
+        logging.debug(f"虚拟化字幕视图 - 字幕数: {len(self.transcript)}, 单词数: {self.transcript.word_count}")
+
+    def render_snapshot_file(self):
+        """当前音频的渲染快照文件路径"""
+        return self.subtitle_cache_dir / f"{self.current_file_hash}.render.json"
+
+    def get_render_key(self):
+        """计算当前字幕与翻译对应的快照哈希（翻译显示状态不影响文档内容）"""
+        translations = dict(self.pending_translations)
+        for str_idx, translation in self.translations.items():
+            translations[str_idx] = translation['text']
+        return compute_render_key(self.transcript.to_dicts(), translations)
+
+    def save_render_snapshot(self, render_key):
+        """将渲染完成的字幕文档与位置表保存为快照"""
+        try:
+            if not self.current_file_hash:
+                return
 
-                subtitle_block['translation_start'] = cursor.position()
+            flat = self.positions.to_flat()
+            if flat is None:
+                return
 
+            document = self.subtitle_display.document()
+            palette = []
+            runs = []
+            block = document.begin()
+            while block.isValid():
+                it = block.begin()
+                while not it.atEnd():
+                    fragment = it.fragment()
+                    it += 1
+                    brush = fragment.charFormat().foreground()
+                    if brush.style() == Qt.NoBrush:
+                        continue
+                    color = brush.color().name()
+                    if color not in palette:
+                        palette.append(color)
+                    start = fragment.position()
+                    end = start + fragment.length()
+                    color_idx = palette.index(color)
+                    if runs and runs[-2] == start and runs[-1] == color_idx:
+                        runs[-2] = end
+                    else:
+                        runs.extend((start, end, color_idx))
+                block = block.next()
 
-                if self.show_translation:
-                    trans_fmt = QTextCharFormat()
-                    trans_fmt.setForeground(QColor('#000000'))
+            blocks, words = flat
+            save_render_snapshot(
+                self.render_snapshot_file(), render_key, document.toPlainText(),
+                palette, runs, blocks, words
+            )
+        except Exception as e:
+            logging.error(f"保存渲染快照时出错: {e}")
 
-                    translation_text = ""
-                    if str(idx) in self.translations:
-                        translation_text = self.translations[str(idx)]['text']
-                    elif str(idx) in self.pending_translations:
-                        translation_text = self.pending_translations[str(idx)]
+    def restore_render_snapshot(self, render_key):
+        """从渲染快照一次性恢复字幕文档与位置表，快照失效时返回False"""
+        try:
+            if not self.current_file_hash:
+                return False
 
-                    if translation_text:
-                        cursor.insertText(translation_text, trans_fmt)
-                        cursor.insertBlock()            
+            snapshot = load_render_snapshot(self.render_snapshot_file(), render_key)
+            if snapshot is None:
+                return False
 
+            blocks = snapshot['blocks']
+            words = snapshot['words']
+            if len(blocks) != 5 * len(self.transcript) or len(words) != 2 * self.transcript.word_count:
+                logging.warning("渲染快照与字幕不一致，重新渲染")
+                return False
 
-                subtitle_block['translation_end'] = cursor.position()
-                subtitle_block['end'] = cursor.position()
 
+            self.subtitle_display.setPlainText(snapshot['text'])
+            document = self.subtitle_display.document()
+            formats = []
+            for color in snapshot['palette']:
+                fmt = QTextCharFormat()
+                fmt.setForeground(QColor(color))
+                formats.append(fmt)
 
-                self.subtitle_blocks.append(subtitle_block)
-                self.subtitle_positions.append(block_start)
+            cursor = QTextCursor(document)
+            cursor.beginEditBlock()
+            runs = snapshot['runs']
+            for i in range(0, len(runs), 3):
+                cursor.setPosition(runs[i])
+                cursor.setPosition(runs[i + 1], QTextCursor.KeepAnchor)
+                cursor.setCharFormat(formats[runs[i + 2]])
+            cursor.endEditBlock()
 
 
-                if idx < len(self.subtitles) - 1:
-                    cursor.insertBlock()
+            self.positions = SubtitlePositions.from_flat(
+                blocks, words, [utterance.word_count for utterance in self.transcript]
+            )
 
 
             cursor.movePosition(QTextCursor.Start)
             self.subtitle_display.setTextCursor(cursor)
-
-
             self.subtitle_display.verticalScrollBar().setValue(0)
+            if not self.show_translation:
+                self.set_translation_visible(False)
 
-
-            self.word_start_times = [word['start_time'] for word in self.word_positions]
-
-            logging.debug(f"字幕显示完成 - 字幕数: {len(self.subtitle_blocks)}, 单词数: {len(self.word_positions)}")
+            logging.debug(f"已从渲染快照恢复字幕 - 字幕数: {len(self.positions)}, 单词数: {self.positions.word_count}")
+            return True
 
         except Exception as e:
-            logging.error(f"显示字幕时出错: {e}")
+            logging.error(f"恢复渲染快照时出错: {e}")
+            return False
 
     def update_translator_button_state(self, translator_type):
         """更新翻译器按钮状态"""
@@ -1181,67 +1963,48 @@ class PodcastPlayer(QWidget):
             logging.error(f"设置API Key时出错: {e}")
 
     def update_translation(self, index, translation):
-        """新单个翻结果"""
+        """登记单条翻译，短时间内到达的翻译合并后一次性插入文档"""
+        self.pending_translations[str(index)] = translation
+        self.translation_updates[index] = translation
+        if not self.translation_update_timer.isActive():
+            self.translation_update_timer.start()
+
+    def flush_translation_updates(self):
+        """将登记的翻译实时插入文档，每条只更新该字幕在位置索引中的长度"""
         try:
-
-            block = next((b for b in self.subtitle_blocks if b['index'] == index), None)
-            if not block:
-                self.pending_translations[str(index)] = translation
+            updates = self.translation_updates
+            self.translation_updates = {}
+            if self.translation_pipeline is not None and self.unrendered_translations:
+                self.translation_pipeline.rendered(self.unrendered_translations)
+            self.unrendered_translations = 0
+            if self.virtual_mode:
+                for index in updates:
+                    self.virtual_subtitle_view.update_subtitle(index)
+                return
+            if not len(self.positions):
                 return
 
 
-            current_scroll = self.subtitle_display.verticalScrollBar().value()
-
-            cursor = self.subtitle_display.textCursor()
-
-
-            if block['translation_start'] >= 0 and block['translation_end'] >= block['translation_start']:
-
-                old_length = block['translation_end'] - block['translation_start']
-
-
+            anchor = self.capture_scroll_anchor()
+            cursor = QTextCursor(self.subtitle_display.document())
+            cursor.beginEditBlock()
+            for index, translation in updates.items():
+                block = self.positions.block(index)
+                if block is None:
+                    continue
                 cursor.setPosition(block['translation_start'])
-                cursor.setPosition(block['translation_end'], QTextCursor.KeepAnchor)
-
-
-                fmt = QTextCharFormat()
-                fmt.setForeground(QColor('#000000'))
-                cursor.mergeCharFormat(fmt)
-                cursor.insertText(translation)
-
-
-                new_length = len(translation)
-                length_diff = new_length - old_length
-
-
-                block['translation_end'] = block['translation_start'] + new_length
-                block['end'] = block['translation_end']
-
-
-                for later_block in self.subtitle_blocks:
-                    if later_block['index'] > index:
-                        later_block['start'] += length_diff
-                        later_block['content_start'] += length_diff
-                        later_block['translation_start'] += length_diff
-                        later_block['translation_end'] += length_diff
-                        later_block['end'] += length_diff
-
-
-                for i in range(index + 1, len(self.subtitle_positions)):
-                    self.subtitle_positions[i] += length_diff
-
-
-                for word_pos in self.word_positions:
-                    if word_pos['start_pos'] > block['translation_start']:
-                        word_pos['start_pos'] += length_diff
-                        word_pos['end_pos'] += length_diff
-
-
-            self.subtitle_display.verticalScrollBar().setValue(current_scroll)
+                if block['translation_end'] > block['translation_start']:
+                    cursor.setPosition(block['translation_end'], QTextCursor.KeepAnchor)
+                    cursor.removeSelectedText()
+                    cursor.block().setVisible(True)
+                if translation:
+                    self.insert_translation(cursor, translation)
+                self.positions.resize_translation(index, cursor.position() - block['translation_start'])
+            cursor.endEditBlock()
+            self.restore_scroll_anchor(anchor)
 
         except Exception as e:
-            print(f"更新翻译时出错: {e}")
-            self.pending_translations[str(index)] = translation
+            logging.error(f"更新翻译时出错: {e}")
 
     def play_pause(self):
         """处理播放/暂停按钮点击事件"""
@@ -1250,25 +2013,11 @@ class PodcastPlayer(QWidget):
                 if self.media_player.state() == QMediaPlayer.PlayingState:
                     self.media_player.pause()
                     self.play_button.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
-                    if self.update_thread:
-                        self.update_thread.pause()
+                    self.session.flush(force=True)
                 else:
                     self.media_player.play()
                     self.play_button.setIcon(self.style().standardIcon(QStyle.SP_MediaPause))
-
-
-                    if self.update_thread is None:
-                        self.initialize_update_thread()
-                    else:
-                        self.update_thread.resume()
-                        if not self.update_thread.isRunning():
-                            self.update_thread.start()
-
-
-                    current_position = self.media_player.position()
-                    self.update_subtitle_efficient(current_position)
-                    if self.update_thread:
-                        self.update_thread.force_update()
+                    self.subtitle_timeline.force_update()
         except Exception as e:
             print(f"播放控制出错: {e}")
 
@@ -1277,12 +2026,8 @@ class PodcastPlayer(QWidget):
         try:
             self.position_slider.setValue(position)
             self.update_time_label(position)
-
-
-            if (self.media_player.state() == QMediaPlayer.PlayingState and
-                self.update_thread and not self.update_thread.isRunning()):
-                self.update_thread.resume()
-                self.update_thread.start()
+            if self.current_file_hash and not self.resume_position:
+                self.session.update(self.current_file_hash, position)
 
         except Exception as e:
             print(f"处理位置变化时出错: {e}")
@@ -1303,45 +2048,25 @@ class PodcastPlayer(QWidget):
             self.last_word_index = -1
 
 
-            self.update_subtitle_efficient(position)
+            self.subtitle_timeline.force_update(position)
 
 
             self.scroll_to_current_subtitle(position)
 
-
-            if self.update_thread:
-                self.update_thread.force_update()
-
         except Exception as e:
             print(f"设置位置时出错: {e}")
 
     def scroll_to_current_subtitle(self, position):
-        """改进的滚动到当前字幕位置方法"""
+        """当前字幕不在视口舒适区内时平滑滚动到居中"""
         try:
 
-            subtitle_idx = bisect.bisect_right(self.subtitle_times, position) - 1
-            if 0 <= subtitle_idx < len(self.subtitle_blocks):
-                block = self.subtitle_blocks[subtitle_idx]
-
-
-                cursor = self.subtitle_display.textCursor()
-                cursor.setPosition(block['start'])
-
-
-                block_rect = self.subtitle_display.document().documentLayout().blockBoundingRect(cursor.block())
-
-
-                block_center = block_rect.center().y()
-
-
-                viewport_height = self.subtitle_display.viewport().height()
-                viewport_center = viewport_height / 2
-
-
-                target_scroll = block_center - viewport_center
-
-
-                self.subtitle_display.smooth_scroll_to_position(int(target_scroll))
+            subtitle_idx = self.transcript.subtitle_at(position)
+            if self.virtual_mode:
+                self.virtual_subtitle_view.scroll_to_subtitle(subtitle_idx)
+                return
+            block = self.positions.block(subtitle_idx)
+            if block is not None:
+                self.subtitle_display.ensure_position_visible(block['start'])
 
         except Exception as e:
             print(f"滚动到当前字幕位置时出错: {e}")
@@ -1355,31 +2080,26 @@ class PodcastPlayer(QWidget):
         """改进的字幕更新方法"""
         try:
 
-            if not self.subtitle_positions or not self.word_positions:
-                return
-
-
-            is_seeking = abs(current_time - self.last_update_time) > 1000
-            if not is_seeking and current_time - self.last_update_time < self.update_interval:
+            subtitle_count = len(self.positions)
+            word_count = self.positions.word_count
+            if not subtitle_count or not word_count:
                 return
 
-            self.last_update_time = current_time
-
 
-            subtitle_idx = bisect.bisect_right(self.subtitle_times, current_time) - 1
+            subtitle_idx = self.transcript.subtitle_at(current_time)
 
 
-            if subtitle_idx >= len(self.subtitle_blocks):
-                subtitle_idx = len(self.subtitle_blocks) - 1
+            if subtitle_idx >= subtitle_count:
+                subtitle_idx = subtitle_count - 1
 
 
             if subtitle_idx != self.last_subtitle_index:
 
-                if 0 <= self.last_subtitle_index < len(self.subtitle_blocks):
+                if 0 <= self.last_subtitle_index < subtitle_count:
                     self.highlight_subtitle(self.last_subtitle_index, False)
 
 
-                if 0 <= subtitle_idx < len(self.subtitle_blocks):
+                if 0 <= subtitle_idx < subtitle_count:
                     self.highlight_subtitle(subtitle_idx, True)
 
                     self.scroll_to_current_subtitle(current_time)
@@ -1387,20 +2107,20 @@ class PodcastPlayer(QWidget):
                 self.last_subtitle_index = subtitle_idx
 
 
-            word_idx = bisect.bisect_right(self.word_start_times, current_time) - 1
+            word_idx = self.transcript.word_at(current_time)
 
 
-            if word_idx >= len(self.word_positions):
-                word_idx = len(self.word_positions) - 1
+            if word_idx >= word_count:
+                word_idx = word_count - 1
 
 
             if word_idx != self.last_word_index:
 
-                if 0 <= self.last_word_index < len(self.word_positions):
+                if 0 <= self.last_word_index < word_count:
                     self.highlight_word(self.last_word_index, False)
 
 
-                if 0 <= word_idx < len(self.word_positions):
+                if 0 <= word_idx < word_count:
                     self.highlight_word(word_idx, True)
 
                 self.last_word_index = word_idx
@@ -1411,117 +2131,107 @@ class PodcastPlayer(QWidget):
     def clear_all_highlights(self):
         """清除所有高亮"""
         try:
-
-            cursor = QTextCursor(self.subtitle_display.document())
-            cursor.select(QTextCursor.Document)
-            fmt = QTextCharFormat()
-            fmt.setBackground(Qt.transparent)
-            cursor.mergeCharFormat(fmt)
+            if self.virtual_mode:
+                self.virtual_subtitle_view.set_highlight(-1)
+                return
+            self.subtitle_display.clear_highlights()
+            self.hover_target = (-1, -1)
         except Exception as e:
             print(f"清除高亮时出错: {e}")
 
     def highlight_subtitle(self, idx, highlight):
-        """优化的字幕高亮方法"""
+        """高亮或取消高亮第 idx 条字幕（覆盖层，不修改文档格式）"""
         try:
-            if not (0 <= idx < len(self.subtitle_blocks)):
+            if self.virtual_mode:
+                view = self.virtual_subtitle_view
+                if highlight:
+                    view.set_highlight(idx)
+                elif view.highlight_index == idx:
+                    view.set_highlight(-1)
+                return
+            if not highlight:
+                self.subtitle_display.set_highlight(SUBTITLE_HIGHLIGHT_LAYER)
+                return
+            block = self.positions.block(idx)
+            if block is None:
                 return
-
-            block = self.subtitle_blocks[idx]
-            cursor = QTextCursor(self.subtitle_display.document())
-
-
-            start_pos = block['start']
-            end_pos = block['end']
 
 
             doc_length = self.subtitle_display.document().characterCount()
-            start_pos = max(0, min(start_pos, doc_length - 1))
-            end_pos = max(start_pos, min(end_pos, doc_length - 1))
-
-            cursor.setPosition(start_pos)
-            cursor.setPosition(end_pos, QTextCursor.KeepAnchor)
-
-            fmt = QTextCharFormat()
-            if highlight:
-                fmt.setBackground(QColor('#FFFF99'))
-            else:
-                fmt.setBackground(Qt.transparent)
-
-            cursor.mergeCharFormat(fmt)
-
-            if highlight:
-
-                cursor.setPosition(start_pos)
-                self.subtitle_display.setTextCursor(cursor)
-                self.subtitle_display.ensureCursorVisible()
+            start_pos = max(0, min(block['start'], doc_length - 1))
+            end_pos = max(start_pos, min(block['end'], doc_length - 1))
+            self.subtitle_display.set_highlight(SUBTITLE_HIGHLIGHT_LAYER, start_pos, end_pos, '#FFFF99')
 
         except Exception as e:
             print(f"高亮字幕时出错: {e}")
 
     def highlight_word(self, idx, highlight):
-        """优化的单词高亮方法"""
+        """高亮或取消高亮第 idx 个单词（覆盖层，不修改文档格式）"""
         try:
-            if 0 <= idx < len(self.word_positions):
-                word_info = self.word_positions[idx]
-                cursor = QTextCursor(self.subtitle_display.document())
-
-
-                doc_length = self.subtitle_display.document().characterCount()
-                start_pos = max(0, min(word_info['start_pos'], doc_length - 1))
-                end_pos = max(start_pos, min(word_info['end_pos'], doc_length - 1))
-
-
-                subtitle_idx = word_info['subtitle_index']
-
-
-                cursor.setPosition(start_pos)
-                cursor.setPosition(end_pos, QTextCursor.KeepAnchor)
-
-                fmt = QTextCharFormat()
-                if highlight:
-
-                    fmt.setBackground(QColor('#FFCC66'))
-                else:
-
-                    if self.last_subtitle_index == subtitle_idx:
-
-                        fmt.setBackground(QColor('#FFFF99'))
-                    else:
-
-                        fmt.setBackground(Qt.transparent)
-
-                cursor.mergeCharFormat(fmt)
+            if self.virtual_mode:
+                if 0 <= idx < self.transcript.word_count:
+                    subtitle_idx, local_idx = self.transcript.word_owner(idx)
+                    view = self.virtual_subtitle_view
+                    if highlight:
+                        view.set_highlight(subtitle_idx, local_idx)
+                    elif (view.highlight_index, view.highlight_word) == (subtitle_idx, local_idx):
+                        view.set_highlight(subtitle_idx)
+                return
+            if not highlight:
+                self.subtitle_display.set_highlight(WORD_HIGHLIGHT_LAYER)
+                return
+            word_range = self.positions.word_range(idx)
+            if word_range is None:
+                return
 
 
-                if highlight and logging.getLogger().isEnabledFor(logging.DEBUG):
-                    debug_info = {
-                        'index': idx,
-                        'text': word_info.get('text', '<no text>'),
-                        'position': f"{start_pos}-{end_pos}",
-                        'subtitle_index': subtitle_idx
-                    }
-                    logging.debug(
-                        f"高亮单词 - 索引: {debug_info['index']}, "
-                        f"文本: {debug_info['text']}, "
-                        f"位置: {debug_info['position']}, "
-                        f"字幕索引: {debug_info['subtitle_index']}"
-                    )
+            doc_length = self.subtitle_display.document().characterCount()
+            start_pos = max(0, min(word_range[0], doc_length - 1))
+            end_pos = max(start_pos, min(word_range[1], doc_length - 1))
+            self.subtitle_display.set_highlight(WORD_HIGHLIGHT_LAYER, start_pos, end_pos, '#FFCC66')
+
+
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                subtitle_idx, local_idx = self.transcript.word_owner(idx)
+                logging.debug(
+                    f"高亮单词 - 索引: {idx}, "
+                    f"文本: {self.transcript.word_texts[idx]}, "
+                    f"位置: {start_pos}-{end_pos}, "
+                    f"字幕索引: {subtitle_idx}"
+                )
 
         except Exception as e:
 
-            logging.error(f"单词高亮更新错误: {str(e)}, word_info: {word_info if 'word_info' in locals() else 'N/A'}")
+            logging.error(f"单词高亮更新错误: {str(e)}, 单词索引: {idx}")
 
     def closeEvent(self, event):
         """处理窗口关闭事件"""
         try:
 
+            self.stream_runner.stop()
+            self.display_runner.stop()
+            self.visibility_runner.stop()
+            self.remember_playback_position()
+            self.session.flush(force=True)
+
+
+            if self.prefetch_thread:
+                self.prefetch_thread.stop()
+                self.prefetch_thread.wait()
+
+
             if hasattr(self, 'media_player'):
                 self.media_player.stop()
 
 
-            if hasattr(self, 'update_thread') and self.update_thread:
-                self.update_thread.stop()
-                self.update_thread.wait()
+            if self.subtitle_timeline:
+                self.subtitle_timeline.stop()
+
+
+            self.stop_transcription()
+            self.stop_jobs()
+            for thread in self.fingerprint_threads:
+                thread.stop()
 
 
             if hasattr(self, 'translation_thread') and self.translation_thread:
@@ -1692,42 +2402,15 @@ class PodcastPlayer(QWidget):
         """切换中文字幕显示状态"""
         try:
             self.show_translation = self.translation_toggle.isChecked()
+            started = time.perf_counter()
 
 
-            current_position = self.media_player.position()
-            was_playing = self.media_player.state() == QMediaPlayer.PlayingState
-
-
-            if self.update_thread:
-                self.update_thread.pause()
-
-
-            self.clear_all_highlights()
-
-
-            self.last_subtitle_index = -1
-            self.last_word_index = -1
-
-
-            self.display_subtitles()
-
-
-            self.initialize_subtitle_positions()
-
-
-            self.update_subtitle_efficient(current_position)
-            if self.update_thread:
-                self.update_thread.force_update()
-
-
-            if self.update_thread:
-                if was_playing:
-                    self.update_thread.resume()
-                self.update_thread.force_update()
-
-
-            self.scroll_to_current_subtitle(current_position)
+            if self.virtual_mode:
+                self.virtual_subtitle_view.set_show_translation(self.show_translation)
+            else:
+                self.set_translation_visible(self.show_translation)
 
+            logging.debug(f"切换翻译显示耗时: {(time.perf_counter() - started) * 1000:.1f}ms")
             logging.info(f"切换翻译显示状态: {self.show_translation}")
 
         except Exception as e:
@@ -1765,45 +2448,69 @@ class PodcastPlayer(QWidget):
 
         if self.was_playing:
             self.media_player.play()
-            if self.update_thread:
-                self.update_thread.resume()
-                if not self.update_thread.isRunning():
-                    self.update_thread.start()
-                self.update_thread.force_update()
+            self.subtitle_timeline.force_update()
+
+    def subtitle_hit_test(self, pos):
+        """文档视图中视口坐标 pos 处的 (字幕下标, 全局单词下标)"""
+        click_pos = self.subtitle_display.cursorForPosition(pos).position()
+        return self.positions.hit_test(click_pos)
 
     def on_subtitle_clicked(self, event):
-        """处理字幕点击事件"""
+        """处理字幕点击事件，点中单词时跳转到该单词"""
         try:
+            subtitle_idx, word_idx = self.subtitle_hit_test(event.pos())
+            if subtitle_idx >= 0:
+                self.seek_to_subtitle(subtitle_idx, word_idx)
 
-            cursor = self.subtitle_display.cursorForPosition(event.pos())
-            click_pos = cursor.position()
-
+        except Exception as e:
+            print(f"处理字幕点击事件时出错: {e}")
 
-            clicked_block = None
-            for block in self.subtitle_blocks:
-                if block['start'] <= click_pos <= block['end']:
-                    clicked_block = block
-                    break
+    def on_subtitle_hovered(self, event):
+        """鼠标悬停的单词加下划线，提示点击可跳转"""
+        try:
+            target = self.subtitle_hit_test(event.pos())
+            if target == self.hover_target:
+                return
+            self.hover_target = target
+            word_range = self.positions.word_range(target[1]) if target[1] >= 0 else None
+            if word_range is None:
+                self.subtitle_display.set_highlight(HOVER_HIGHLIGHT_LAYER)
+                self.subtitle_display.viewport().setCursor(Qt.ArrowCursor)
+            else:
+                self.subtitle_display.set_highlight(HOVER_HIGHLIGHT_LAYER, *word_range, '#007AFF', underline=True)
+                self.subtitle_display.viewport().setCursor(Qt.PointingHandCursor)
+        except Exception as e:
+            logging.error(f"处理字幕悬停时出错: {e}")
 
-            if clicked_block:
+    def on_subtitle_hover_left(self, event):
+        self.hover_target = (-1, -1)
+        self.subtitle_display.set_highlight(HOVER_HIGHLIGHT_LAYER)
 
-                subtitle_idx = clicked_block['index']
-                if 0 <= subtitle_idx < len(self.subtitles):
+    def on_virtual_subtitle_clicked(self, subtitle_idx, word_idx):
+        """处理虚拟化视图中的字幕点击，word_idx 为字幕内单词下标"""
+        try:
+            if word_idx >= 0:
+                word_idx += self.transcript[subtitle_idx].word_start
+            self.seek_to_subtitle(subtitle_idx, word_idx)
+        except Exception as e:
+            print(f"处理字幕点击事件时出错: {e}")
 
-                    start_time = self.subtitles[subtitle_idx]['start_time']
-                    self.media_player.setPosition(int(start_time))
+    def seek_to_subtitle(self, subtitle_idx, word_idx=-1):
+        """跳转到第 subtitle_idx 条字幕（给出全局单词下标 word_idx 时为该单词）的开始位置并播放"""
+        if 0 <= subtitle_idx < len(self.transcript):
 
+            if word_idx >= 0:
+                start_time = self.transcript.word_starts[word_idx]
+            else:
+                start_time = self.transcript[subtitle_idx].start_time
+            self.media_player.setPosition(int(start_time))
 
-                    if self.media_player.state() != QMediaPlayer.PlayingState:
-                        self.play_pause()
 
+            if self.media_player.state() != QMediaPlayer.PlayingState:
+                self.play_pause()
 
-                    self.update_subtitle_efficient(start_time)
-                    if self.update_thread:
-                        self.update_thread.force_update()
 
-        except Exception as e:
-            print(f"处理字幕点击事件时出错: {e}")
+            self.subtitle_timeline.force_update(start_time)
 
     def save_translation_cache(self):
         """保存翻译缓存到本地"""
@@ -1815,14 +2522,12 @@ class PodcastPlayer(QWidget):
             cache_file = self.subtitle_cache_dir / f"{self.current_file_hash}.json"
 
 
-            cache_data = {
-                'subtitles': self.subtitles,
-                'translations': self.translations,
-                'file_path': os.path.relpath(self.audio_file)
-            }
+            cache_data = build_subtitle_cache(
+                self.translations, os.path.abspath(self.audio_file), self.transcript.to_dicts(), self.segmentation
+            )
 
 
-            with open(cache_file, 'w', encoding='utf-8') as f:
+            with open_cache_file(cache_file, 'w') as f:
                 json.dump(cache_data, f, ensure_ascii=False, indent=2)
 
             logging.info(f"翻译缓存已保存到: {cache_file}")
@@ -1838,6 +2543,21 @@ class PodcastPlayer(QWidget):
                 self.gemini_api_key = config.get('gemini_api_key', '') or ''
                 self.silicon_cloud_api_key = config.get('silicon_cloud_api_key', '') or ''
                 self.api_key = config.get('asr_api_key', '') or ''
+                self.cache_budget_mb = config.get('cache_budget_mb', DEFAULT_CACHE_BUDGET_MB)
+                self.cache_compress_after_days = config.get('cache_compress_after_days', DEFAULT_COMPRESS_AFTER_DAYS)
+                self.asr_backend = config.get('asr_backend', 'assemblyai')
+                self.asr_chunk_ms = int(config.get('asr_chunk_seconds', DEFAULT_CHUNK_MS // 1000) * 1000)
+                self.asr_workers = config.get('asr_workers', DEFAULT_MAX_WORKERS)
+                self.asr_batch_jobs = max(1, config.get('asr_batch_jobs', DEFAULT_BATCH_JOBS))
+                self.translation_workers = max(1, config.get('translation_workers', DEFAULT_TRANSLATION_WORKERS))
+                self.segment_subtitles = config.get('segment_subtitles', True)
+                self.import_transcripts = config.get('import_transcripts', True)
+                self.match_fingerprints = config.get('match_fingerprints', True)
+                self.asr_options = {
+                    'preprocess': config.get('asr_preprocess', True),
+                    'sample_rate': config.get('asr_sample_rate', TARGET_SAMPLE_RATE),
+                    'compress': config.get('asr_compress') or None
+                }
 
                 logging.info(f"配置加载成功 - gemini_key: {self.gemini_api_key}, silicon_key: {self.silicon_cloud_api_key}, asr_key: {self.api_key}")
 
@@ -1887,19 +2607,17 @@ class PodcastPlayer(QWidget):
             logging.error(f"翻译错误 [ID:{index}]: {error_message}")
 
 
-            if self.current_translation_count >= self.total_translation_count:
-                self.progress_bar.setVisible(False)
+            if self.current_translation_count >= self.total_translation_count and not self.transcribing:
+                self.finish_translation()
 
-                self.save_translation_cache()
-                self.save_subtitle_cache()
-                self.display_subtitles()
 
-
-            QMessageBox.warning(
-                self,
-                "翻译错误",
-                f"翻译第 {index + 1} 条字幕时出错：{error_message}"
-            )
+            if not self.translation_error_shown:
+                self.translation_error_shown = True
+                QMessageBox.warning(
+                    self,
+                    "翻译错误",
+                    f"翻译第 {index + 1} 条字幕时出错：{error_message}"
+                )
 
         except Exception as e:
             logging.error(f"处理翻译错误时发生异常: {e}")
\ No newline at end of file
@@ -0,0 +1,143 @@
+import bisect
+from array import array
+
+from utils import FenwickTree
+
+
+class SubtitlePositions:
+    """字幕文档的位置索引
+
+    每条字幕在文档中占用连续的一段（非首条字幕以分隔换行开头），各段长度存放
+    在树状数组中，段内的正文、翻译与单词位置保存为相对段首的偏移。绝对位置等于
+    段首的前缀和加相对偏移，因此某条字幕长度变化（如插入翻译）只需 O(log n)
+    更新；尚未渲染的字幕长度为 0，按任意顺序渲染都不必平移其他字幕的位置。
+    """
+
+    BLOCK_FIELDS = ('start', 'content_start', 'translation_start', 'translation_end', 'end')
+
+    def __init__(self):
+        self.spans = FenwickTree()
+        self.layouts = []
+        self.word_offsets = array('i')
+        self.word_starts = array('i')
+        self.word_ends = array('i')
+
+    def __len__(self):
+        return len(self.layouts)
+
+    @property
+    def word_count(self):
+        return len(self.word_starts)
+
+    def add_subtitle(self, word_count):
+        """登记一条尚未渲染的字幕"""
+        self.spans.append(0)
+        self.layouts.append(None)
+        self.word_offsets.append(len(self.word_starts))
+        self.word_starts.extend([0] * word_count)
+        self.word_ends.extend([0] * word_count)
+
+    def set_subtitle(self, idx, layout, word_ranges):
+        """记录第 idx 条字幕渲染后的布局
+
+        Args:
+            idx: 字幕下标
+            layout: 相对段首的 (start, content_start, translation_start, translation_end, end)
+            word_ranges: 相对段首的 [(start, end), ...]
+        """
+        self.layouts[idx] = list(layout)
+        for word_idx, (start, end) in enumerate(word_ranges, self.word_offsets[idx]):
+            self.word_starts[word_idx] = start
+            self.word_ends[word_idx] = end
+        self.spans.set(idx, layout[4])
+
+    def is_rendered(self, idx):
+        return 0 <= idx < len(self.layouts) and self.layouts[idx] is not None
+
+    def block(self, idx):
+        """第 idx 条字幕的绝对位置，未渲染时返回None"""
+        if not self.is_rendered(idx):
+            return None
+        base = self.spans.prefix_sum(idx)
+        block = {field: base + offset for field, offset in zip(self.BLOCK_FIELDS, self.layouts[idx])}
+        block['index'] = idx
+        return block
+
+    def word_owner(self, word_idx):
+        """第 word_idx 个单词所在的字幕下标"""
+        return bisect.bisect_right(self.word_offsets, word_idx) - 1
+
+    def word_range(self, word_idx):
+        """第 word_idx 个单词的绝对 (start, end)，所在字幕未渲染时返回None"""
+        if not 0 <= word_idx < len(self.word_starts):
+            return None
+        idx = self.word_owner(word_idx)
+        if self.layouts[idx] is None:
+            return None
+        base = self.spans.prefix_sum(idx)
+        return base + self.word_starts[word_idx], base + self.word_ends[word_idx]
+
+    def subtitle_at(self, position):
+        """文档位置 position 所在的字幕下标"""
+        if not self.layouts:
+            return -1
+        return min(self.spans.find(position), len(self.layouts) - 1)
+
+    def hit_test(self, position):
+        """文档位置 position 处的 (字幕下标, 全局单词下标)
+
+        先由段长前缀和定位字幕，再在该字幕的单词起点中二分查找，均为 O(log n)。
+        未命中任何已渲染字幕时返回 (-1, -1)，落在单词之外（说话人前缀、空格、
+        翻译）时单词下标为 -1。
+        """
+        idx = self.subtitle_at(position)
+        if not self.is_rendered(idx):
+            return -1, -1
+        relative = position - self.spans.prefix_sum(idx)
+        first = self.word_offsets[idx]
+        last = self.word_offsets[idx + 1] if idx + 1 < len(self.layouts) else len(self.word_starts)
+        word_idx = bisect.bisect_right(self.word_starts, relative, first, last) - 1
+        if word_idx < first or relative > self.word_ends[word_idx]:
+            return idx, -1
+        return idx, word_idx
+
+    def resize_translation(self, idx, length):
+        """第 idx 条字幕的翻译区间长度变为 length，其后字幕的位置随之平移"""
+        layout = self.layouts[idx]
+        delta = length - (layout[3] - layout[2])
+        layout[3] += delta
+        layout[4] += delta
+        self.spans.add(idx, delta)
+
+    def to_flat(self):
+        """导出扁平的绝对位置表 (blocks, words)，尚有字幕未渲染时返回None"""
+        if None in self.layouts:
+            return None
+        blocks = []
+        words = []
+        base = 0
+        for idx, layout in enumerate(self.layouts):
+            blocks.extend(base + offset for offset in layout)
+            end = self.word_offsets[idx + 1] if idx + 1 < len(self.layouts) else len(self.word_starts)
+            for word_idx in range(self.word_offsets[idx], end):
+                words.extend((base + self.word_starts[word_idx], base + self.word_ends[word_idx]))
+            base += layout[4]
+        return blocks, words
+
+    @classmethod
+    def from_flat(cls, blocks, words, word_counts):
+        """由扁平的绝对位置表还原索引"""
+        positions = cls()
+        base = 0
+        word_idx = 0
+        for idx, count in enumerate(word_counts):
+            positions.add_subtitle(count)
+            layout = [blocks[idx * 5 + k] - base for k in range(5)]
+            word_ranges = [
+                (words[2 * i] - base, words[2 * i + 1] - base)
+                for i in range(word_idx, word_idx + count)
+            ]
+            positions.set_subtitle(idx, layout, word_ranges)
+            word_idx += count
+            base = blocks[idx * 5 + 4]
+        return positions
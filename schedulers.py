@@ -0,0 +1,247 @@
+import bisect
+import math
+import time
+import logging
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal
+from PyQt5.QtMultimedia import QMediaPlayer
+
+
+class FrameBudgetRunner(QObject):
+    """在GUI线程上按帧时间预算分片执行生成器任务
+
+    每次定时器触发时持续推进生成器，直到用完 budget_ms 毫秒再交还事件循环，
+    这样既能尽快完成任务，又不会阻塞输入和重绘。
+    """
+    finished = pyqtSignal()
+
+    def __init__(self, budget_ms=8, parent=None):
+        super().__init__(parent)
+        self.budget = budget_ms / 1000
+        self._task = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._run_slice)
+
+    def start(self, task, until=None):
+        """开始执行任务；指定 until 时先同步执行到生成器产出该标记为止"""
+        self.stop()
+        self._task = task
+        if until is not None:
+            for value in task:
+                if value is until:
+                    break
+            else:
+                self._finish()
+                return
+        self._timer.start(0)
+
+    def stop(self):
+        """取消当前任务"""
+        self._timer.stop()
+        if self._task is not None:
+            self._task.close()
+            self._task = None
+
+    def isActive(self):
+        return self._task is not None
+
+    def _run_slice(self):
+        if self._task is None:
+            return
+        deadline = time.perf_counter() + self.budget
+        try:
+            while time.perf_counter() < deadline:
+                next(self._task)
+        except StopIteration:
+            self._finish()
+            return
+        except Exception as e:
+            logging.error(f"分片任务执行出错: {e}")
+            self._task = None
+            return
+        self._timer.start(0)
+
+    def _finish(self):
+        self._task = None
+        self.finished.emit()
+
+
+class SubtitleTimeline(QObject):
+    """事件驱动的字幕时间轴
+
+    以播放器最近一次报告的位置为锚点，用单调时钟外推当前播放位置，并根据预先
+    计算好的字幕/单词开始时间，在下一个边界处单次唤醒并发出 update_signal。
+    暂停或停止时不设定时器，完全不唤醒。同时统计每分钟唤醒次数和唤醒相对
+    边界的延迟，在暂停和停止时写入日志。
+    """
+    update_signal = pyqtSignal(float)
+
+    def __init__(self, media_player, boundaries, parent=None, drift_tolerance=80):
+        """
+        Args:
+            media_player: QMediaPlayer
+            boundaries: 返回若干个升序时间列表（毫秒）的可调用对象
+            drift_tolerance: 播放器报告位置与外推位置相差超过该值（毫秒）时重新对齐
+        """
+        super().__init__(parent)
+        self.media_player = media_player
+        self.boundaries = boundaries
+        self.drift_tolerance = drift_tolerance
+        self._running = False
+        self._anchor_position = 0
+        self._anchor_time = time.monotonic()
+        self._target = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._on_timeout)
+        self.reset_stats()
+
+        media_player.positionChanged.connect(self._on_position_changed)
+        media_player.stateChanged.connect(self._on_state_changed)
+
+    def start(self):
+        self._running = True
+        self._reanchor()
+        if self.is_playing():
+            self._play_started = time.monotonic()
+        self._schedule()
+
+    def stop(self):
+        if not self._running:
+            return
+        self._timer.stop()
+        if self._pause_clock():
+            self.log_stats()
+        self._running = False
+
+    def isRunning(self):
+        return self._running
+
+    def is_playing(self):
+        return self.media_player.state() == QMediaPlayer.PlayingState
+
+    def force_update(self, position=None):
+        """立即按当前位置（或给定位置）发出一次更新并重新安排唤醒"""
+        self._reanchor(position)
+        self._tick()
+
+    def boundaries_changed(self):
+        """边界列表追加新时间后调用
+
+        播放位置已越过全部边界时定时器处于停止状态，此时立即更新一次并按新的
+        边界重新安排唤醒；已有待触发的唤醒时其目标不会晚于新追加的边界，无需处理。
+        """
+        if self._running and self._target is None and self.is_playing():
+            self._tick()
+
+    def position(self):
+        """外推得到的当前播放位置（毫秒）"""
+        if not self.is_playing():
+            return self._anchor_position
+        elapsed = time.monotonic() - self._anchor_time
+        return self._anchor_position + elapsed * 1000 * self._rate()
+
+    def reset_stats(self):
+        self.wakeups = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.lag_count = 0
+        self._played = 0.0
+        self._play_started = None
+
+    def stats(self):
+        """返回 {'wakeups_per_minute', 'lag_avg_ms', 'lag_max_ms', 'played_seconds'}"""
+        played = self._played
+        if self._play_started is not None:
+            played += time.monotonic() - self._play_started
+        return {
+            'wakeups_per_minute': self.wakeups * 60 / played if played else 0.0,
+            'lag_avg_ms': self.lag_total / self.lag_count if self.lag_count else 0.0,
+            'lag_max_ms': self.lag_max,
+            'played_seconds': played
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        if stats['played_seconds'] < 1:
+            return
+        logging.info(
+            f"字幕时间轴: 播放 {stats['played_seconds']:.1f} 秒, "
+            f"唤醒 {stats['wakeups_per_minute']:.1f} 次/分钟, "
+            f"高亮延迟 平均 {stats['lag_avg_ms']:.2f} ms / 最大 {stats['lag_max_ms']:.2f} ms"
+        )
+
+    def _rate(self):
+        return self.media_player.playbackRate() or 1.0
+
+    def _reanchor(self, position=None):
+        self._anchor_position = self.media_player.position() if position is None else position
+        self._anchor_time = time.monotonic()
+
+    def _pause_clock(self):
+        """停止累计播放时长，返回之前是否在计时"""
+        if self._play_started is None:
+            return False
+        self._played += time.monotonic() - self._play_started
+        self._play_started = None
+        return True
+
+    def _tick(self):
+        position = self.position()
+        self.update_signal.emit(float(position))
+        self._schedule(position)
+
+    def _schedule(self, position=None):
+        """在下一个字幕/单词边界处安排一次唤醒"""
+        self._timer.stop()
+        self._target = None
+        if not self._running or not self.is_playing():
+            return
+        if position is None:
+            position = self.position()
+
+        target = None
+        for times in self.boundaries():
+            i = bisect.bisect_right(times, position)
+            if i < len(times) and (target is None or times[i] < target):
+                target = times[i]
+        if target is None:
+            return
+
+        self._target = target
+        self._timer.start(max(0, math.ceil((target - position) / self._rate())))
+
+    def _on_timeout(self):
+        self.wakeups += 1
+        position = self.position()
+        if self._target is not None and position < self._target:
+            self._schedule(position)
+            return
+        if self._target is not None:
+            lag = position - self._target
+            self.lag_total += lag
+            self.lag_count += 1
+            self.lag_max = max(self.lag_max, lag)
+        self._tick()
+
+    def _on_position_changed(self, position):
+        if not self._running:
+            return
+        if abs(position - self.position()) > self.drift_tolerance:
+            self._reanchor(position)
+            self._tick()
+
+    def _on_state_changed(self, state):
+        if not self._running:
+            return
+        self._reanchor()
+        if state == QMediaPlayer.PlayingState:
+            if self._play_started is None:
+                self._play_started = time.monotonic()
+            self._tick()
+        else:
+            self._timer.stop()
+            self._target = None
+            if self._pause_clock():
+                self.log_stats()
@@ -0,0 +1,118 @@
+SENTENCE_ENDINGS = ('.', '?', '!', '。', '？', '！', '…')
+MAX_SEGMENT_WORDS = 60
+MIN_SEGMENT_WORDS = 6
+MERGE_GAP_MS = 1500
+
+
+class SubtitleSegmenter:
+    """识别结果的流式分段
+
+    过长的字幕在句末标点处切开（没有标点时选单词间停顿最长处），切分后每段
+    不超过 max_words 个单词；少于 min_words 个单词的碎片与相邻的同一说话人
+    字幕合并（间隔不超过 merge_gap_ms，合并后不超过 max_words）。单词及其时间
+    原样保留，只改变字幕的划分；未被切分或合并的字幕保持原文本。
+
+    识别结果按批次 add，返回已经确定的分段；最后一段可能与下一批合并，
+    finish 时输出。segmentation 给出原字幕与分段的对应关系，写入字幕缓存：
+    map 为每个分段首个单词在原字幕中的位置 [原字幕下标, 单词偏移]，
+    source_word_counts 为每条原字幕的单词数。
+    """
+
+    def __init__(self, max_words=MAX_SEGMENT_WORDS, min_words=MIN_SEGMENT_WORDS, merge_gap_ms=MERGE_GAP_MS):
+        self.max_words = max(max_words, 2 * min_words)
+        self.min_words = min_words
+        self.merge_gap_ms = merge_gap_ms
+        self.source_word_counts = []
+        self.segment_map = []
+        self.pending = None
+
+    def add(self, utterances):
+        """加入一批按顺序的字幕，返回已确定的分段列表（字幕缓存格式）"""
+        ready = []
+        for utterance in utterances:
+            for segment in self.split(utterance):
+                self.push(segment, ready)
+            self.source_word_counts.append(len(utterance['words']))
+        return ready
+
+    def finish(self):
+        """输入结束，返回最后保留的分段"""
+        ready = []
+        if self.pending is not None:
+            ready.append(self.emit(self.pending))
+            self.pending = None
+        return ready
+
+    def segmentation(self):
+        return {'source_word_counts': self.source_word_counts, 'map': self.segment_map}
+
+    def split(self, utterance):
+        """将一条字幕切为不超过 max_words 个单词的分段"""
+        words = utterance['words']
+        source_index = len(self.source_word_counts)
+        if len(words) <= self.max_words:
+            return [{'utterance': utterance, 'words': words, 'source': [source_index, 0], 'changed': False}]
+
+        cuts = []
+        start = 0
+        while len(words) - start > self.max_words:
+            pieces = -(-(len(words) - start) // self.max_words)
+            target = start + round((len(words) - start) / pieces)
+            lo = start + max(self.min_words, (target - start) // 2)
+            hi = min(start + self.max_words, len(words) - self.min_words)
+            candidates = range(lo, hi + 1)
+            sentence_ends = [i for i in candidates if words[i - 1]['text'].endswith(SENTENCE_ENDINGS)]
+            if sentence_ends:
+                cut = min(sentence_ends, key=lambda i: abs(i - target))
+            else:
+                cut = max(candidates, key=lambda i: (words[i]['start'] - words[i - 1]['end'], -abs(i - target)))
+            cuts.append(cut)
+            start = cut
+
+        bounds = [0] + cuts + [len(words)]
+        return [
+            {'utterance': utterance, 'words': words[a:b], 'source': [source_index, a], 'changed': True}
+            for a, b in zip(bounds, bounds[1:])
+        ]
+
+    def push(self, segment, ready):
+        pending = self.pending
+        if pending is not None and self.can_merge(pending, segment):
+            pending['words'] = pending['words'] + segment['words']
+            pending['changed'] = True
+            return
+        if pending is not None:
+            ready.append(self.emit(pending))
+        self.pending = segment
+
+    def can_merge(self, first, second):
+        if not first['words'] or not second['words']:
+            return False
+        if first['utterance']['speaker'] != second['utterance']['speaker']:
+            return False
+        if min(len(first['words']), len(second['words'])) >= self.min_words:
+            return False
+        if len(first['words']) + len(second['words']) > self.max_words:
+            return False
+        return second['words'][0]['start'] - first['words'][-1]['end'] <= self.merge_gap_ms
+
+    def emit(self, segment):
+        self.segment_map.append(segment['source'])
+        utterance = segment['utterance']
+        if not segment['changed']:
+            return utterance
+        words = segment['words']
+        return {
+            'speaker': utterance['speaker'],
+            'start_time': words[0]['start'],
+            'end_time': words[-1]['end'],
+            'text': ' '.join(word['text'] for word in words),
+            'words': words
+        }
+
+
+def segment_utterances(utterances, **options):
+    """一次性分段，返回 (分段列表, segmentation)"""
+    segmenter = SubtitleSegmenter(**options)
+    segments = segmenter.add(utterances) + segmenter.finish()
+    return segments, segmenter.segmentation()
@@ -0,0 +1,59 @@
+import json
+import logging
+import time
+
+
+class SessionState:
+    """记录上次打开的音频与播放位置
+
+    播放过程中的位置更新只保存在内存中，由 flush 按最小时间间隔合并写盘，
+    暂停、切换音频和退出时再强制写入。
+    """
+
+    def __init__(self, session_file, min_interval=5.0, min_delta=1000):
+        self.session_file = session_file
+        self.min_interval = min_interval
+        self.min_delta = min_delta
+        self.file_hash = None
+        self.position = 0
+        self._saved_hash = None
+        self._saved_position = 0
+        self._last_flush = 0
+
+    def load(self):
+        """读取上次的会话状态"""
+        try:
+            if self.session_file.exists():
+                with open(self.session_file, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                self.file_hash = self._saved_hash = state.get('file_hash')
+                self.position = self._saved_position = state.get('position', 0)
+        except Exception as e:
+            logging.error(f"加载会话状态时出错: {e}")
+        return {'file_hash': self.file_hash, 'position': self.position}
+
+    def update(self, file_hash, position):
+        """记录当前播放位置（仅内存）"""
+        self.file_hash = file_hash
+        self.position = int(position)
+
+    def is_dirty(self):
+        return (self.file_hash != self._saved_hash or
+                abs(self.position - self._saved_position) >= self.min_delta)
+
+    def flush(self, force=False):
+        """位置有明显变化且距上次写盘超过最小间隔时写入，force 时忽略间隔"""
+        if not self.file_hash:
+            return
+        if not force and time.monotonic() - self._last_flush < self.min_interval:
+            return
+        if not self.is_dirty() and not (force and self.position != self._saved_position):
+            return
+        try:
+            with open(self.session_file, 'w', encoding='utf-8') as f:
+                json.dump({'file_hash': self.file_hash, 'position': self.position}, f)
+            self._saved_hash = self.file_hash
+            self._saved_position = self.position
+            self._last_flush = time.monotonic()
+        except Exception as e:
+            logging.error(f"保存会话状态时出错: {e}")
@@ -0,0 +1,34 @@
+import os
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def write_speech(path, seconds=60, seed=1, rate=16000):
+    """写出模拟对话的 WAV：两种响度的噪声段作为两个说话人的单词，间以长短不一的停顿"""
+    rng = np.random.default_rng(seed)
+    samples = np.zeros(seconds * rate)
+    position = 0.3
+    loud = True
+    while position < seconds - 1:
+        if rng.random() < 0.15:
+            loud = not loud
+        length = int(rng.uniform(0.15, 0.4) * rate)
+        start = int(position * rate)
+        samples[start:start + length] = rng.standard_normal(length) * (3000 if loud else 1000)
+        position += length / rate + (rng.uniform(0.9, 1.3) if rng.random() < 0.1 else rng.uniform(0.08, 0.4))
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.astype(np.int16).tobytes())
+    return str(path)
+
+
+@pytest.fixture
+def speech_file(tmp_path):
+    return write_speech(tmp_path / "speech.wav")
@@ -0,0 +1,92 @@
+"""测试用的 assemblyai 替身，只实现 AssemblyAIBackend 用到的接口"""
+import enum
+import itertools
+import types
+
+
+class TranscriptStatus(str, enum.Enum):
+    queued = 'queued'
+    processing = 'processing'
+    completed = 'completed'
+    error = 'error'
+
+
+class TranscriptError(Exception):
+    pass
+
+
+class TranscriptionConfig:
+    def __init__(self, **options):
+        self.options = options
+
+
+class FakeAssemblyAI:
+    """记录上传、提交与取回次数的假服务
+
+    expired 中的上传地址与 AssemblyAI 行为一致：提交时不报错，转录以 error
+    状态结束。utterances 为每次转录完成时返回的识别结果（相对分块的时间）。
+    """
+
+    TranscriptStatus = TranscriptStatus
+    TranscriptError = TranscriptError
+    TranscriptionConfig = TranscriptionConfig
+
+    def __init__(self, utterances=None):
+        self.settings = types.SimpleNamespace(api_key=None)
+        self.utterances = utterances or [
+            {'speaker': 'A', 'start': 0, 'end': 400, 'words': [('hello', 0, 200), ('world', 200, 400)]}
+        ]
+        self.uploads = []
+        self.submits = []
+        self.gets = []
+        self.expired = set()
+        self.transcripts = {}
+        self.ids = itertools.count(1)
+        service = self
+
+        class Transcriber:
+            def upload_file(self, path):
+                service.uploads.append(path)
+                return f"https://upload.example/{len(service.uploads)}"
+
+            def submit(self, url, config=None):
+                service.submits.append(url)
+                transcript = Transcript(f"t{next(service.ids)}", url)
+                service.transcripts[transcript.id] = transcript
+                return transcript
+
+        class Transcript:
+            def __init__(self, transcript_id, url):
+                self.id = transcript_id
+                self.url = url
+                self.status = TranscriptStatus.queued
+                self.error = None
+                self.utterances = None
+
+            @classmethod
+            def get_by_id(cls, transcript_id):
+                service.gets.append(transcript_id)
+                if transcript_id not in service.transcripts:
+                    raise TranscriptError(f"transcript {transcript_id} not found")
+                return service.transcripts[transcript_id]
+
+            def wait_for_completion(self):
+                if self.status == TranscriptStatus.queued:
+                    if self.url in service.expired:
+                        self.status = TranscriptStatus.error
+                        self.error = f"Download error, unable to download {self.url}"
+                    else:
+                        self.status = TranscriptStatus.completed
+                        self.utterances = [service.make_utterance(u) for u in service.utterances]
+                return self
+
+        self.Transcriber = Transcriber
+        self.Transcript = Transcript
+
+    @staticmethod
+    def make_utterance(utterance):
+        words = [types.SimpleNamespace(text=text, start=start, end=end) for text, start, end in utterance['words']]
+        return types.SimpleNamespace(
+            speaker=utterance['speaker'], start=utterance['start'], end=utterance['end'],
+            text=' '.join(word.text for word in words), words=words
+        )
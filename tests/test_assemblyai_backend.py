@@ -0,0 +1,85 @@
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+from asr.backends import AssemblyAIBackend
+from asr.checkpoint import TranscriptionCheckpoint
+from asr.chunking import split_audio
+from fake_assemblyai import FakeAssemblyAI
+
+
+@pytest.fixture
+def service(monkeypatch):
+    fake = FakeAssemblyAI()
+    monkeypatch.setitem(sys.modules, 'assemblyai', fake)
+    return fake
+
+
+@pytest.fixture
+def chunk(tmp_path):
+    path = tmp_path / "audio.wav"
+    rng = np.random.default_rng(0)
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes((rng.standard_normal(16000) * 3000).astype(np.int16).tobytes())
+    return split_audio(str(path))[0]
+
+
+def make_backend(tmp_path):
+    return AssemblyAIBackend('key', checkpoint=TranscriptionCheckpoint(str(tmp_path / "checkpoint.json")))
+
+
+def test_fresh_chunk_uploads_and_records_checkpoint(tmp_path, service, chunk):
+    backend = make_backend(tmp_path)
+
+    utterances = backend.transcribe_chunk(chunk)
+
+    assert [u['text'] for u in utterances] == ['hello world']
+    assert len(service.uploads) == 1 and len(service.submits) == 1
+    entry = backend.checkpoint.get(backend.checkpoint_key(chunk))
+    assert entry == {'upload_url': service.submits[0], 'transcript_id': 't1'}
+
+
+def test_reuses_submitted_transcript_by_id(tmp_path, service, chunk):
+    make_backend(tmp_path).transcribe_chunk(chunk)
+    service.transcripts['t1'].status = service.TranscriptStatus.queued
+
+    backend = make_backend(tmp_path)
+    utterances = backend.transcribe_chunk(chunk)
+
+    assert [u['text'] for u in utterances] == ['hello world']
+    assert len(service.uploads) == 1 and len(service.submits) == 1
+    assert service.gets == ['t1']
+    assert backend.reused_transcripts == 1
+
+
+def test_reuses_upload_url_when_transcript_is_gone(tmp_path, service, chunk):
+    make_backend(tmp_path).transcribe_chunk(chunk)
+    service.transcripts.clear()
+
+    backend = make_backend(tmp_path)
+    utterances = backend.transcribe_chunk(chunk)
+
+    assert [u['text'] for u in utterances] == ['hello world']
+    assert len(service.uploads) == 1 and len(service.submits) == 2
+    assert backend.reused_uploads == 1
+    assert backend.checkpoint.get(backend.checkpoint_key(chunk))['transcript_id'] == 't2'
+
+
+def test_expired_upload_url_is_uploaded_again(tmp_path, service, chunk):
+    make_backend(tmp_path).transcribe_chunk(chunk)
+    service.transcripts.clear()
+    service.expired.add(service.submits[0])
+
+    backend = make_backend(tmp_path)
+    utterances = backend.transcribe_chunk(chunk)
+
+    assert [u['text'] for u in utterances] == ['hello world']
+    assert len(service.uploads) == 2 and len(service.submits) == 3
+    assert backend.reused_uploads == 0
+    entry = backend.checkpoint.get(backend.checkpoint_key(chunk))
+    assert entry == {'upload_url': service.submits[-1], 'transcript_id': 't3'}
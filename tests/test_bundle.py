@@ -0,0 +1,30 @@
+import json
+import os
+
+from bundle import export_bundle, import_bundle
+from utils import get_file_hash
+
+
+def test_import_stores_absolute_audio_paths(tmp_path, monkeypatch):
+    audio_file = tmp_path / "episode.wav"
+    audio_file.write_bytes(b'RIFF' + b'\0' * 64)
+    file_hash = get_file_hash(audio_file)
+    subtitle_file = tmp_path / "source.json"
+    subtitle_file.write_text(json.dumps({
+        'translations': {'0': {'text': '你好', 'translator': 'google'}},
+        'file_path': str(audio_file),
+        'subtitles': [{'speaker': 'A', 'start_time': 0, 'end_time': 500, 'text': 'hello',
+                       'words': [{'text': 'hello', 'start': 0, 'end': 500}]}]
+    }), encoding='utf-8')
+    bundle_path = str(tmp_path / "export.tar.gz")
+    export_bundle(bundle_path, {file_hash: {'file_path': str(audio_file), 'subtitle_file': str(subtitle_file)}},
+                  include_audio=True)
+
+    (tmp_path / "data" / "subtitles").mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+    entries = import_bundle(bundle_path, 'data')
+
+    file_path = entries[file_hash]['file_path']
+    assert os.path.isabs(file_path) and get_file_hash(file_path) == file_hash
+    with open(entries[file_hash]['subtitle_file'], 'r', encoding='utf-8') as f:
+        assert json.load(f)['file_path'] == file_path
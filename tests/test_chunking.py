@@ -0,0 +1,59 @@
+import numpy as np
+
+from asr.audio import FRAME_MS, frame_energies, read_wav_info
+from asr.chunking import SEARCH_RATIO, SILENCE_WINDOW_MS, find_cut, plan_cuts, split_audio
+
+
+def test_find_cut_returns_center_of_quietest_window():
+    energies = [5.0] * 100
+    energies[60:70] = [0.0] * 10
+
+    assert find_cut(energies, 0, 100, 10) == 65
+    assert find_cut(energies, 0, 50, 10) in range(5, 46)
+
+
+def test_find_cut_short_range_returns_midpoint():
+    assert find_cut([1.0] * 10, 2, 8, 10) == 5
+
+
+def test_plan_cuts_lands_in_silence_near_target():
+    energies = np.full(3000, 10.0)
+    for silence in (980, 2050):
+        energies[silence:silence + 40] = 0.0
+    window = SILENCE_WINDOW_MS // FRAME_MS
+
+    cuts = plan_cuts(energies, chunk_ms=10000)
+
+    assert len(cuts) == 2
+    for cut, silence in zip(cuts, (980, 2050)):
+        frame = cut // FRAME_MS
+        assert silence <= frame - window // 2 and frame + window // 2 <= silence + 40
+
+
+def test_plan_cuts_uses_shorter_first_chunk():
+    energies = np.ones(6000)
+
+    cuts = plan_cuts(energies, chunk_ms=20000, first_chunk_ms=5000)
+
+    assert abs(cuts[0] - 5000) <= 5000 * SEARCH_RATIO
+    assert all(abs(b - a - 20000) <= 20000 * SEARCH_RATIO * 2 for a, b in zip(cuts, cuts[1:]))
+    assert 60000 - cuts[-1] <= 20000 * (1 + SEARCH_RATIO) * 2
+
+
+def test_plan_cuts_keeps_short_audio_whole():
+    assert plan_cuts(np.ones(1100), chunk_ms=10000) == []
+
+
+def test_split_audio_cuts_in_silence_with_overlap(speech_file):
+    info = read_wav_info(speech_file)
+    energies = frame_energies(info)
+
+    chunks = split_audio(speech_file, chunk_ms=10000, overlap_ms=2000)
+
+    assert len(chunks) > 3
+    assert chunks[0].core_start_ms == 0 and chunks[-1].core_end_ms == info.duration_ms
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous.core_end_ms == chunk.core_start_ms
+        assert chunk.start_ms == chunk.core_start_ms - 2000
+        assert previous.end_ms == previous.core_end_ms + 2000
+        assert energies[chunk.core_start_ms // FRAME_MS] < energies.max() / 100
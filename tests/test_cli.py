@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+
+from cli import BatchRunner
+from fingerprint import FingerprintIndex
+
+
+def write_entry(data_dir, file_hash, last_access, size=4096):
+    subtitle_file = data_dir / "subtitles" / f"{file_hash}.json"
+    subtitle_file.write_text(json.dumps({'subtitles': [], 'padding': 'x' * size}), encoding='utf-8')
+    FingerprintIndex(str(data_dir / "fingerprints")).add(file_hash, np.arange(8, dtype=np.uint32))
+    return {'file_path': f"/audio/{file_hash}.wav", 'subtitle_file': str(subtitle_file), 'last_access': last_access}
+
+
+def test_enforce_cache_budget_removes_evicted_entries(tmp_path):
+    runner = BatchRunner(tmp_path, {'cache_budget_mb': 10 / 1024, 'cache_compress_after_days': 0})
+    index = {file_hash: write_entry(tmp_path, file_hash, access)
+             for access, file_hash in enumerate(['old', 'middle', 'recent', 'processed'], 1)}
+    with open(tmp_path / "audio_index.json", 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    runner.updated_entries = {'processed': index['processed']}
+
+    runner.enforce_cache_budget()
+
+    with open(tmp_path / "audio_index.json", 'r', encoding='utf-8') as f:
+        saved = json.load(f)
+    assert set(saved) == {'recent', 'processed'}
+    for file_hash, entry in saved.items():
+        assert (tmp_path / "subtitles" / f"{file_hash}.json").exists()
+    assert not (tmp_path / "subtitles" / "old.json").exists()
+    fingerprints = FingerprintIndex(str(tmp_path / "fingerprints"))
+    assert sorted(fingerprints.hashes()) == ['processed', 'recent']
+
+
+def test_enforce_cache_budget_keeps_entries_within_budget(tmp_path):
+    runner = BatchRunner(tmp_path, {'cache_budget_mb': 1, 'cache_compress_after_days': 0})
+    index = {'a': write_entry(tmp_path, 'a', 1), 'b': write_entry(tmp_path, 'b', 2)}
+    with open(tmp_path / "audio_index.json", 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+
+    runner.enforce_cache_budget()
+
+    with open(tmp_path / "audio_index.json", 'r', encoding='utf-8') as f:
+        assert set(json.load(f)) == {'a', 'b'}
+    assert sorted(FingerprintIndex(str(tmp_path / "fingerprints")).hashes()) == ['a', 'b']
@@ -0,0 +1,123 @@
+import random
+
+import pytest
+
+from positions import SubtitlePositions
+from utils import FenwickTree, utf16_len
+
+SUBTITLES = [
+    ('A', ['hello', 'world'], '你好世界'),
+    ('B', ['emoji', '😀😀', 'after'], ''),
+    ('A', ['𠀋𠀌', 'rare', 'han'], '罕见字 𠀋'),
+    ('B', ['plain'], 'translation'),
+]
+
+
+def layout_subtitle(idx, speaker, words, translation):
+    """按 insert_subtitle_block 的规则生成第 idx 条字幕的文本与相对布局"""
+    block_start = 1 if idx > 0 else 0
+    prefix = f"{speaker}: "
+    content_start = block_start + utf16_len(prefix)
+    word_ranges = []
+    position = content_start
+    for word in words:
+        word_ranges.append((position, position + utf16_len(word)))
+        position += utf16_len(word) + 1
+    text = ('\n' if idx > 0 else '') + prefix + ' '.join(words) + '\n'
+    translation_start = utf16_len(text)
+    if translation:
+        text += translation + '\n'
+    end = utf16_len(text)
+    return text, (block_start, content_start, translation_start, end, end), word_ranges
+
+
+def render(order):
+    positions = SubtitlePositions()
+    for _, words, _ in SUBTITLES:
+        positions.add_subtitle(len(words))
+    texts = [None] * len(SUBTITLES)
+    for idx in order:
+        texts[idx], layout, word_ranges = layout_subtitle(idx, *SUBTITLES[idx])
+        positions.set_subtitle(idx, layout, word_ranges)
+    return positions, ''.join(text for text in texts if text is not None)
+
+
+def utf16_slice(text, start, end):
+    return text.encode('utf-16-le')[2 * start:2 * end].decode('utf-16-le')
+
+
+def test_fenwick_tree_matches_list():
+    rng = random.Random(0)
+    values = [rng.randrange(5) for _ in range(50)]
+    tree = FenwickTree(values[:20])
+    for value in values[20:]:
+        tree.append(value)
+    for _ in range(100):
+        idx = rng.randrange(len(values))
+        values[idx] = rng.randrange(5)
+        tree.set(idx, values[idx])
+
+    assert len(tree) == len(values) and tree.total() == sum(values)
+    for count in range(len(values) + 1):
+        assert tree.prefix_sum(count) == sum(values[:count])
+    for target in range(sum(values)):
+        idx = tree.find(target)
+        assert sum(values[:idx]) <= target < sum(values[:idx + 1])
+
+
+def test_fenwick_find_skips_zero_length_entries():
+    tree = FenwickTree([0, 3, 0, 0, 2])
+
+    assert tree.find(0) == 1
+    assert tree.find(3) == 4
+    assert tree.find(5) == 5
+
+
+@pytest.mark.parametrize('order', [[0, 1, 2, 3], [3, 1, 0, 2]])
+def test_word_ranges_index_utf16_text(order):
+    positions, text = render(order)
+
+    for word_idx in range(positions.word_count):
+        owner = positions.word_owner(word_idx)
+        start, end = positions.word_range(word_idx)
+        assert positions.hit_test(start) == (owner, word_idx)
+        assert positions.hit_test(end - 1) == (owner, word_idx)
+        first = positions.word_offsets[owner]
+        assert utf16_slice(text, start, end) == SUBTITLES[owner][1][word_idx - first]
+    for idx, (_, _, translation) in enumerate(SUBTITLES):
+        block = positions.block(idx)
+        assert utf16_slice(text, block['translation_start'], block['translation_end']) == (
+            f"{translation}\n" if translation else '')
+
+
+def test_hit_test_outside_words_and_unrendered():
+    positions, text = render([0, 2])
+
+    assert positions.hit_test(0) == (0, -1)
+    block = positions.block(2)
+    assert positions.hit_test(block['translation_start'] + 1) == (2, -1)
+    assert positions.block(1) is None
+    assert positions.word_range(positions.word_offsets[1]) is None
+    assert positions.to_flat() is None
+
+
+def test_translation_resize_shifts_following_subtitles():
+    positions, _ = render([0, 1, 2, 3])
+    before = positions.word_range(positions.word_count - 1)
+
+    positions.resize_translation(1, 6)
+
+    after = positions.word_range(positions.word_count - 1)
+    assert after == (before[0] + 6, before[1] + 6)
+
+
+def test_flat_round_trip():
+    positions, _ = render([2, 0, 3, 1])
+    blocks, words = positions.to_flat()
+
+    restored = SubtitlePositions.from_flat(blocks, words, [len(words) for _, words, _ in SUBTITLES])
+
+    assert restored.to_flat() == (blocks, words)
+    assert [restored.block(idx) for idx in range(len(SUBTITLES))] == [
+        positions.block(idx) for idx in range(len(SUBTITLES))
+    ]
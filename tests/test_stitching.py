@@ -0,0 +1,72 @@
+from asr import AudioChunk, LocalBackend, TranscriptStitcher, split_audio, transcribe_file
+
+
+def words_of(utterances):
+    return [(word['text'], word['start'], word['end']) for utterance in utterances for word in utterance['words']]
+
+
+def stitch(chunks, results, order):
+    stitcher = TranscriptStitcher(len(chunks), LocalBackend().merge_gap_ms)
+    utterances = []
+    for index in order:
+        utterances.extend(stitcher.add(chunks[index], results[index]))
+    return utterances + stitcher.finish()
+
+
+def test_chunked_transcription_matches_whole_file(speech_file):
+    backend = LocalBackend()
+    whole = transcribe_file(speech_file, backend, chunk_ms=10 ** 7)
+
+    chunked = transcribe_file(speech_file, backend, chunk_ms=10000, overlap_ms=2000, max_workers=3)
+    first_chunk = transcribe_file(speech_file, backend, chunk_ms=15000, first_chunk_ms=4000)
+
+    assert len(whole) > 10
+    assert chunked == whole
+    assert first_chunk == whole
+
+
+def test_stitcher_keeps_each_word_once_in_any_order(speech_file):
+    backend = LocalBackend()
+    whole = transcribe_file(speech_file, backend, chunk_ms=10 ** 7)
+    chunks = split_audio(speech_file, chunk_ms=10000, overlap_ms=2000)
+    results = [backend.transcribe_chunk(chunk) for chunk in chunks]
+
+    raw = sum(len(words_of(utterances)) for utterances in results)
+    stitched = stitch(chunks, results, reversed(range(len(chunks))))
+
+    assert raw > len(words_of(whole))
+    assert words_of(stitched) == words_of(whole)
+    assert len(set(words_of(stitched))) == len(words_of(stitched))
+
+
+def test_stitcher_merges_utterance_across_cut(speech_file):
+    backend = LocalBackend()
+    whole = transcribe_file(speech_file, backend, chunk_ms=10 ** 7)
+    chunks = split_audio(speech_file, chunk_ms=10000, overlap_ms=2000)
+    crossing = [
+        utterance for utterance in whole
+        if any(utterance['start_time'] < chunk.core_start_ms < utterance['end_time'] for chunk in chunks)
+    ]
+    assert crossing
+
+    stitched = stitch(chunks, [backend.transcribe_chunk(chunk) for chunk in chunks], range(len(chunks)))
+
+    for utterance in crossing:
+        assert utterance in stitched
+
+
+def test_stitcher_drops_overlap_duplicate_and_merges_tail():
+    chunks = [AudioChunk(0, None, None, 0, 1200, 0, 1000), AudioChunk(1, None, None, 800, 2000, 1000, 2000)]
+    first = [{'speaker': 'A', 'start_time': 600, 'end_time': 1100, 'text': 'a b',
+              'words': [{'text': 'a', 'start': 600, 'end': 800}, {'text': 'b', 'start': 900, 'end': 1100}]}]
+    second = [{'speaker': 'X', 'start_time': 100, 'end_time': 700, 'text': 'b c',
+               'words': [{'text': 'b', 'start': 100, 'end': 300}, {'text': 'c', 'start': 500, 'end': 700}]}]
+    stitcher = TranscriptStitcher(len(chunks), merge_gap_ms=700)
+
+    assert stitcher.add(chunks[0], first) == []
+    assert stitcher.add(chunks[1], second) == []
+    [utterance] = stitcher.finish()
+
+    assert utterance['speaker'] == 'A'
+    assert utterance['text'] == 'a b c'
+    assert [(word['start'], word['end']) for word in utterance['words']] == [(600, 800), (900, 1100), (1300, 1500)]
@@ -0,0 +1,57 @@
+import os
+import time
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+QtMultimedia = pytest.importorskip('PyQt5.QtMultimedia', exc_type=ImportError)
+from PyQt5.QtCore import QCoreApplication, QObject, pyqtSignal
+
+from schedulers import SubtitleTimeline
+
+
+class FakePlayer(QObject):
+    """按单调时钟推进位置的播放器替身"""
+    positionChanged = pyqtSignal('qint64')
+    stateChanged = pyqtSignal(int)
+
+    def __init__(self):
+        super().__init__()
+        self.started = time.monotonic()
+
+    def state(self):
+        return QtMultimedia.QMediaPlayer.PlayingState
+
+    def position(self):
+        return int((time.monotonic() - self.started) * 1000)
+
+    def playbackRate(self):
+        return 1.0
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def run_events(app, seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def test_appended_boundaries_restart_stalled_timeline(app):
+    starts = [0]
+    updates = []
+    timeline = SubtitleTimeline(FakePlayer(), lambda: [starts])
+    timeline.update_signal.connect(updates.append)
+    timeline.start()
+    assert timeline._target is None
+
+    starts.append(timeline.position() + 30)
+    timeline.boundaries_changed()
+    run_events(app, 0.1)
+
+    assert updates and updates[-1] >= starts[-1]
+    assert timeline._target is None
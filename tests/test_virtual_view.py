@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtCore import QPoint
+from PyQt5.QtWidgets import QApplication
+
+from transcript import Transcript
+from ui_components import VirtualSubtitleView
+
+WORDS = ['emoji', '😀😀', 'after', '𠀋𠀌', 'end']
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def view(app):
+    transcript = Transcript()
+    transcript.append('A', 0, 5000, ' '.join(WORDS), [(word, i * 1000, i * 1000 + 800) for i, word in enumerate(WORDS)])
+    view = VirtualSubtitleView()
+    view.resize(800, 400)
+    view.set_subtitles(transcript, lambda idx: '')
+    return view
+
+
+def test_word_ranges_use_utf16_offsets(view):
+    row = view.ensure_layout(0)
+    text = row['content'].text().encode('utf-16-le')
+
+    for word, (start, length) in zip(WORDS, row['word_ranges']):
+        assert text[2 * start:2 * (start + length)].decode('utf-16-le') == word
+
+
+def test_hit_test_after_non_bmp_words(view):
+    row = view.ensure_layout(0)
+    line = row['content'].lineAt(0)
+
+    for word_idx, (start, length) in enumerate(row['word_ranges']):
+        x = (line.cursorToX(start)[0] + line.cursorToX(start + length)[0]) / 2
+        pos = QPoint(int(x) + view.padding, int(line.y() + line.height() / 2))
+        assert view.hit_test(pos) == (0, word_idx)
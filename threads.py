@@ -1,195 +1,364 @@
 
 import time
-from PyQt5.QtCore import QThread, pyqtSignal, QMutex
-import assemblyai as aai
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QThread, pyqtSignal
 import logging
-from translation import translate_text
-
-class SubtitleUpdateThread(QThread):
-    update_signal = pyqtSignal(float)
-
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.running = True
-        self.paused = False
-        self._force_update = False
-
-    def force_update(self):
-        """强制触发一次更新"""
-        self._force_update = True
+from translation import translate_text, DEFAULT_TRANSLATION_WORKERS
+from asr import (
+    transcribe_file, get_backend, TranscriptionCheckpoint, DEFAULT_CHUNK_MS, DEFAULT_FIRST_CHUNK_MS,
+    DEFAULT_MAX_WORKERS
+)
+from bundle import export_bundle, import_bundle
+from jobs import list_audio_files
+from utils import get_file_hash
+from segmentation import SubtitleSegmenter
+from importers import iter_transcript
+from fingerprint import audio_duration_ms, compute_fingerprint, query_fingerprints
+
+TRANSLATION_QUEUE_SIZE = 256
+MAX_UNRENDERED_TRANSLATIONS = 64
+IMPORT_BATCH_SIZE = 50
+
+class PrefetchThread(QThread):
+    """后台顺序读取文件，预热系统文件缓存"""
+
+    def __init__(self, paths, chunk_size=1 << 20):
+        super().__init__()
+        self.paths = paths
+        self.chunk_size = chunk_size
+        self._is_running = True
 
     def run(self):
-        while self.running:
-            if not self.paused or self._force_update:
-                current_time = self.parent().media_player.position()
-                self.update_signal.emit(current_time)
-                self._force_update = False
-            time.sleep(0.1)
+        for path in self.paths:
+            try:
+                with open(path, 'rb') as f:
+                    while self._is_running and f.read(self.chunk_size):
+                        pass
+            except OSError as e:
+                logging.warning(f"预取文件失败 {path}: {e}")
+            if not self._is_running:
+                break
 
     def stop(self):
-        self.running = False
-
-    def pause(self):
-        self.paused = True
+        self._is_running = False
 
-    def resume(self):
-        self.paused = False
+class FileHashThread(QThread):
+    """后台列出文件夹中的音频并逐个计算内容哈希"""
+    files_found = pyqtSignal(list)
+    file_hashed = pyqtSignal(str, str)
+    hash_failed = pyqtSignal(str, str)
 
-class TranscriptionThread(QThread):
-    transcription_done = pyqtSignal(object)
-    error_occurred = pyqtSignal(str)
-
-    def __init__(self, audio_file, api_key):
+    def __init__(self, paths=(), folder=None):
         super().__init__()
-        self.audio_file = audio_file
-        self.api_key = api_key
+        self.paths = list(paths)
+        self.folder = folder
+        self._is_running = True
 
     def run(self):
-        try:
-            aai.settings.api_key = self.api_key
-            transcriber = aai.Transcriber()
-            config = aai.TranscriptionConfig(speaker_labels=True)
-            transcript = transcriber.transcribe(self.audio_file, config=config)
-            self.transcription_done.emit(transcript)
-        except Exception as e:
-            self.error_occurred.emit(str(e))
+        paths = self.paths
+        if self.folder:
+            paths = list_audio_files(self.folder)
+            self.files_found.emit(paths)
+        for path in paths:
+            if not self._is_running:
+                break
+            try:
+                self.file_hashed.emit(path, get_file_hash(path))
+            except OSError as e:
+                self.hash_failed.emit(path, str(e))
 
-class TranslationThread(QThread):
-    translation_done = pyqtSignal(int, str, str)                                       
-    error_occurred = pyqtSignal(str)
+    def stop(self):
+        self._is_running = False
 
+class FingerprintThread(QThread):
+    """后台计算音频指纹并存入指纹库
 
-    _last_request_time = 0
-    _request_lock = QMutex()
-    _min_interval = 0.1              
+    给出候选音频时先只解码开头和中间的几段查询内容相同的已转录音频，
+    发出 match_found(参考音频哈希, 时间偏移毫秒) 或 no_match，再计算完整指纹，
+    因此找不到匹配时转录不必等待整个文件解码完。
+    """
+    match_found = pyqtSignal(str, int)
+    no_match = pyqtSignal()
 
-    def __init__(self, text, index, translator_type='google', api_key=None):
+    def __init__(self, audio_file, file_hash, index, candidates=()):
         super().__init__()
-        self.text = text
+        self.audio_file = audio_file
+        self.file_hash = file_hash
         self.index = index
-        self.translator_type = translator_type
-        self.api_key = api_key
+        self.candidates = list(candidates)
         self._is_running = True
 
     def run(self):
+        answered = False
         try:
-            if not self._is_running:
-                return
-
-
-            if self.translator_type == 'silicon_cloud':
-
-                TranslationThread._request_lock.lock()
-                try:
-
-                    current_time = time.time()
-                    elapsed = current_time - TranslationThread._last_request_time
-                    if elapsed < TranslationThread._min_interval:
-                        time.sleep(TranslationThread._min_interval - elapsed)
-
+            match = None
+            if self.candidates:
+                started = time.perf_counter()
+                queries = query_fingerprints(self.audio_file, audio_duration_ms(self.audio_file), self.should_stop)
+                if queries:
+                    match = self.index.match(queries, self.candidates, self.should_stop)
+                logging.info(
+                    f"指纹查询完成 - 候选音频: {len(self.candidates)}, "
+                    f"耗时: {(time.perf_counter() - started) * 1000:.1f}ms, 结果: {match}"
+                )
+            if match:
+                self.match_found.emit(match[0], int(match[1]))
+            else:
+                self.no_match.emit()
+            answered = True
+
+            values = compute_fingerprint(self.audio_file, should_stop=self.should_stop)
+            if values is not None:
+                self.index.add(self.file_hash, values)
+        except ValueError as e:
+            logging.warning(f"无法计算音频指纹: {e}")
+        except Exception as e:
+            logging.error(f"计算音频指纹时出错: {e}")
+        if not answered:
+            self.no_match.emit()
 
-                    TranslationThread._last_request_time = time.time()
-                finally:
+    def should_stop(self):
+        return not self._is_running
 
-                    TranslationThread._request_lock.unlock()
+    def stop(self):
+        self._is_running = False
 
+class BundleThread(QThread):
+    """后台导出/导入字幕包"""
+    progress_signal = pyqtSignal(int, int)
+    finished_signal = pyqtSignal(str, object)
+    error_occurred = pyqtSignal(str)
 
-            translation = translate_text(
-                self.text,
-                translator_type=self.translator_type,
-                api_key=self.api_key
-            )
+    def __init__(self, mode, bundle_path, audio_index=None, data_dir=None, include_audio=False):
+        super().__init__()
+        self.mode = mode
+        self.bundle_path = bundle_path
+        self.audio_index = audio_index
+        self.data_dir = data_dir
+        self.include_audio = include_audio
 
-            if translation and self._is_running:
-                self.translation_done.emit(self.index, translation, self.translator_type)
+    def run(self):
+        try:
+            if self.mode == 'export':
+                result = export_bundle(
+                    self.bundle_path, self.audio_index,
+                    include_audio=self.include_audio, progress=self.progress_signal.emit
+                )
             else:
-                self.error_occurred.emit(f"翻译失败 [ID:{self.index}]")
-
+                result = import_bundle(self.bundle_path, self.data_dir, progress=self.progress_signal.emit)
+            self.finished_signal.emit(self.mode, result)
         except Exception as e:
-            if self._is_running:
-                self.error_occurred.emit(f"翻译错误 [ID:{self.index}]: {str(e)}")
-
-    def stop(self):
-        self._is_running = False
+            self.error_occurred.emit(str(e))
 
-class ASRThread(QThread):
-    """语音识别线程"""
-    progress_signal = pyqtSignal(float)                
-    finished = pyqtSignal(list)                 
-    error_signal = pyqtSignal(str)          
+class TranscriptionThread(QThread):
+    """分块并行识别音频
+
+    每当有字幕按顺序确定时发出 utterances_ready（本批字幕列表），全部完成后发出
+    transcription_done（完整字幕列表），均为字幕缓存格式的字典。
+    给出 checkpoint_file 时识别进度写入检查点，中途退出后再次识别可复用已有的
+    上传与远端转录，识别成功后删除检查点。给出 translation_pipeline 时字幕确定后
+    直接在本线程送入翻译流水线，流水线积压时本线程随之等待。segment 为 True 时
+    识别结果先经 SubtitleSegmenter 重新分段，segmentation 记录原字幕与分段的对应。
+    给出 transcript_file（音频旁已有的 SRT/WebVTT/AssemblyAI JSON）时流式导入其中
+    的字幕代替识别，文件无法解析且尚未产出字幕时仍回退到识别。
+    """
+    transcription_done = pyqtSignal(object)
+    utterances_ready = pyqtSignal(object)
+    progress_signal = pyqtSignal(int, int)
+    error_occurred = pyqtSignal(str)
 
-    def __init__(self, audio_file):
+    def __init__(self, audio_file, api_key, backend='assemblyai', chunk_ms=DEFAULT_CHUNK_MS,
+                 max_workers=DEFAULT_MAX_WORKERS, first_chunk_ms=DEFAULT_FIRST_CHUNK_MS, backend_options=None,
+                 checkpoint_file=None, translation_pipeline=None, segment=True, transcript_file=None):
         super().__init__()
         self.audio_file = audio_file
+        self.api_key = api_key
+        self.backend = backend
+        self.chunk_ms = chunk_ms
+        self.max_workers = max_workers
+        self.first_chunk_ms = first_chunk_ms
+        self.backend_options = backend_options or {}
+        self.checkpoint_file = checkpoint_file
+        self.transcript_file = transcript_file
+        self.translation_pipeline = translation_pipeline
+        self.segmenter = SubtitleSegmenter() if segment else None
+        self.segmentation = None
+        self.subtitles = []
+        self.upload_report = {}
         self._is_running = True
 
     def run(self):
         try:
-
-
-            total_chunks = 100
-            subtitles = []
-
-            for i in range(total_chunks):
-                if not self._is_running:
-                    break
-
-
-                time.sleep(0.1)
-                progress = (i + 1) / total_chunks
-                self.progress_signal.emit(progress)
-
-
-                subtitle = {
-                    'start_time': i * 1000,
-                    'end_time': (i + 1) * 1000,
-                    'text': f'示例字幕 {i+1}',
-                    'words': [
-                        {
-                            'text': f'词{j}',
-                            'start': i * 1000 + j * 100,
-                            'end': i * 1000 + (j + 1) * 100
-                        } for j in range(5)
-                    ]
-                }
-                subtitles.append(subtitle)
-
-            self.finished.emit(subtitles)
-
+            if not (self.transcript_file and self.import_transcript()):
+                self.transcribe()
+            if self.segmenter is not None:
+                self.deliver(self.segmenter.finish())
+                self.segmentation = self.segmenter.segmentation()
+            self.transcription_done.emit(self.subtitles)
         except Exception as e:
-            self.error_signal.emit(str(e))
+            if self._is_running:
+                self.error_occurred.emit(str(e))
+        finally:
+            if self.translation_pipeline is not None:
+                self.translation_pipeline.close()
+
+    def transcribe(self):
+        checkpoint = TranscriptionCheckpoint(self.checkpoint_file) if self.checkpoint_file else None
+        backend = get_backend(self.backend, api_key=self.api_key, checkpoint=checkpoint, **self.backend_options)
+        transcribe_file(
+            self.audio_file, backend,
+            chunk_ms=self.chunk_ms, max_workers=self.max_workers, first_chunk_ms=self.first_chunk_ms,
+            progress=self.progress_signal.emit, on_utterances=self.on_utterances,
+            should_stop=lambda: not self._is_running
+        )
+        self.upload_report = backend.report()
+        if checkpoint is not None:
+            checkpoint.clear()
+
+    def import_transcript(self):
+        """流式导入转录文件，成功返回 True；没有产出任何字幕就失败时返回 False"""
+        imported = 0
+        batch = []
+        try:
+            for subtitle in iter_transcript(self.transcript_file):
+                if not self._is_running:
+                    raise InterruptedError("导入已取消")
+                batch.append(subtitle)
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    imported += len(batch)
+                    self.on_utterances(batch)
+                    batch = []
+            imported += len(batch)
+            self.on_utterances(batch)
+        except (ValueError, KeyError, TypeError, UnicodeDecodeError) as e:
+            if imported:
+                raise ValueError(f"导入转录文件出错: {e}")
+            logging.warning(f"无法导入转录文件 {self.transcript_file}，改为语音识别: {e}")
+            return False
+        logging.info(f"从转录文件导入 {imported} 条字幕，跳过语音识别: {self.transcript_file}")
+        return True
+
+    def on_utterances(self, utterances):
+        if self.segmenter is not None:
+            utterances = self.segmenter.add(utterances)
+        self.deliver(utterances)
+
+    def deliver(self, utterances):
+        """发出一批字幕并按全局下标送入翻译流水线"""
+        if not utterances:
+            return
+        self.utterances_ready.emit(utterances)
+        for utterance in utterances:
+            if self.translation_pipeline is not None and self._is_running:
+                self.translation_pipeline.submit(len(self.subtitles), utterance['text'])
+            self.subtitles.append(utterance)
 
     def stop(self):
-        """停止线程"""
         self._is_running = False
 
-class DisplayThread(QThread):
-    """处理字幕显示的线程"""
-    progress_signal = pyqtSignal(float)          
+class TranslationPipeline(QThread):
+    """流式字幕翻译流水线
 
-    def __init__(self, subtitles):
-        super().__init__()
-        self.subtitles = subtitles
-        self._is_running = True
+    转录线程每确定一条字幕就通过 submit 放入有界输入队列，workers 个翻译线程
+    并发取出翻译，结果经 translation_done 交给界面渲染。两处背压：输入队列满时
+    submit 阻塞上游转录线程；已发出但界面尚未渲染的译文达到 max_unrendered 时
+    翻译线程暂停，界面插入文档后调用 rendered 归还名额。close 表示上游输入结束，
+    队列取空后流水线退出。
+    """
+    translation_done = pyqtSignal(int, str, str)
+    error_occurred = pyqtSignal(int, str)
 
-    def run(self):
-        """执行字幕显示处理"""
-        try:
-            total = len(self.subtitles)
-            for i in range(total):
-                if not self._is_running:
-                    break
+    _min_interval = 0.1
 
+    def __init__(self, translator_type='google', api_key=None, workers=DEFAULT_TRANSLATION_WORKERS,
+                 max_queued=TRANSLATION_QUEUE_SIZE, max_unrendered=MAX_UNRENDERED_TRANSLATIONS):
+        super().__init__()
+        self.translator_type = translator_type
+        self.api_key = api_key
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(max_queued)
+        self.render_slots = threading.Semaphore(max_unrendered)
+        self._request_lock = threading.Lock()
+        self._last_request_time = 0
+        self._stats_lock = threading.Lock()
+        self.submit_wait = 0.0
+        self.render_wait = 0.0
+        self.translated = 0
+        self._closed = False
+        self._is_running = True
 
-                progress = (i + 1) / total
-                self.progress_signal.emit(progress)
+    def submit(self, index, text):
+        """加入一条待翻译字幕，空文本忽略；队列已满时阻塞，流水线停止后立即返回"""
+        if not text.strip():
+            return
+        started = time.perf_counter()
+        while self._is_running:
+            try:
+                self.queue.put((index, text), timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        with self._stats_lock:
+            self.submit_wait += time.perf_counter() - started
+
+    def close(self):
+        """上游不再有新字幕"""
+        self._closed = True
+
+    def rendered(self, count):
+        """界面已渲染 count 条译文，归还渲染名额"""
+        for _ in range(count):
+            self.render_slots.release()
 
+    def run(self):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for _ in range(self.workers):
+                executor.submit(self.work)
+        if self._is_running:
+            logging.info(
+                f"翻译流水线完成: {self.translated} 条, {self.workers} 个并发, 耗时 {time.perf_counter() - started:.2f}s, "
+                f"上游等待 {self.submit_wait:.2f}s, 渲染等待 {self.render_wait:.2f}s"
+            )
 
-                self.msleep(10)               
+    def work(self):
+        while self._is_running:
+            try:
+                index, text = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._closed:
+                    return
+                continue
+            try:
+                translation = self.translate(text)
+            except Exception as e:
+                if self._is_running:
+                    self.error_occurred.emit(index, str(e))
+                continue
+            if not translation:
+                if self._is_running:
+                    self.error_occurred.emit(index, "翻译失败")
+                continue
+
+            waited = time.perf_counter()
+            while self._is_running and not self.render_slots.acquire(timeout=0.1):
+                pass
+            with self._stats_lock:
+                self.render_wait += time.perf_counter() - waited
+                self.translated += 1
+            if self._is_running:
+                self.translation_done.emit(index, translation, self.translator_type)
 
-        except Exception as e:
-            print(f"字幕显示处理时出错: {e}")
+    def translate(self, text):
+        if self.translator_type == 'silicon_cloud':
+            with self._request_lock:
+                elapsed = time.time() - self._last_request_time
+                if elapsed < self._min_interval:
+                    time.sleep(self._min_interval - elapsed)
+                self._last_request_time = time.time()
+        return translate_text(text, translator_type=self.translator_type, api_key=self.api_key)
 
     def stop(self):
-        """停止线程"""
         self._is_running = False
@@ -0,0 +1,117 @@
+import bisect
+import sys
+from array import array
+
+
+class Utterance:
+    """单条字幕（一位说话人连续的一段话），单词数据保存在所属 Transcript 的数组中"""
+
+    __slots__ = ('speaker', 'start_time', 'end_time', 'text', 'word_start', 'word_end')
+
+    def __init__(self, speaker, start_time, end_time, text, word_start, word_end):
+        self.speaker = speaker
+        self.start_time = start_time
+        self.end_time = end_time
+        self.text = text
+        self.word_start = word_start
+        self.word_end = word_end
+
+    @property
+    def word_count(self):
+        return self.word_end - self.word_start
+
+
+class Transcript:
+    """紧凑的字幕转录内存模型
+
+    每条字幕是一个带 __slots__ 的 Utterance，全部单词的文本、开始/结束时间
+    以及所属字幕下标按全局单词下标存放在连续数组中；说话人和单词文本经过
+    驻留，重复出现的字符串只保存一份。字幕/单词的开始时间数组同时是播放时
+    按时间定位的唯一数据来源。时间单位为毫秒整数。
+    """
+
+    def __init__(self):
+        self.utterances = []
+        self.start_times = array('q')
+        self.word_texts = []
+        self.word_starts = array('q')
+        self.word_ends = array('q')
+        self.word_owners = array('i')
+
+    def __len__(self):
+        return len(self.utterances)
+
+    def __getitem__(self, idx):
+        return self.utterances[idx]
+
+    def __iter__(self):
+        return iter(self.utterances)
+
+    @property
+    def word_count(self):
+        return len(self.word_texts)
+
+    def append(self, speaker, start_time, end_time, text, words):
+        """追加一条字幕，words 为 (text, start, end) 序列，返回新字幕的下标"""
+        idx = len(self.utterances)
+        word_start = len(self.word_texts)
+        for word_text, word_start_time, word_end_time in words:
+            self.word_texts.append(sys.intern(word_text))
+            self.word_starts.append(int(word_start_time))
+            self.word_ends.append(int(word_end_time))
+            self.word_owners.append(idx)
+        self.utterances.append(Utterance(
+            sys.intern(speaker), int(start_time), int(end_time), text, word_start, len(self.word_texts)
+        ))
+        self.start_times.append(int(start_time))
+        return idx
+
+    def append_dict(self, subtitle):
+        """按字幕缓存格式的字典追加一条字幕"""
+        return self.append(
+            subtitle['speaker'], subtitle['start_time'], subtitle['end_time'], subtitle['text'],
+            ((word['text'], word['start'], word['end']) for word in subtitle['words'])
+        )
+
+    @classmethod
+    def from_dicts(cls, subtitles):
+        transcript = cls()
+        for subtitle in subtitles:
+            transcript.append_dict(subtitle)
+        return transcript
+
+    def to_dict(self, idx):
+        """第 idx 条字幕的字幕缓存格式字典"""
+        utterance = self.utterances[idx]
+        return {
+            'speaker': utterance.speaker,
+            'start_time': utterance.start_time,
+            'end_time': utterance.end_time,
+            'text': utterance.text,
+            'words': [
+                {'text': self.word_texts[i], 'start': self.word_starts[i], 'end': self.word_ends[i]}
+                for i in range(utterance.word_start, utterance.word_end)
+            ]
+        }
+
+    def to_dicts(self):
+        """导出为字幕缓存格式的字典列表"""
+        return [self.to_dict(idx) for idx in range(len(self.utterances))]
+
+    def words(self, idx):
+        """第 idx 条字幕的单词文本列表"""
+        utterance = self.utterances[idx]
+        return self.word_texts[utterance.word_start:utterance.word_end]
+
+    def word_owner(self, word_idx):
+        """全局单词下标对应的 (字幕下标, 字幕内单词下标)"""
+        idx = self.word_owners[word_idx]
+        return idx, word_idx - self.utterances[idx].word_start
+
+    def subtitle_at(self, time_ms):
+        """time_ms 时正在播放的字幕下标，早于第一条字幕时为 -1"""
+        return bisect.bisect_right(self.start_times, time_ms) - 1
+
+    def word_at(self, time_ms):
+        """time_ms 时正在播放的全局单词下标，早于第一个单词时为 -1"""
+        return bisect.bisect_right(self.word_starts, time_ms) - 1
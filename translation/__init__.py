@@ -2,6 +2,8 @@ from . import translationGoogle
 from . import translationGemini
 from . import translationSiliconCloud
 
+DEFAULT_TRANSLATION_WORKERS = 4
+
 
 def translate_text(text, translator_type='google', api_key=None):
     """
@@ -28,4 +30,4 @@ def translate_text(text, translator_type='google', api_key=None):
         print(f"翻译出错: {e}")
         return None
 
-__all__ = ['translationGoogle', 'translationGemini', 'translationSiliconCloud', 'translate_text']
+__all__ = ['translationGoogle', 'translationGemini', 'translationSiliconCloud', 'translate_text', 'DEFAULT_TRANSLATION_WORKERS']
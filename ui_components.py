@@ -1,9 +1,82 @@
 
-from PyQt5.QtWidgets import QTextBrowser, QPushButton, QSlider, QStyle, QLineEdit, QLabel
-from PyQt5.QtCore import Qt, QTimer, QPoint
+import bisect
+from collections import OrderedDict
+from PyQt5.QtWidgets import QTextBrowser, QTextEdit, QPushButton, QSlider, QStyle, QLineEdit, QLabel
+from PyQt5.QtCore import Qt, QTimer, QPoint, QObject, QElapsedTimer, QEasingCurve
 from PyQt5.QtGui import QColor, QFont, QPainter, QPainterPath, QTextCursor, QTextCharFormat
-from PyQt5.QtWidgets import QWidget
-from PyQt5.QtCore import QRect, QSize, QRectF
+from PyQt5.QtWidgets import QWidget, QAbstractScrollArea
+from PyQt5.QtCore import QRect, QSize, QRectF, QPointF, pyqtSignal
+from PyQt5.QtGui import QTextLayout, QTextOption
+
+from utils import FenwickTree, utf16_len
+from transcript import Transcript
+
+class SmoothScroller(QObject):
+    """滚动条的平滑滚动控制器
+
+    按固定时长和缓动曲线插值滚动位置，定时器只在动画期间运行。动画进行中
+    收到新的目标时从当前位置重新开始同一个动画，而不是叠加新的定时器；目标
+    区域已在视口的舒适区内时不滚动。
+    """
+
+    def __init__(self, scrollbar, duration_ms=250, parent=None):
+        super().__init__(parent)
+        self.scrollbar = scrollbar
+        self.duration = duration_ms
+        self.curve = QEasingCurve(QEasingCurve.OutCubic)
+        self._start = 0
+        self._end = 0
+        self._clock = QElapsedTimer()
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._step)
+
+    def isActive(self):
+        return self._timer.isActive()
+
+    def stop(self):
+        self._timer.stop()
+
+    def target(self):
+        """动画结束时的位置，未在滚动时为当前位置"""
+        return self._end if self.isActive() else self.scrollbar.value()
+
+    def scroll_to(self, position):
+        """平滑滚动到 position，相差不足 2 像素时直接跳到目标"""
+        position = max(self.scrollbar.minimum(), min(int(position), self.scrollbar.maximum()))
+        if position == self.target():
+            return
+        current = self.scrollbar.value()
+        if abs(position - current) < 2:
+            self.stop()
+            self.scrollbar.setValue(position)
+            return
+        self._start = current
+        self._end = position
+        self._clock.start()
+        if not self._timer.isActive():
+            self._timer.start(16)
+
+    def ensure_visible(self, top, height, viewport_height, margin_ratio=0.2):
+        """内容区间 [top, top + height) 不在视口上下各留 margin_ratio 的区域内时滚动到居中
+
+        以动画的目标位置判断，连续的请求只会合并为一次滚动。返回是否发起了滚动。
+        """
+        view_top = self.target()
+        margin = min(viewport_height * margin_ratio, max(0, (viewport_height - height) / 2))
+        if top >= view_top + margin and top + height <= view_top + viewport_height - margin:
+            return False
+        self.scroll_to(top + height / 2 - viewport_height / 2)
+        return True
+
+    def _step(self):
+        progress = min(1.0, self._clock.elapsed() / self.duration)
+        value = round(self._start + (self._end - self._start) * self.curve.valueForProgress(progress))
+        if value != self.scrollbar.value():
+            self.scrollbar.setValue(value)
+        if progress >= 1.0:
+            self._timer.stop()
+
 
 class ModernMacTextBrowser(QTextBrowser):
     """macOS 风格文本浏览器"""
@@ -48,14 +121,50 @@ class ModernMacTextBrowser(QTextBrowser):
         self.setFont(font)
 
 
+        self.document().setUndoRedoEnabled(False)
+
+
+        self.highlights = {}
+
+
         self.last_scroll_position = 0
 
 
-        self.smooth_scroll_timer = QTimer(self)
-        self.smooth_scroll_timer.timeout.connect(self.smooth_scroll_step)
-        self.target_scroll_position = 0
-        self.current_scroll_position = 0
-        self.scroll_step_size = 10
+        self.scroller = SmoothScroller(self.verticalScrollBar(), parent=self)
+
+
+        self.block_geometry_cache = {}
+        self.document().documentLayout().documentSizeChanged.connect(self.invalidate_block_geometry)
+        self.document().contentsChange.connect(self.invalidate_block_geometry)
+
+    def set_highlight(self, layer, start=None, end=None, color=None, underline=False):
+        """设置第 layer 层的高亮区间，start 为 None 时移除该层
+
+        高亮以 ExtraSelection 覆盖层绘制，不修改文档格式，层号大的绘制在上面。
+        underline 为 True 时以 color 色下划线代替背景色。
+        """
+        if start is None:
+            if self.highlights.pop(layer, None) is None:
+                return
+        else:
+            cursor = QTextCursor(self.document())
+            cursor.setPosition(start)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = cursor
+            if underline:
+                selection.format.setFontUnderline(True)
+                selection.format.setUnderlineColor(QColor(color))
+            else:
+                selection.format.setBackground(QColor(color))
+            self.highlights[layer] = selection
+        self.setExtraSelections([self.highlights[key] for key in sorted(self.highlights)])
+
+    def clear_highlights(self):
+        """移除所有高亮层"""
+        if self.highlights:
+            self.highlights.clear()
+            self.setExtraSelections([])
 
     def save_scroll_position(self):
         """保存当前滚动位置"""
@@ -67,22 +176,25 @@ class ModernMacTextBrowser(QTextBrowser):
 
     def smooth_scroll_to_position(self, position):
         """平滑滚动到指定位置"""
-        self.target_scroll_position = position
-        self.current_scroll_position = self.verticalScrollBar().value()
-
-        if not self.smooth_scroll_timer.isActive():
-            self.smooth_scroll_timer.start(16)          
-
-    def smooth_scroll_step(self):
-        """执行平滑滚动的单个步骤"""
-        if abs(self.current_scroll_position - self.target_scroll_position) < 1:
-            self.smooth_scroll_timer.stop()
-            self.verticalScrollBar().setValue(self.target_scroll_position)
-            return
-
-
-        self.current_scroll_position += (self.target_scroll_position - self.current_scroll_position) * 0.2
-        self.verticalScrollBar().setValue(int(self.current_scroll_position))
+        self.scroller.scroll_to(position)
+
+    def block_geometry(self, position):
+        """文档位置 position 所在文本块的 (top, height)，缓存到文档下次重新布局"""
+        geometry = self.block_geometry_cache.get(position)
+        if geometry is None:
+            block = self.document().findBlock(position)
+            rect = self.document().documentLayout().blockBoundingRect(block)
+            geometry = (rect.top(), rect.height())
+            self.block_geometry_cache[position] = geometry
+        return geometry
+
+    def invalidate_block_geometry(self, *args):
+        self.block_geometry_cache.clear()
+
+    def ensure_position_visible(self, position):
+        """position 所在文本块不在视口舒适区内时平滑滚动到居中，返回是否滚动"""
+        top, height = self.block_geometry(position)
+        return self.scroller.ensure_visible(top, height, self.viewport().height())
 
     def get_visible_block_range(self):
         """获取当前可见的文本块范围"""
@@ -418,3 +530,385 @@ class ModernMacLineEdit(QLineEdit):
                 color: #999999;
             }
         """)
+
+
+class VirtualSubtitleView(QAbstractScrollArea):
+    """虚拟化字幕视图
+
+    只为视口附近的字幕创建 QTextLayout 并绘制，其余字幕只保留按字符数估算的
+    行高；行高前缀和由树状数组维护，滚动定位和点击命中都是 O(log n)。
+    已创建的布局数量有上限，超出时按最久未用淘汰，因此内存和每帧开销不随
+    字幕长度增长。正文与翻译的高度分开记录，切换翻译显示时只需重建前缀和，
+    已创建的布局继续有效。
+    """
+    subtitle_clicked = pyqtSignal(int, int)
+
+    SUBTITLE_HIGHLIGHT = '#FFFF99'
+    WORD_HIGHLIGHT = '#FFCC66'
+    HOVER_UNDERLINE = '#007AFF'
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setStyleSheet("""
+            QAbstractScrollArea {
+                background-color: #FFFFFF;
+                border: 1px solid #E5E5E5;
+                border-radius: 8px;
+            }
+            QScrollBar:vertical {
+                border: none;
+                background: transparent;
+                width: 8px;
+                margin: 4px 0;
+            }
+            QScrollBar::handle:vertical {
+                background: #9999A5;
+                border-radius: 4px;
+                min-height: 30px;
+            }
+            QScrollBar::handle:vertical:hover {
+                background: #666666;
+            }
+            QScrollBar::add-line:vertical, 
+            QScrollBar::sub-line:vertical {
+                height: 0px;
+            }
+            QScrollBar::add-page:vertical,
+            QScrollBar::sub-page:vertical {
+                background: none;
+            }
+        """)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+
+
+        font = self.font()
+        font.setFamily(".AppleSystemUIFont")
+        font.setPointSize(13)
+        self.setFont(font)
+
+
+        self.padding = 12
+        self.max_layouts = 200
+        self.transcript = Transcript()
+        self.translation_text = lambda idx: ''
+        self.show_translation = True
+        self.heights = FenwickTree()
+        self.content_heights = []
+        self.translation_heights = []
+        self.layouts = OrderedDict()
+        self.highlight_index = -1
+        self.highlight_word = -1
+        self.hover_index = -1
+        self.hover_word = -1
+        self.layout_width = 1
+        self.metrics = (1, 1, 1)
+        self.viewport().setMouseTracking(True)
+
+
+        self.scroller = SmoothScroller(self.verticalScrollBar(), parent=self)
+
+    def set_subtitles(self, transcript, translation_text, show_translation=True):
+        """设置字幕转录（Transcript）；translation_text(idx) 返回第 idx 条字幕的翻译文本"""
+        self.transcript = transcript
+        self.translation_text = translation_text
+        self.show_translation = show_translation
+        self.highlight_index = -1
+        self.highlight_word = -1
+        self.hover_index = -1
+        self.hover_word = -1
+        self.scroller.stop()
+        self.relayout(keep_anchor=False)
+        self.verticalScrollBar().setValue(0)
+
+    def sync_rows(self):
+        """字幕转录在末尾追加后调用，为新字幕补充估算行高"""
+        for idx in range(len(self.heights), len(self.transcript)):
+            content_height, translation_height = self.estimate_heights(idx)
+            self.content_heights.append(content_height)
+            self.translation_heights.append(translation_height)
+            self.heights.append(self.row_height(idx))
+        self.update_scroll_range()
+        self.viewport().update()
+
+    def set_show_translation(self, show):
+        """切换是否显示翻译，保持视口顶部的字幕位置不变
+
+        只按已记录的正文/翻译高度重建行高前缀和，不重新估算或创建布局。
+        """
+        if show == self.show_translation:
+            return
+        scrollbar = self.verticalScrollBar()
+        anchor = self.row_at(scrollbar.value())
+        offset = scrollbar.value() - self.row_top(anchor) if anchor >= 0 else 0
+        self.show_translation = show
+        self.scroller.stop()
+        self.heights = FenwickTree(map(self.row_height, range(len(self.transcript))))
+        self.update_scroll_range()
+        if anchor >= 0:
+            scrollbar.setValue(self.row_top(anchor) + min(offset, self.content_heights[anchor]))
+        self.viewport().update()
+
+    def update_subtitle(self, idx):
+        """第 idx 条字幕内容或翻译变化后重新计算该行"""
+        if not (0 <= idx < len(self.heights)):
+            return
+        self.layouts.pop(idx, None)
+        self.content_heights[idx], self.translation_heights[idx] = self.estimate_heights(idx)
+        self.heights.set(idx, self.row_height(idx))
+        self.update_scroll_range()
+        self.viewport().update()
+
+    def set_highlight(self, idx, word_idx=-1):
+        """高亮第 idx 条字幕及其中第 word_idx 个单词，idx 为 -1 时清除高亮"""
+        if idx == self.highlight_index and word_idx == self.highlight_word:
+            return
+        previous = self.highlight_index
+        self.highlight_index = idx
+        self.highlight_word = word_idx
+        self.update_row(previous)
+        if idx != previous:
+            self.update_row(idx)
+
+    def set_hover(self, idx, word_idx=-1):
+        """为第 idx 条字幕的第 word_idx 个单词加下划线，表示点击可跳转到该单词"""
+        if idx == self.hover_index and word_idx == self.hover_word:
+            return
+        previous = self.hover_index
+        self.hover_index = idx
+        self.hover_word = word_idx
+        self.viewport().setCursor(Qt.PointingHandCursor if word_idx >= 0 else Qt.ArrowCursor)
+        self.update_row(previous)
+        if idx != previous:
+            self.update_row(idx)
+
+    def row_top(self, idx):
+        return self.heights.prefix_sum(idx)
+
+    def row_at(self, y):
+        """内容坐标 y 处的字幕下标"""
+        if not len(self.heights):
+            return -1
+        return min(self.heights.find(y), len(self.heights) - 1)
+
+    def update_row(self, idx):
+        """只重绘第 idx 条字幕所在区域"""
+        if not (0 <= idx < len(self.heights)):
+            return
+        top = self.row_top(idx) - self.verticalScrollBar().value()
+        if top + self.heights[idx] < 0 or top > self.viewport().height():
+            return
+        self.viewport().update(0, top, self.viewport().width(), self.heights[idx])
+
+    def scroll_to_subtitle(self, idx, smooth=True):
+        """将第 idx 条字幕滚动到视口中央；平滑滚动时字幕已在视口舒适区内则不滚动"""
+        if not (0 <= idx < len(self.heights)):
+            return
+        self.ensure_layout(idx)
+        if smooth:
+            self.scroller.ensure_visible(self.row_top(idx), self.heights[idx], self.viewport().height())
+            return
+        target = self.row_top(idx) + self.heights[idx] / 2 - self.viewport().height() / 2
+        self.scroller.stop()
+        self.verticalScrollBar().setValue(int(max(0, min(target, self.verticalScrollBar().maximum()))))
+
+    def text_width(self):
+        return max(1, self.viewport().width() - 2 * self.padding)
+
+    def estimate_heights(self, idx):
+        """按字符数估算第 idx 条字幕正文（含行间空白）与翻译的高度，不创建文本布局"""
+        char_width, cjk_width, line_height = self.metrics
+        width = self.layout_width
+        utterance = self.transcript[idx]
+        content_chars = len(utterance.speaker) + 2 + len(utterance.text)
+        content_lines = max(1, -(-content_chars * char_width // width))
+        translation = self.translation_text(idx)
+        translation_lines = max(1, -(-len(translation) * cjk_width // width)) if translation else 0
+        return (content_lines + 1) * line_height, translation_lines * line_height
+
+    def row_height(self, idx):
+        if self.show_translation:
+            return self.content_heights[idx] + self.translation_heights[idx]
+        return self.content_heights[idx]
+
+    def relayout(self, keep_anchor=True):
+        """宽度或显示模式变化后丢弃全部布局并重新估算行高"""
+        scrollbar = self.verticalScrollBar()
+        anchor = self.row_at(scrollbar.value()) if keep_anchor else -1
+        offset = scrollbar.value() - self.row_top(anchor) if anchor >= 0 else 0
+        self.layouts.clear()
+        self.layout_width = self.text_width()
+        metrics = self.fontMetrics()
+        self.metrics = (metrics.averageCharWidth(), metrics.height(), metrics.lineSpacing())
+        estimates = [self.estimate_heights(idx) for idx in range(len(self.transcript))]
+        self.content_heights = [content_height for content_height, _ in estimates]
+        self.translation_heights = [translation_height for _, translation_height in estimates]
+        self.heights = FenwickTree(map(self.row_height, range(len(self.transcript))))
+        self.update_scroll_range()
+        if 0 <= anchor < len(self.heights):
+            scrollbar.setValue(self.row_top(anchor) + min(offset, self.heights[anchor]))
+        self.viewport().update()
+
+    def update_scroll_range(self):
+        scrollbar = self.verticalScrollBar()
+        viewport_height = self.viewport().height()
+        scrollbar.setRange(0, max(0, self.heights.total() - viewport_height))
+        scrollbar.setPageStep(viewport_height)
+        scrollbar.setSingleStep(self.fontMetrics().lineSpacing())
+
+    def build_text_layout(self, text, y):
+        layout = QTextLayout(text, self.font())
+        option = QTextOption()
+        option.setWrapMode(QTextOption.WrapAtWordBoundaryOrAnywhere)
+        layout.setTextOption(option)
+        layout.beginLayout()
+        while True:
+            line = layout.createLine()
+            if not line.isValid():
+                break
+            line.setLineWidth(self.layout_width)
+            line.setPosition(QPointF(0, y))
+            y += line.height()
+        layout.endLayout()
+        return layout, y
+
+    def ensure_layout(self, idx):
+        """返回第 idx 条字幕的文本布局，必要时创建并用实际高度修正估算值"""
+        row = self.layouts.get(idx)
+        if row is not None:
+            self.layouts.move_to_end(idx)
+            return row
+
+        utterance = self.transcript[idx]
+        words = self.transcript.words(idx)
+        prefix = f"{utterance.speaker}: "
+        word_ranges = []
+        word_starts = []
+        position = utf16_len(prefix)
+        for word in words:
+            length = utf16_len(word)
+            word_ranges.append((position, length))
+            word_starts.append(position)
+            position += length + 1
+        text = prefix + ' '.join(words)
+
+        content, content_height = self.build_text_layout(text, 0)
+        translation = None
+        translation_height = 0
+        translation_text = self.translation_text(idx)
+        if translation_text:
+            translation, y = self.build_text_layout(translation_text, content_height)
+            translation_height = int(y) - int(content_height)
+        content_height = int(content_height) + self.fontMetrics().lineSpacing()
+
+        row = {
+            'content': content,
+            'translation': translation,
+            'word_ranges': word_ranges,
+            'word_starts': word_starts,
+            'color': QColor('#2196F3' if utterance.speaker == 'A' else '#4CAF50')
+        }
+        self.layouts[idx] = row
+        self.content_heights[idx] = content_height
+        self.translation_heights[idx] = translation_height
+        height = self.row_height(idx)
+        if self.heights[idx] != height:
+            self.heights.set(idx, height)
+            self.update_scroll_range()
+        while len(self.layouts) > self.max_layouts:
+            self.layouts.popitem(last=False)
+        return row
+
+    def selection(self, start, length, color, underline=False):
+        selection = QTextLayout.FormatRange()
+        selection.start = start
+        selection.length = length
+        fmt = QTextCharFormat()
+        if underline:
+            fmt.setFontUnderline(True)
+            fmt.setUnderlineColor(QColor(color))
+        else:
+            fmt.setBackground(QColor(color))
+        selection.format = fmt
+        return selection
+
+    def paintEvent(self, event):
+        if not self.transcript:
+            return
+        if self.layout_width != self.text_width():
+            self.relayout()
+
+        painter = QPainter(self.viewport())
+        clip = event.rect()
+        scroll = self.verticalScrollBar().value()
+        idx = self.row_at(scroll + clip.top())
+        top = self.row_top(idx) - scroll
+        # 只在锚点及其下方创建布局，锚点上方的行高修正不会使可见内容跳动
+        while idx < len(self.transcript) and top < clip.bottom():
+            row = self.ensure_layout(idx)
+            translation = row['translation'] if self.show_translation else None
+            selections = []
+            translation_selections = []
+            if idx == self.highlight_index:
+                selections.append(self.selection(0, utf16_len(row['content'].text()), self.SUBTITLE_HIGHLIGHT))
+                if 0 <= self.highlight_word < len(row['word_ranges']):
+                    start, length = row['word_ranges'][self.highlight_word]
+                    selections.append(self.selection(start, length, self.WORD_HIGHLIGHT))
+                if translation is not None:
+                    translation_selections.append(
+                        self.selection(0, utf16_len(translation.text()), self.SUBTITLE_HIGHLIGHT))
+            if idx == self.hover_index and 0 <= self.hover_word < len(row['word_ranges']):
+                start, length = row['word_ranges'][self.hover_word]
+                selections.append(self.selection(start, length, self.HOVER_UNDERLINE, underline=True))
+
+            origin = QPointF(self.padding, top)
+            painter.setPen(row['color'])
+            row['content'].draw(painter, origin, selections)
+            if translation is not None:
+                painter.setPen(QColor('#000000'))
+                translation.draw(painter, origin, translation_selections)
+            top += self.heights[idx]
+            idx += 1
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.transcript and self.layout_width != self.text_width():
+            self.relayout()
+        else:
+            self.update_scroll_range()
+
+    def hit_test(self, pos):
+        """返回视口坐标 pos 处的 (字幕下标, 单词下标)，未命中单词时单词下标为 -1"""
+        idx = self.row_at(pos.y() + self.verticalScrollBar().value())
+        if idx < 0:
+            return -1, -1
+        row = self.ensure_layout(idx)
+        y = pos.y() + self.verticalScrollBar().value() - self.row_top(idx)
+        x = pos.x() - self.padding
+        content = row['content']
+        for i in range(content.lineCount()):
+            line = content.lineAt(i)
+            if line.y() <= y < line.y() + line.height():
+                cursor = line.xToCursor(x)
+                word_idx = bisect.bisect_right(row['word_starts'], cursor) - 1
+                if word_idx >= 0 and cursor <= sum(row['word_ranges'][word_idx]):
+                    return idx, word_idx
+                break
+        return idx, -1
+
+    def mousePressEvent(self, event):
+        if event.button() != Qt.LeftButton:
+            return super().mousePressEvent(event)
+        idx, word_idx = self.hit_test(event.pos())
+        if idx >= 0:
+            self.subtitle_clicked.emit(idx, word_idx)
+
+    def mouseMoveEvent(self, event):
+        self.set_hover(*self.hit_test(event.pos()))
+        super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event):
+        self.set_hover(-1)
+        super().leaveEvent(event)
@@ -19,3 +19,69 @@ def format_time(ms):
         return f'{h:02}:{m:02}:{s:02}'
     else:
         return f'{m:02}:{s:02}'
+
+def utf16_len(text):
+    """文本在 Qt 文档中占用的位置数（UTF-16 码元数）"""
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-16-le')) // 2
+
+class FenwickTree:
+    """树状数组：O(log n) 的单点修改、前缀和以及按前缀和定位"""
+
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.tree = [0] * (len(self.values) + 1)
+        for i, value in enumerate(self.values, 1):
+            self.tree[i] += value
+            parent = i + (i & -i)
+            if parent < len(self.tree):
+                self.tree[parent] += self.tree[i]
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, idx):
+        return self.values[idx]
+
+    def append(self, value):
+        """在末尾追加一个元素"""
+        self.values.append(value)
+        i = len(self.values)
+        self.tree.append(value + self.prefix_sum(i - 1) - self.prefix_sum(i - (i & -i)))
+
+    def add(self, idx, delta):
+        """第 idx 个元素增加 delta"""
+        self.values[idx] += delta
+        i = idx + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def set(self, idx, value):
+        """将第 idx 个元素设为 value"""
+        self.add(idx, value - self.values[idx])
+
+    def prefix_sum(self, count):
+        """前 count 个元素之和"""
+        total = 0
+        while count > 0:
+            total += self.tree[count]
+            count -= count & -count
+        return total
+
+    def total(self):
+        return self.prefix_sum(len(self.values))
+
+    def find(self, target):
+        """返回前缀和不超过 target 的最大元素个数，即 target 落在的元素下标"""
+        pos = 0
+        remaining = target
+        step = 1 << len(self.values).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= len(self.values) and self.tree[nxt] <= remaining:
+                pos = nxt
+                remaining -= self.tree[nxt]
+            step >>= 1
+        return pos